@@ -7,4 +7,8 @@ setup(
     url='https://github.com/jasonstrimpel/volatility-trading/',
     license='GPL-3.0-or-later',
     packages=['volatility','volatility/models'],
+    extras_require={
+        'jit': ['numba'],
+        'pdf': ['pypdf'],
+    },
 )
@@ -0,0 +1,40 @@
+import os
+
+import numpy
+import pytest
+
+from volatility import data
+from volatility.benchmark import synthetic_ohlc
+
+TESTS_PATH = os.path.dirname(os.path.abspath(__file__))
+SYMBOLS = 6
+ROWS = 2000
+
+
+@pytest.fixture(scope='session')
+def jpm():
+    return data.yahoo_helper('JPM', os.path.join(TESTS_PATH, 'JPM.csv'))
+
+
+@pytest.fixture(scope='session')
+def bench():
+    return data.yahoo_helper('SPY', os.path.join(TESTS_PATH, 'BENCH.csv'))
+
+
+@pytest.fixture(scope='session')
+def panel():
+    """Open, high, low and close arrays of shape (ROWS, SYMBOLS)
+
+    Symbols are listed part way through the history and the first one has
+    a halted bar, so the engines see leading and inner missing bars.
+    """
+
+    frames = [synthetic_ohlc(ROWS, seed=seed) for seed in range(SYMBOLS)]
+    prices = tuple(numpy.column_stack([frame[column].values for frame in frames]) for column in data.PRICE_COLUMNS)
+    for x in prices:
+        for symbol in range(SYMBOLS):
+            x[:symbol * ROWS // (2 * SYMBOLS), symbol] = numpy.nan
+        x[ROWS // 2, 0] = numpy.nan
+        x.flags.writeable = False
+
+    return prices
@@ -0,0 +1,74 @@
+import os
+import shutil
+
+import pytest
+
+from volatility import batch
+
+TESTS_PATH = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def manifest(tmp_path):
+
+    for name in ['JPM.csv', 'BENCH.csv']:
+        shutil.copy(os.path.join(TESTS_PATH, name), str(tmp_path / name))
+
+    path = tmp_path / 'manifest.csv'
+    path.write_text('symbol,path,benchmark,benchmark_path\nJPM,JPM.csv,SPY,BENCH.csv\n')
+
+    return str(path)
+
+
+def _run(manifest, output_dir, *options):
+
+    assert batch.main([manifest, '--output-dir', output_dir, '--processes', '1'] + list(options)) == 0
+
+    return batch.existing_term_sheet(output_dir, 'JPM')
+
+
+def test_rerun_skips_up_to_date_term_sheets(manifest, tmp_path):
+
+    output_dir = str(tmp_path / 'out')
+
+    first = batch.run(manifest, output_dir, estimator='Raw', processes=1)
+    second = batch.run(manifest, output_dir, estimator='Raw', processes=1, window=30)
+
+    assert [row['status'] for row in first] == ['done']
+    assert [row['status'] for row in second] == ['skipped']
+    assert os.path.isfile(batch.options_path(first[0]['path']))
+
+
+@pytest.mark.parametrize('changed, estimator, options', [
+    (['--estimator', 'YangZhang'], 'YangZhang', {}),
+    (['--windows', '30', '60'], 'Raw', {'windows': [30, 60]}),
+    (['--bins', '50'], 'Raw', {'bins': 50}),
+])
+def test_rerun_with_other_options_rebuilds(manifest, tmp_path, changed, estimator, options):
+
+    output_dir = str(tmp_path / 'out')
+
+    path = _run(manifest, output_dir, '--estimator', 'Raw')
+    # newer than the inputs, so only the options can make it out of date
+    for name in ['JPM.csv', 'BENCH.csv']:
+        os.utime(str(tmp_path / name), (0, 0))
+    os.utime(path, (1000, 1000))
+    assert _run(manifest, output_dir, '--estimator', 'Raw') == path
+    assert os.path.getmtime(path) == 1000
+
+    path = _run(manifest, output_dir, '--estimator', 'Raw', *changed)
+
+    assert os.path.getmtime(path) > 1000
+    assert batch.is_up_to_date(path, options=batch.recorded_options(estimator, options))
+    assert not batch.is_up_to_date(path, options=batch.recorded_options('Raw', {}))
+
+
+def test_missing_options_file_is_out_of_date(manifest, tmp_path):
+
+    output_dir = str(tmp_path / 'out')
+
+    [result] = batch.run(manifest, output_dir, estimator='Raw', processes=1)
+    os.remove(batch.options_path(result['path']))
+
+    assert not batch.is_up_to_date(result['path'], options=batch.recorded_options('Raw', {}))
+    assert [row['status'] for row in batch.run(manifest, output_dir, estimator='Raw', processes=1)] == ['done']
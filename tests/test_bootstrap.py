@@ -0,0 +1,62 @@
+import numpy
+import pytest
+
+from volatility import bootstrap, models
+
+# more than one batch, the last of them partial
+RESAMPLES = 2 * bootstrap.BATCH_SIZE + 50
+
+
+@pytest.fixture
+def prices(jpm):
+    return tuple(jpm[column].values for column in ['Open', 'High', 'Low', 'Close'])
+
+
+@pytest.mark.parametrize('method', bootstrap.METHODS)
+def test_block_indices_stay_in_range(method):
+
+    indices = bootstrap.block_indices(100, 80, 50, 5, method=method, rng=numpy.random.default_rng(0))
+
+    assert indices.shape == (80, 50)
+    assert indices.min() >= 0
+    assert indices.max() < 100
+
+
+@pytest.mark.parametrize('estimator', ['YangZhang', 'HodgesTompkins'])
+def test_bootstrap_realized_does_not_depend_on_processes(estimator, prices):
+
+    single = bootstrap.bootstrap_realized(estimator, *prices, resamples=RESAMPLES, seed=7)
+    pooled = bootstrap.bootstrap_realized(estimator, *prices, resamples=RESAMPLES, seed=7, processes=2)
+
+    assert single.samples.shape == (RESAMPLES,)
+    numpy.testing.assert_array_equal(pooled.samples, single.samples)
+    assert (pooled.lower, pooled.upper) == (single.lower, single.upper)
+
+
+def test_bootstrap_cones_does_not_depend_on_processes(prices):
+
+    kwargs = {'windows': [30, 60], 'quantiles': [0.25, 0.75], 'resamples': RESAMPLES, 'seed': 7}
+
+    single = bootstrap.bootstrap_cones('Raw', *prices, **kwargs)
+    pooled = bootstrap.bootstrap_cones('Raw', *prices, processes=2, **kwargs)
+
+    assert single.samples.shape == (RESAMPLES, 2, 2)
+    numpy.testing.assert_array_equal(pooled.samples, single.samples)
+    numpy.testing.assert_array_equal(pooled.lower, single.lower)
+
+
+def test_bootstrap_realized_estimate_is_the_last_value(prices):
+
+    interval = bootstrap.bootstrap_realized('YangZhang', *prices, window=30, resamples=50, seed=0)
+
+    expected = models.YangZhang.get_estimator(prices, window=30, clean=False)[-1]
+    numpy.testing.assert_allclose(interval.estimate, expected, rtol=1e-9)
+    assert interval.lower <= interval.upper
+
+
+def test_bootstrap_seeds_change_the_resamples(prices):
+
+    first = bootstrap.bootstrap_realized('Raw', *prices, resamples=50, seed=1)
+    second = bootstrap.bootstrap_realized('Raw', *prices, resamples=50, seed=2)
+
+    assert not numpy.array_equal(first.samples, second.samples)
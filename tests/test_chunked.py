@@ -0,0 +1,72 @@
+import numpy
+import pytest
+
+from volatility import chunked, models
+from volatility import panel as panel_engine
+from volatility.volest import ESTIMATORS
+
+WINDOW = 30
+# smaller than the histories and not a multiple of the window, so blocks
+# start part way through a window
+CHUNK_SIZE = 257
+BLOCKED_ESTIMATORS = [e for e in ESTIMATORS if e not in chunked.RECURSIVE_ESTIMATORS]
+
+
+def _memmap(path, x):
+
+    out = numpy.lib.format.open_memmap(str(path), mode='w+', dtype=x.dtype, shape=x.shape)
+    out[:] = x
+    out.flush()
+
+    return numpy.load(str(path), mmap_mode='r')
+
+
+@pytest.mark.parametrize('estimator', BLOCKED_ESTIMATORS)
+def test_chunked_matches_single_symbol(estimator, jpm, tmp_path):
+
+    prices = tuple(
+        _memmap(tmp_path / (column + '.npy'), jpm[column].values)
+        for column in ['Open', 'High', 'Low', 'Close']
+    )
+
+    values = chunked.get_estimator(estimator, *prices, window=WINDOW, chunk_size=CHUNK_SIZE)
+    expected = getattr(models, estimator).get_estimator(prices, window=WINDOW, clean=False)
+
+    numpy.testing.assert_array_equal(numpy.isnan(values), numpy.isnan(expected))
+    numpy.testing.assert_allclose(values, expected, rtol=1e-9)
+
+
+@pytest.mark.parametrize('estimator', BLOCKED_ESTIMATORS)
+def test_chunked_matches_panel(estimator, panel, tmp_path):
+
+    out = numpy.lib.format.open_memmap(str(tmp_path / 'out.npy'), mode='w+', shape=panel[3].shape)
+
+    values = chunked.get_estimator(estimator, *panel, window=WINDOW, chunk_size=CHUNK_SIZE, out=out)
+    expected = panel_engine.get_estimator(estimator, *panel, window=WINDOW)
+
+    assert values is out
+    numpy.testing.assert_array_equal(numpy.isnan(values), numpy.isnan(expected))
+    numpy.testing.assert_allclose(values, expected, rtol=1e-9)
+
+
+def test_iter_estimator_covers_every_row(jpm):
+
+    close = jpm['Close'].values
+    prices = tuple(jpm[column].values for column in ['Open', 'High', 'Low', 'Close'])
+
+    stops = [0]
+    for start, stop, values in chunked.iter_estimator('Raw', *prices, window=WINDOW, chunk_size=CHUNK_SIZE):
+        assert start == stops[-1]
+        assert values.shape == (stop - start,)
+        stops.append(stop)
+
+    assert stops[-1] == len(close)
+
+
+@pytest.mark.parametrize('estimator', chunked.RECURSIVE_ESTIMATORS)
+def test_chunked_rejects_recursive_models(estimator, jpm):
+
+    prices = tuple(jpm[column].values for column in ['Open', 'High', 'Low', 'Close'])
+
+    with pytest.raises(ValueError):
+        chunked.get_estimator(estimator, *prices, window=WINDOW)
@@ -0,0 +1,40 @@
+import numpy
+import pytest
+
+from volatility import cones, volest
+
+WINDOWS = [10, 20, 30, 60, 90]
+QUANTILES = [0.0, 0.25, 0.5, 0.75, 1.0]
+
+
+@pytest.mark.parametrize('estimator', ['Raw', 'YangZhang', 'Skew'])
+def test_cone_surface_matches_cones(estimator, jpm):
+
+    vol = volest.VolatilityEstimator(price_data=jpm, estimator=estimator)
+
+    surface = vol.cone_surface(windows=WINDOWS, quantiles=QUANTILES)
+    max_, top_q, median, bottom_q, min_, realized, _ = vol._cones_data(windows=WINDOWS, quantiles=[0.25, 0.75])
+
+    numpy.testing.assert_array_equal(surface.windows, WINDOWS)
+    assert surface.values.shape == (len(WINDOWS), len(QUANTILES))
+    numpy.testing.assert_allclose(surface.values, numpy.column_stack([min_, bottom_q, median, top_q, max_]), rtol=1e-12)
+    numpy.testing.assert_allclose(surface.realized, realized, rtol=1e-12)
+
+
+def test_panel_cone_surface_matches_each_symbol(panel):
+
+    surface = cones.get_cone_surface('YangZhang', *panel, windows=WINDOWS, quantiles=QUANTILES, window_chunk=2)
+
+    assert surface.values.shape == (len(WINDOWS), len(QUANTILES), panel[3].shape[1])
+    for symbol in range(panel[3].shape[1]):
+        expected = cones.get_cone_surface('YangZhang', *(x[:, symbol] for x in panel), windows=WINDOWS, quantiles=QUANTILES)
+        numpy.testing.assert_allclose(surface.values[..., symbol], expected.values, rtol=1e-9)
+        numpy.testing.assert_allclose(surface.realized[:, symbol], expected.realized, rtol=1e-9)
+
+
+def test_cone_surface_rejects_bad_quantiles(jpm):
+
+    vol = volest.VolatilityEstimator(price_data=jpm, estimator='Raw')
+
+    with pytest.raises(ValueError):
+        vol.cone_surface(windows=WINDOWS, quantiles=[0.5, 1.5])
@@ -0,0 +1,69 @@
+import numpy
+import pandas
+import pytest
+
+from volatility import correlation
+
+WINDOW = 20
+
+
+@pytest.fixture
+def values():
+    """Correlated values of shape (300, 4); the last symbol lists late and
+    the third has a missing value"""
+
+    rng = numpy.random.default_rng(0)
+    common = rng.normal(size=(300, 1))
+    x = 0.6 * common + rng.normal(size=(300, 4))
+    x[:150, 3] = numpy.nan
+    x[100, 2] = numpy.nan
+
+    return x
+
+
+def test_rolling_corr_matches_pandas(values):
+
+    result = correlation.rolling_corr(values, WINDOW, dtype=numpy.float64)
+    expected = pandas.DataFrame(values).rolling(WINDOW).corr()
+
+    symbols = values.shape[1]
+    for t in range(WINDOW - 1, len(values)):
+        matrix = correlation.to_matrix(result[t], symbols)
+        numpy.testing.assert_allclose(matrix, expected.loc[t].to_numpy(), rtol=1e-9, atol=1e-12)
+
+
+def test_rolling_corr_is_nan_before_a_full_window(values):
+
+    result = correlation.rolling_corr(values, WINDOW)
+
+    assert result.dtype == numpy.float32
+    assert numpy.isnan(result[:WINDOW - 1]).all()
+
+
+def test_iter_rolling_corr_matches_rolling_corr(values):
+
+    result = correlation.rolling_corr(values, WINDOW)
+
+    for t, corr in correlation.iter_rolling_corr(values, WINDOW):
+        numpy.testing.assert_array_equal(corr, result[t])
+
+
+def test_to_matrix_diagonal_is_nan_without_data(values):
+
+    corr = correlation.rolling_corr(values, WINDOW, dtype=numpy.float64)
+
+    # the last symbol is not listed yet and the third misses a value
+    matrix = correlation.to_matrix(corr[110], values.shape[1])
+
+    numpy.testing.assert_array_equal(numpy.diag(matrix), [1.0, 1.0, numpy.nan, numpy.nan])
+    assert numpy.isnan(matrix[2]).all() and numpy.isnan(matrix[3]).all()
+
+
+def test_to_matrix_takes_the_valid_symbols():
+
+    # with one valid symbol there is no pair to tell it from the others
+    corr = numpy.full(3, numpy.nan)
+
+    matrix = correlation.to_matrix(corr, 3, valid=numpy.array([True, False, False]))
+
+    numpy.testing.assert_array_equal(numpy.diag(matrix), [1.0, numpy.nan, numpy.nan])
@@ -0,0 +1,80 @@
+import os
+import shutil
+
+import numpy
+import pandas
+import pytest
+
+from volatility import data
+
+TESTS_PATH = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def csv(tmp_path):
+    path = str(tmp_path / 'JPM.csv')
+    shutil.copy(os.path.join(TESTS_PATH, 'JPM.csv'), path)
+    return path
+
+
+@pytest.mark.parametrize('cache', [True, 'mtime', 'hash'])
+def test_cache_round_trip(csv, cache):
+
+    parsed = data.yahoo_helper('JPM', csv, cache=cache)
+    assert os.path.isfile(os.path.join(csv + '.cache', 'meta.json'))
+
+    cached = data.yahoo_helper('JPM', csv, cache=cache)
+
+    assert cached.symbol == 'JPM'
+    assert list(cached.columns) == data.PRICE_COLUMNS
+    assert cached.index.name == 'Date'
+    pandas.testing.assert_frame_equal(cached, parsed[data.PRICE_COLUMNS], check_freq=False)
+
+
+def test_cached_prices_are_memory_mapped_and_read_only(csv):
+
+    data.yahoo_helper('JPM', csv, cache=True)
+    cached = data.yahoo_helper('JPM', csv, cache=True)
+
+    for column in data.PRICE_COLUMNS:
+        values = cached[column].to_numpy()
+        assert not values.flags.writeable
+        assert _is_memmap(values)
+        with pytest.raises(ValueError):
+            values[0] = 0.0
+
+
+def test_cache_is_rebuilt_when_the_csv_changes(csv):
+
+    data.yahoo_helper('JPM', csv, cache=True)
+
+    # drop the last bar
+    with open(csv) as f:
+        lines = f.readlines()
+    with open(csv, 'w') as f:
+        f.writelines(lines[:-1])
+
+    cached = data.yahoo_helper('JPM', csv, cache=True)
+
+    assert len(cached) == len(lines) - 2
+    pandas.testing.assert_frame_equal(
+        cached,
+        data.yahoo_helper('JPM', csv)[data.PRICE_COLUMNS],
+        check_freq=False
+    )
+
+
+def test_cache_rejects_unknown_modes(csv):
+
+    with pytest.raises(ValueError):
+        data.yahoo_helper('JPM', csv, cache='size')
+
+
+def _is_memmap(values):
+
+    while values is not None:
+        if isinstance(values, numpy.memmap):
+            return True
+        values = values.base
+
+    return False
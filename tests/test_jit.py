@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+
+import numpy
+import pytest
+
+from volatility import models
+from volatility.benchmark import JIT_ESTIMATORS
+from volatility.models import jit
+from volatility.models.features import Features
+
+# long enough for skew (3 bars) and kurtosis (4 bars) to be defined
+WINDOWS = [5, 10, 30, 90]
+
+
+def _both_backends(estimator, prices):
+
+    model = getattr(models, estimator)
+
+    # fresh features for each backend, as GARCH keeps its fit in them
+    previous = jit.set_enabled(True)
+    try:
+        compiled = model.get_estimator_panel_multi(Features(*prices), windows=WINDOWS)
+        jit.set_enabled(False)
+        expected = model.get_estimator_panel_multi(Features(*prices), windows=WINDOWS)
+    finally:
+        jit.set_enabled(previous)
+
+    return compiled, expected
+
+
+def _assert_close(compiled, expected):
+
+    for w in range(len(WINDOWS)):
+        assert not numpy.isnan(expected[..., w]).all()
+        numpy.testing.assert_allclose(
+            compiled[..., w],
+            expected[..., w],
+            rtol=1e-7,
+            atol=1e-7 * numpy.nanmax(numpy.abs(expected[..., w]))
+        )
+
+
+@pytest.mark.parametrize('estimator', JIT_ESTIMATORS)
+def test_compiled_panel_matches_numpy(estimator, panel):
+    pytest.importorskip('numba')
+
+    _assert_close(*_both_backends(estimator, panel))
+
+
+@pytest.mark.parametrize('estimator', JIT_ESTIMATORS)
+def test_compiled_series_matches_numpy(estimator, jpm):
+    pytest.importorskip('numba')
+
+    prices = tuple(jpm[column].values for column in ['Open', 'High', 'Low', 'Close'])
+
+    _assert_close(*_both_backends(estimator, prices))
+
+
+def test_import_does_not_load_numba():
+    code = 'import sys, volatility.volest; sys.exit("numba" in sys.modules or "scipy" in sys.modules)'
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    assert subprocess.run([sys.executable, '-W', 'ignore', '-c', code], cwd=root).returncode == 0
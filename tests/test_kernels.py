@@ -0,0 +1,135 @@
+import numpy
+import pandas
+import pytest
+
+from volatility.models import kernels
+
+WINDOWS = [2, 5, 30, 90]
+# long enough for skew (3 bars) and kurtosis (4 bars) to be defined
+MOMENT_WINDOWS = [5, 30, 90]
+
+
+@pytest.fixture(params=[1, 3])
+def values(request):
+    """Log return like values of shape (time,) or (time, 3) with missing ones"""
+
+    rng = numpy.random.default_rng(request.param)
+    shape = (3000,) if request.param == 1 else (3000, request.param)
+    x = rng.normal(0.0005, 0.01, shape)
+    x[:40] = numpy.nan
+    x[1500] = numpy.nan
+    x[2000:2003] = numpy.nan
+
+    return x
+
+
+@pytest.fixture(params=[kernels.BLOCK_VALUES, 128], ids=['one block', 'many blocks'])
+def block_values(request, monkeypatch):
+    monkeypatch.setattr(kernels, 'BLOCK_VALUES', request.param)
+
+
+def _pandas(x, window, statistic):
+
+    frame = pandas.DataFrame(x.reshape(len(x), -1))
+
+    return getattr(frame.rolling(window=window), statistic)().to_numpy().reshape(x.shape)
+
+
+def _assert_matches(result, x, statistic, windows=WINDOWS):
+
+    assert result.shape == x.shape + (len(windows),)
+    for w, window in enumerate(windows):
+        expected = _pandas(x, window, statistic)
+        assert not numpy.isnan(expected).all()
+        numpy.testing.assert_array_equal(numpy.isnan(result[..., w]), numpy.isnan(expected))
+        numpy.testing.assert_allclose(
+            result[..., w],
+            expected,
+            rtol=1e-9,
+            atol=1e-9 * numpy.nanmax(numpy.abs(expected))
+        )
+
+
+@pytest.mark.usefixtures('block_values')
+def test_rolling_sum_matches_pandas(values):
+
+    _assert_matches(kernels.rolling_sum_multi(values, WINDOWS), values, 'sum')
+
+
+@pytest.mark.usefixtures('block_values')
+def test_rolling_mean_matches_pandas(values):
+
+    _assert_matches(kernels.rolling_mean_multi(values, WINDOWS), values, 'mean')
+
+
+@pytest.mark.usefixtures('block_values')
+def test_rolling_std_matches_pandas(values):
+
+    _assert_matches(kernels.rolling_std_multi(values, WINDOWS), values, 'std')
+
+
+@pytest.mark.usefixtures('block_values')
+def test_rolling_sum_transform(values):
+
+    result = kernels.rolling_sum_multi((values, values), WINDOWS, transform=numpy.multiply)
+
+    _assert_matches(result, numpy.square(values), 'sum')
+
+
+def _assert_moment_matches(result, x, statistic, windows=MOMENT_WINDOWS):
+
+    # the power sums lose some digits to cancellation that pandas, summing
+    # the same powers, loses as well
+    assert result.shape == x.shape + (len(windows),)
+    for w, window in enumerate(windows):
+        expected = _pandas(x, window, statistic)
+        assert not numpy.isnan(expected).all()
+        numpy.testing.assert_array_equal(numpy.isnan(result[..., w]), numpy.isnan(expected))
+        numpy.testing.assert_allclose(result[..., w], expected, rtol=1e-6, atol=1e-8)
+
+
+@pytest.mark.usefixtures('block_values')
+@pytest.mark.parametrize('moment, statistic', [(3, 'skew'), (4, 'kurt')])
+def test_rolling_moment_matches_pandas(values, moment, statistic):
+
+    _assert_moment_matches(kernels.rolling_moment_multi(values, MOMENT_WINDOWS, moment), values, statistic)
+
+
+@pytest.mark.usefixtures('block_values')
+@pytest.mark.parametrize('moment, statistic', [(3, 'skew'), (4, 'kurt')])
+def test_rolling_moment_of_repeated_values(moment, statistic):
+
+    x = numpy.random.default_rng(0).normal(0.0005, 0.01, 1000)
+    x[300:400] = 0.0
+    x[600:700] = x[599]
+
+    result = kernels.rolling_moment_multi(x, MOMENT_WINDOWS, moment)
+
+    assert (result[399] == (0.0 if moment == 3 else -3.0)).all()
+    _assert_moment_matches(result, x, statistic)
+
+
+def test_rolling_moment_rejects_other_moments(values):
+
+    with pytest.raises(ValueError):
+        kernels.rolling_moment_multi(values, MOMENT_WINDOWS, 2)
+
+
+def test_window_sum_matches_pandas(values):
+
+    sums, counts = kernels.prefix_sums(values)
+
+    for window in WINDOWS:
+        numpy.testing.assert_allclose(
+            kernels.window_sum(sums, counts, window),
+            _pandas(values, window, 'sum'),
+            rtol=1e-9,
+            atol=1e-15
+        )
+
+
+def test_rolling_std_of_a_constant_is_zero():
+
+    x = numpy.full(500, 0.01)
+
+    assert (kernels.rolling_std_multi(x, WINDOWS)[100:] == 0).all()
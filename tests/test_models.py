@@ -0,0 +1,110 @@
+import math
+
+import numpy
+import pytest
+
+from volatility import models
+
+WINDOWS = [10, 30, 90]
+TRADING_PERIODS = 252
+
+
+@pytest.fixture
+def prices(jpm):
+    return tuple(jpm[column].values for column in ['Open', 'High', 'Low', 'Close'])
+
+
+def _log_returns(close):
+
+    return numpy.concatenate([[numpy.nan], numpy.log(close[1:] / close[:-1])])
+
+
+def _ewma(returns, window):
+    """RiskMetrics variance recursion, one bar at a time"""
+
+    decay = 1.0 - 2.0 / (window + 1.0)
+    result = numpy.full(len(returns), numpy.nan)
+    variance = None
+    count = 0
+
+    for t, r in enumerate(returns):
+        if numpy.isnan(r):
+            continue
+        count += 1
+        variance = r * r if variance is None else decay * variance + (1.0 - decay) * r * r
+        if count >= window:
+            result[t] = math.sqrt(variance * TRADING_PERIODS)
+
+    return result
+
+
+def _garch(returns, windows, variance, alpha, beta):
+    """GARCH(1,1) forecasts of the mean variance over each window, one bar at a time"""
+
+    omega = variance * (1.0 - alpha - beta)
+    persistence = alpha + beta
+    result = numpy.full((len(returns), len(windows)), numpy.nan)
+    s2 = variance
+
+    for t, r in enumerate(returns):
+        if numpy.isnan(r):
+            # a missing return leaves the variance on its forecast
+            s2 = omega + persistence * s2
+            continue
+        s2 = omega + alpha * r * r + beta * s2
+        for w, h in enumerate(windows):
+            mean = variance + (s2 - variance) * (1.0 - persistence**h) / (h * (1.0 - persistence))
+            result[t, w] = math.sqrt(mean * TRADING_PERIODS)
+
+    return result
+
+
+@pytest.mark.parametrize('window', WINDOWS)
+def test_ewma_matches_the_recursion(window, prices):
+
+    values = models.EWMA.get_estimator(prices, window=window, clean=False)
+    expected = _ewma(_log_returns(prices[3]), window)
+
+    numpy.testing.assert_array_equal(numpy.isnan(values), numpy.isnan(expected))
+    numpy.testing.assert_allclose(values, expected, rtol=1e-10)
+
+
+def test_garch_matches_the_recursion(prices):
+
+    variance, alpha, beta = models.GARCH.fit(prices)
+    values = models.GARCH.get_estimator_panel_multi(prices, windows=WINDOWS)
+    expected = _garch(_log_returns(prices[3]), WINDOWS, variance, alpha, beta)
+
+    numpy.testing.assert_array_equal(numpy.isnan(values), numpy.isnan(expected))
+    numpy.testing.assert_allclose(values, expected, rtol=1e-10)
+
+
+def test_garch_skips_missing_returns(panel):
+
+    # the first symbol has a halted bar half way through its history
+    prices = tuple(x[:, 0] for x in panel)
+
+    variance, alpha, beta = models.GARCH.fit(prices)
+    values = models.GARCH.get_estimator_panel_multi(prices, windows=WINDOWS)
+    expected = _garch(_log_returns(prices[3]), WINDOWS, variance, alpha, beta)
+
+    numpy.testing.assert_array_equal(numpy.isnan(values), numpy.isnan(expected))
+    numpy.testing.assert_allclose(values, expected, rtol=1e-10)
+
+
+def test_garch_fit_recovers_simulated_parameters():
+
+    rng = numpy.random.default_rng(0)
+    variance, alpha, beta = 1e-4, 0.08, 0.9
+    returns = numpy.empty(5000)
+    s2 = variance
+    for t in range(len(returns)):
+        returns[t] = math.sqrt(s2) * rng.standard_normal()
+        s2 = variance * (1.0 - alpha - beta) + alpha * returns[t]**2 + beta * s2
+    close = 100.0 * numpy.exp(numpy.concatenate([[0.0], numpy.cumsum(returns)]))
+
+    fitted_variance, fitted_alpha, fitted_beta = models.GARCH.fit((close, close, close, close))
+
+    assert fitted_alpha == pytest.approx(alpha, abs=0.03)
+    assert fitted_beta == pytest.approx(beta, abs=0.05)
+    assert fitted_variance == pytest.approx(variance, rel=0.2)
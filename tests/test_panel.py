@@ -0,0 +1,42 @@
+import numpy
+import pytest
+
+from volatility import models, panel as panel_engine
+from volatility.volest import ESTIMATORS
+
+WINDOW = 30
+
+
+def _single(estimator, prices, symbol):
+    """Values of one symbol run on its own history, from its first bar"""
+
+    first = numpy.argmax(~numpy.isnan(prices[3][:, symbol]))
+    history = tuple(x[first:, symbol] for x in prices)
+
+    return first, getattr(models, estimator).get_estimator(history, window=WINDOW, clean=False)
+
+
+@pytest.mark.parametrize('estimator', ESTIMATORS)
+def test_panel_matches_single_symbol(estimator, panel):
+
+    values = panel_engine.get_estimator(estimator, *panel, window=WINDOW)
+
+    assert values.shape == panel[3].shape
+    for symbol in range(values.shape[1]):
+        first, expected = _single(estimator, panel, symbol)
+
+        assert numpy.isnan(values[:first, symbol]).all()
+        assert not numpy.isnan(expected).all()
+        numpy.testing.assert_allclose(values[first:, symbol], expected, rtol=1e-9, atol=1e-12)
+
+
+def test_panel_rejects_mismatched_shapes(panel):
+
+    open, high, low, close = panel
+
+    with pytest.raises(ValueError):
+        panel_engine.get_estimator('Raw', open[1:], high, low, close)
+    with pytest.raises(ValueError):
+        panel_engine.get_estimator('Raw', open[:, 0], high[:, 0], low[:, 0], close[:, 0])
+    with pytest.raises(ValueError):
+        panel_engine.get_estimator('Unknown', *panel)
@@ -0,0 +1,102 @@
+import json
+import tracemalloc
+
+import numpy
+import pytest
+
+from volatility import models, profiling
+
+
+@profiling.instrument
+def _allocate(megabytes):
+
+    return numpy.ones(megabytes * 2**17).sum()
+
+
+@profiling.instrument
+def _outer():
+
+    with profiling.stage('inner'):
+        _allocate(8)
+    _allocate(1)
+
+
+@pytest.mark.parametrize('estimator', ['GARCH', 'Raw', 'YangZhang'])
+def test_model_entry_points_are_stages(estimator, jpm):
+
+    model = getattr(models, estimator)
+
+    with profiling.Profiler() as profiler:
+        model.get_estimator(jpm, window=30)
+        model.get_estimator_multi(jpm, windows=[30, 60])
+
+    assert profiler.stats[estimator + '.get_estimator']['calls'] == 1
+    assert profiler.stats[estimator + '.get_estimator_multi']['calls'] == 1
+
+
+def test_profiler_aggregates_nested_stages():
+
+    with profiling.Profiler() as profiler:
+        _outer()
+        _outer()
+
+    assert profiler.stats['test_profiling._outer']['calls'] == 2
+    assert profiler.stats['inner']['calls'] == 2
+    assert profiler.stats['test_profiling._allocate']['calls'] == 4
+    # stages include the stages they call
+    assert profiler.stats['test_profiling._outer']['seconds'] >= profiler.stats['inner']['seconds']
+    assert all(stats['peak'] is None for stats in profiler.stats.values())
+    assert profiling._hooks == []
+
+
+def test_profiler_records_peaks_with_memory():
+
+    assert not tracemalloc.is_tracing()
+
+    with profiling.Profiler(memory=True) as profiler:
+        _outer()
+
+    # an 8 MB array in the inner stage, a 1 MB one after it
+    megabyte = 2**20
+    assert 8 * megabyte <= profiler.stats['inner']['peak'] < 9 * megabyte
+    assert 8 * megabyte <= profiler.stats['test_profiling._outer']['peak'] < 9 * megabyte
+    assert not tracemalloc.is_tracing()
+
+
+def test_profiler_merge_adds_calls_and_keeps_maxima():
+
+    profiler = profiling.Profiler()
+    profiler('stage', 1.0, None)
+    profiler('stage', 3.0, 100)
+
+    other = profiling.Profiler()
+    other('stage', 2.0, 50)
+    other('other', 0.5, None)
+    profiler.merge(other.stats)
+
+    assert profiler.stats['stage'] == {'calls': 3, 'seconds': 6.0, 'max_seconds': 3.0, 'peak': 100}
+    assert profiler.stats['other'] == {'calls': 1, 'seconds': 0.5, 'max_seconds': 0.5, 'peak': None}
+
+
+def test_profiler_report_is_sorted_by_time():
+
+    profiler = profiling.Profiler()
+    profiler('fast', 0.5, None)
+    profiler('slow', 2.0, 3 * 2**20)
+    profiler('slow', 1.0, None)
+
+    assert list(json.loads(profiler.report('json'))) == ['slow', 'fast']
+
+    lines = profiler.report().splitlines()
+    assert lines[0].split() == ['stage', 'calls', 'total', 's', 'mean', 'ms', 'max', 'ms', 'peak', 'MB']
+    assert lines[1].split() == ['slow', '2', '3.0000', '1500.000', '2000.000', '3.00']
+    assert lines[2].split() == ['fast', '1', '0.5000', '500.000', '500.000', '-']
+
+    with pytest.raises(ValueError):
+        profiler.report('csv')
+
+
+def test_remove_hook_rejects_unknown_callbacks():
+
+    with pytest.raises(ValueError):
+        profiling.remove_hook(profiling.Profiler())
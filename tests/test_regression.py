@@ -0,0 +1,89 @@
+import numpy
+import pytest
+
+from volatility import regression
+
+WINDOW = 60
+MISSING = [300, 700]
+
+sm = pytest.importorskip('statsmodels.api')
+RollingOLS = pytest.importorskip('statsmodels.regression.rolling').RollingOLS
+
+
+@pytest.fixture
+def pairs():
+    """Correlated y and x of 1000 rows"""
+
+    rng = numpy.random.default_rng(0)
+    x = rng.normal(0.2, 0.05, 1000)
+    y = 0.01 + 1.5 * x + rng.normal(0.0, 0.02, 1000)
+
+    return y, x
+
+
+def _assert_matches(result, expected, rows=slice(None)):
+
+    numpy.testing.assert_allclose(result.alpha[rows], expected.params[rows, 0], rtol=1e-8)
+    numpy.testing.assert_allclose(result.beta[rows], expected.params[rows, 1], rtol=1e-8)
+    numpy.testing.assert_allclose(result.rsquared[rows], expected.rsquared[rows], rtol=1e-8)
+
+
+def test_rolling_ols_matches_statsmodels(pairs):
+
+    y, x = pairs
+    result = regression.rolling_ols(y, x, window=WINDOW)
+    expected = RollingOLS(y, sm.add_constant(x), window=WINDOW).fit()
+
+    assert numpy.isnan(result.beta[:WINDOW - 1]).all()
+    assert (result.nobs[WINDOW - 1:] == WINDOW).all()
+    _assert_matches(result, expected)
+
+
+def test_rolling_ols_skips_windows_with_a_missing_pair(pairs):
+
+    y, x = pairs
+    # away from the missing pairs the windows are those of the full data
+    expected = RollingOLS(y, sm.add_constant(x), window=WINDOW).fit()
+
+    x, y = x.copy(), y.copy()
+    x[MISSING[0]] = numpy.nan
+    y[MISSING[1]] = numpy.nan
+    result = regression.rolling_ols(y, x, window=WINDOW)
+
+    touched = numpy.zeros(len(x), dtype=bool)
+    for row in MISSING:
+        touched[row:row + WINDOW] = True
+    touched[:WINDOW - 1] = True
+
+    numpy.testing.assert_array_equal(numpy.isnan(result.beta), touched)
+    numpy.testing.assert_array_equal(result.nobs == 0, touched)
+    _assert_matches(result, expected, ~touched)
+
+
+def test_expanding_ols_matches_statsmodels(pairs):
+
+    y, x = pairs
+    x = x.copy()
+    x[MISSING[0]] = numpy.nan
+
+    result = regression.rolling_ols(y, x)
+
+    valid = ~numpy.isnan(x)
+    expected = sm.OLS(y[valid], sm.add_constant(x[valid])).fit()
+
+    numpy.testing.assert_allclose(result.alpha[-1], expected.params[0], rtol=1e-8)
+    numpy.testing.assert_allclose(result.beta[-1], expected.params[1], rtol=1e-8)
+    numpy.testing.assert_allclose(result.rsquared[-1], expected.rsquared, rtol=1e-8)
+    assert result.nobs[-1] == expected.nobs
+
+
+def test_rolling_ols_of_a_panel_matches_each_column(pairs):
+
+    y, x = pairs
+    panel = numpy.column_stack([y, 2.0 * y, y - x])
+
+    result = regression.rolling_ols(panel, x, window=WINDOW)
+
+    for column in range(panel.shape[1]):
+        expected = regression.rolling_ols(panel[:, column], x, window=WINDOW)
+        numpy.testing.assert_allclose(result.beta[:, column], expected.beta, rtol=1e-12)
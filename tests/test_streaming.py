@@ -0,0 +1,91 @@
+import numpy
+import pytest
+
+from volatility import models
+from volatility.models import streaming
+
+WINDOWS = [5, 30]
+ESTIMATORS = ['GarmanKlass', 'Kurtosis', 'Parkinson', 'Raw', 'RogersSatchell', 'Skew', 'YangZhang']
+
+
+def _stream(estimator, prices, window):
+
+    model = getattr(streaming, estimator)(window=window)
+
+    return numpy.array([model.update(*bar) for bar in zip(*prices)])
+
+
+@pytest.mark.parametrize('window', WINDOWS)
+@pytest.mark.parametrize('estimator', ESTIMATORS)
+def test_streaming_matches_single_symbol(estimator, window, jpm):
+
+    prices = tuple(jpm[column].values for column in ['Open', 'High', 'Low', 'Close'])
+
+    values = _stream(estimator, prices, window)
+    expected = getattr(models, estimator).get_estimator(prices, window=window, clean=False)
+
+    numpy.testing.assert_array_equal(numpy.isnan(values), numpy.isnan(expected))
+    numpy.testing.assert_allclose(values, expected, rtol=1e-7)
+
+
+@pytest.mark.parametrize('estimator', ESTIMATORS)
+def test_streaming_skips_windows_with_a_missing_bar(estimator, panel):
+
+    # the first symbol has a halted bar half way through its history
+    prices = tuple(x[:, 0] for x in panel)
+
+    values = _stream(estimator, prices, 30)
+    expected = getattr(models, estimator).get_estimator(prices, window=30, clean=False)
+
+    numpy.testing.assert_array_equal(numpy.isnan(values), numpy.isnan(expected))
+    numpy.testing.assert_allclose(values, expected, rtol=1e-7)
+
+
+def test_streaming_hodges_tompkins_matches_on_the_last_bar(jpm):
+
+    # the bias adjustment uses the returns seen so far, so only the value
+    # on the last bar sees the whole history
+    prices = tuple(jpm[column].values for column in ['Open', 'High', 'Low', 'Close'])
+
+    values = _stream('HodgesTompkins', prices, 30)
+    expected = models.HodgesTompkins.get_estimator(prices, window=30)
+
+    numpy.testing.assert_allclose(values[-1], expected[-1], rtol=1e-7)
+
+
+def test_streaming_rejects_short_windows():
+
+    with pytest.raises(ValueError):
+        streaming.Raw(window=1)
+
+
+@pytest.mark.parametrize('estimator', ['Skew', 'Kurtosis'])
+def test_streaming_repeated_returns_match_batch(estimator, jpm):
+
+    # a flat stretch long enough for whole windows of zero returns
+    prices = tuple(jpm[column].values.copy() for column in ['Open', 'High', 'Low', 'Close'])
+    for x in prices:
+        x[100:140] = 50.0
+
+    values = _stream(estimator, prices, 10)
+    expected = getattr(models, estimator).get_estimator(prices, window=10, clean=False)
+
+    assert values[139] == (0.0 if estimator == 'Skew' else -3.0)
+    numpy.testing.assert_array_equal(numpy.isnan(values), numpy.isnan(expected))
+    numpy.testing.assert_allclose(values, expected, rtol=1e-7)
+
+
+@pytest.mark.parametrize('price', [0.0, -1.0])
+@pytest.mark.parametrize('estimator', ESTIMATORS + ['HodgesTompkins'])
+def test_streaming_bad_prices_give_nan(estimator, price, jpm):
+
+    prices = tuple(jpm[column].values.copy() for column in ['Open', 'High', 'Low', 'Close'])
+    for x in prices:
+        x[200] = price
+
+    values = _stream(estimator, prices, 10)
+
+    # every window touching the bar, or its return for the close to close
+    # models, is missing
+    assert numpy.isnan(values[200:210]).all()
+    assert not numpy.isnan(values[211:]).any()
@@ -0,0 +1,59 @@
+import os
+import sys
+
+import numpy
+import pytest
+
+from volatility import volest
+
+
+@pytest.fixture
+def vol(jpm, bench):
+    return volest.VolatilityEstimator(price_data=jpm, estimator='YangZhang', bench_data=bench)
+
+
+def test_parallel_term_sheet_names_the_pdf_extra(vol, tmp_path, monkeypatch):
+
+    # an entry of None makes the import fail as if pypdf were not installed
+    monkeypatch.setitem(sys.modules, 'pypdf', None)
+
+    with pytest.raises(ImportError, match=r'volatility-trading\[pdf\]'):
+        vol.term_sheet(output_dir=str(tmp_path), processes=2)
+
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_term_sheet_data_saves_every_metric(vol, tmp_path):
+
+    path = str(tmp_path / 'metrics.npz')
+    data = vol.term_sheet_data(window=30, windows=[30, 60], bins=20, path=path)
+
+    with numpy.load(path) as saved:
+        assert sorted(saved.files) == sorted(data)
+        for key, value in data.items():
+            numpy.testing.assert_array_equal(saved[key], value)
+
+    # the columns of every table share their length
+    for table in ['cones', 'rolling', 'histogram', 'benchmark']:
+        lengths = {len(value) for key, value in data.items() if key.startswith(table + '/')}
+        assert len(lengths) == 1, table
+
+    assert str(data['info/symbol']) == 'JPM'
+    assert str(data['info/estimator']) == 'YangZhang'
+    assert len(data['histogram/count']) == 20
+    assert int(data['regression/nobs']) == len(data['benchmark/date'])
+
+
+def test_term_sheet_data_matches_the_pages(vol):
+
+    data = vol.term_sheet_data(window=30, windows=[30, 60])
+
+    max_, top_q, median, bottom_q, min_, realized, _ = vol._cones_data(windows=[30, 60], quantiles=[0.25, 0.75])
+    numpy.testing.assert_array_equal(data['cones/max'], max_)
+    numpy.testing.assert_array_equal(data['cones/median'], median)
+    numpy.testing.assert_array_equal(data['cones/realized'], realized)
+
+    estimator = vol._get_estimator(30, vol._price_data).dropna()
+    numpy.testing.assert_array_equal(data['rolling/date'], estimator.index.values)
+    numpy.testing.assert_allclose(data['rolling/realized'], estimator.values)
+    numpy.testing.assert_allclose(data['estimator/last'], estimator.iloc[-1])
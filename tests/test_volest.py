@@ -0,0 +1,180 @@
+import pickle
+
+import pandas
+import pytest
+
+from volatility import models, volest
+
+
+@pytest.fixture
+def vol(jpm, bench):
+    return volest.VolatilityEstimator(price_data=jpm, estimator='YangZhang', bench_data=bench, cache_size=4)
+
+
+def test_cache_hits_return_the_same_values(vol, jpm):
+
+    first = vol._get_estimator(30, vol._price_data)
+    second = vol._get_estimator(30, vol._price_data)
+
+    assert vol.cache_info() == volest.CacheInfo(hits=1, misses=1, maxsize=4, currsize=1)
+    pandas.testing.assert_series_equal(second, first)
+    pandas.testing.assert_series_equal(first, models.YangZhang.get_estimator(jpm, window=30), check_names=False)
+
+
+def test_cache_hands_out_copies(vol):
+
+    first = vol._get_estimator(30, vol._price_data)
+    expected = first.copy()
+    first.iloc[:] = 0.0
+
+    pandas.testing.assert_series_equal(vol._get_estimator(30, vol._price_data), expected)
+
+
+def test_cache_evicts_the_least_recently_used(vol):
+
+    for window in [10, 20, 30, 40]:
+        vol._get_estimator(window, vol._price_data)
+    # 10 becomes the most recently used, so 20 is evicted next
+    vol._get_estimator(10, vol._price_data)
+    vol._get_estimator(50, vol._price_data)
+
+    windows = [key[1] for key in vol._cache]
+    assert windows == [30, 40, 10, 50]
+    assert vol.cache_info().currsize == 4
+
+
+def test_cache_multi_matches_single_windows(vol):
+
+    results = vol._get_estimator_multi([10, 30, 60], vol._price_data)
+
+    assert vol.cache_info().misses == 3
+    for window, result in zip([10, 30, 60], results):
+        pandas.testing.assert_series_equal(result, vol._get_estimator(window, vol._price_data), check_names=False)
+    assert vol.cache_info().hits == 3
+
+
+def test_cache_keeps_datasets_apart(vol):
+
+    price = vol._get_estimator(30, vol._price_data)
+    bench = vol._get_estimator(30, vol._bench_data)
+
+    assert not price.equals(bench)
+    assert vol.cache_info().currsize == 2
+
+
+def test_reassigning_prices_drops_their_cache(vol, jpm):
+
+    vol._get_estimator(30, vol._price_data)
+    vol._get_estimator(30, vol._bench_data)
+
+    halved = jpm.copy()
+    halved.loc[halved.index[-100:], ['Open', 'High', 'Low', 'Close']] /= 2
+    vol._price_data = halved
+
+    assert [key[3] for key in vol._cache] == ['bench']
+    pandas.testing.assert_series_equal(
+        vol._get_estimator(30, vol._price_data),
+        models.YangZhang.get_estimator(halved, window=30),
+        check_names=False
+    )
+
+
+def test_clear_cache_after_editing_in_place(jpm):
+
+    prices = jpm.copy()
+    prices.symbol = 'JPM'
+    vol = volest.VolatilityEstimator(price_data=prices, estimator='Raw')
+    vol._get_estimator(30, prices)
+
+    prices.loc[prices.index[-1], 'Close'] *= 2
+    vol.clear_cache()
+
+    assert vol.cache_info() == volest.CacheInfo(hits=0, misses=0, maxsize=32, currsize=0)
+    pandas.testing.assert_series_equal(
+        vol._get_estimator(30, prices),
+        models.Raw.get_estimator(prices, window=30),
+        check_names=False
+    )
+
+
+def test_cache_size_zero_caches_nothing(jpm):
+
+    vol = volest.VolatilityEstimator(price_data=jpm, estimator='Raw', cache_size=0)
+    vol._get_estimator(30, vol._price_data)
+    vol._get_estimator_multi([30, 60], vol._price_data)
+
+    assert vol.cache_info() == volest.CacheInfo(hits=0, misses=0, maxsize=0, currsize=0)
+    assert vol._features == {}
+
+
+def test_cache_survives_pickling(vol):
+
+    expected = vol._get_estimator(30, vol._price_data)
+    copy = pickle.loads(pickle.dumps(vol))
+
+    pandas.testing.assert_series_equal(copy._get_estimator(30, copy._price_data), expected)
+    assert copy.cache_info().hits == 1
+
+
+@pytest.fixture
+def gappy_bench(bench, jpm):
+    """The benchmark without a few of the symbol's dates, its first one included"""
+
+    gappy = bench.drop(jpm.index[[0, 100, 101, 500]])
+    gappy.symbol = bench.symbol
+
+    return gappy
+
+
+def _prices(frame):
+
+    return frame[['Open', 'High', 'Low', 'Close']]
+
+
+@pytest.mark.parametrize('missing', ['drop', 'ffill', 'nan'])
+def test_align_benchmark_matches_reindex(jpm, gappy_bench, missing):
+
+    price_data, bench_data = volest._align_benchmark(jpm, gappy_bench, missing)
+
+    if missing == 'drop':
+        dates = jpm.index.intersection(gappy_bench.index)
+        pandas.testing.assert_frame_equal(price_data, jpm.loc[dates])
+        assert price_data.symbol == 'JPM'
+    else:
+        dates = jpm.index
+        assert price_data is jpm
+
+    expected = _prices(gappy_bench).reindex(dates, method='ffill' if missing == 'ffill' else None)
+    pandas.testing.assert_frame_equal(bench_data, expected, check_freq=False)
+    assert bench_data.symbol == gappy_bench.symbol
+    # only the first date has no earlier bar to carry forward
+    assert bench_data['Close'].isna().sum() == {'drop': 0, 'ffill': 1, 'nan': 4}[missing]
+
+
+def test_align_benchmark_on_the_same_dates_returns_both(jpm, bench):
+
+    same = bench.loc[jpm.index]
+    same.symbol = bench.symbol
+
+    price_data, bench_data = volest._align_benchmark(jpm, same, 'drop')
+
+    assert price_data is jpm
+    assert bench_data is same
+
+
+def test_align_benchmark_rejects_bad_input(jpm, bench):
+
+    empty = bench.iloc[:0]
+    empty.symbol = bench.symbol
+    later = bench.copy()
+    later.index = later.index + (jpm.index[-1] - bench.index[0]) + pandas.Timedelta(days=1)
+    later.symbol = bench.symbol
+
+    with pytest.raises(ValueError, match='no prices'):
+        volest._align_benchmark(jpm, empty, 'drop')
+    with pytest.raises(ValueError, match='missing must be'):
+        volest._align_benchmark(jpm, bench, 'zero')
+    with pytest.raises(ValueError, match='sorted unique'):
+        volest._align_benchmark(jpm.iloc[::-1], bench, 'drop')
+    with pytest.raises(ValueError, match='no dates in common'):
+        volest._align_benchmark(jpm, later, 'drop')
@@ -0,0 +1,361 @@
+"""Term sheets for a universe of symbol/benchmark pairs
+
+Run with
+
+    python -m volatility.batch manifest.csv --output-dir term-sheets --processes 8
+
+The manifest is a CSV file with the columns symbol, path, benchmark and
+benchmark_path, where path and benchmark_path are Yahoo! historical data CSV
+files. Symbols with a term sheet, of any date, newer than both of their
+input files and written with the same estimator and options are skipped, so
+a run interrupted by a crash resumes where it stopped, even on a later day.
+"""
+import argparse
+import concurrent.futures
+import csv
+import glob
+import inspect
+import json
+import os
+import sys
+import traceback
+
+from volatility import data
+from volatility import profiling
+from volatility.volest import ESTIMATORS, VolatilityEstimator, term_sheet_filename
+
+MANIFEST_COLUMNS = ['symbol', 'path', 'benchmark', 'benchmark_path']
+# term sheet arguments that change where or how a term sheet is written,
+# not what it shows, so they do not make an existing one out of date
+RENDER_OPTIONS = ['open', 'output_dir', 'processes']
+
+# benchmark prices of the worker process, set once by _init_worker
+_benchmarks = {}
+
+
+def read_manifest(manifest_path):
+    """Reads the rows of a term sheet manifest
+
+    Parameters
+    ----------
+    manifest_path : string
+        Path to a CSV file with columns symbol, path, benchmark, benchmark_path;
+        relative paths are resolved against the manifest's directory
+
+    Returns
+    -------
+    rows : [dict, dict, ...]
+    """
+
+    base = os.path.dirname(os.path.abspath(manifest_path))
+
+    with open(manifest_path) as f:
+        reader = csv.DictReader(f)
+        missing = set(MANIFEST_COLUMNS) - set(reader.fieldnames or [])
+        if missing:
+            raise ValueError('Manifest requires columns ' + ', '.join(MANIFEST_COLUMNS))
+
+        rows = []
+        for row in reader:
+            row = dict((column, row[column].strip()) for column in MANIFEST_COLUMNS)
+            row['path'] = os.path.join(base, row['path'])
+            row['benchmark_path'] = os.path.join(base, row['benchmark_path'])
+            rows.append(row)
+
+    return rows
+
+
+def existing_term_sheet(output_dir, symbol):
+    """Path of the latest term sheet of symbol in output_dir, None if none
+
+    Term sheet file names carry the date they were written on, so the term
+    sheets of earlier days are found by their SYMBOL_termsheet_ prefix.
+    """
+
+    pattern = glob.escape(term_sheet_filename(symbol).rsplit('_', 1)[0]) + '_*.pdf'
+    paths = glob.glob(os.path.join(glob.escape(output_dir), pattern))
+
+    if not paths:
+        return None
+
+    return max(paths, key=os.path.getmtime)
+
+
+def options_path(output_path):
+    """Path of the file recording the options a term sheet was written with"""
+
+    return output_path + '.json'
+
+
+def recorded_options(estimator, options):
+    """The estimator and term sheet options that decide a term sheet's contents
+
+    Options left out take the defaults of VolatilityEstimator.term_sheet, so
+    passing a default explicitly makes no difference. Returned as they read
+    back from JSON, e.g. with lists for tuples, so they compare equal to the
+    recorded ones.
+    """
+
+    parameters = inspect.signature(VolatilityEstimator.term_sheet).parameters
+    options = dict(
+        (name, options.get(name, parameter.default))
+        for name, parameter in parameters.items()
+        if parameter.default is not inspect.Parameter.empty and name not in RENDER_OPTIONS
+    )
+    options['estimator'] = estimator
+
+    return json.loads(json.dumps(options, sort_keys=True))
+
+
+def write_options(output_path, options):
+    """Records the options output_path was written with, see is_up_to_date"""
+
+    path = options_path(output_path)
+    tmp = path + '.%d.tmp' % os.getpid()
+    with open(tmp, 'w') as f:
+        json.dump(options, f, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def is_up_to_date(output_path, *input_paths, options=None):
+    """True if output_path exists and is newer than every input file
+
+    Missing input files are never up to date, so their rows are run and
+    reported as failed. If options are given, the term sheet must also have
+    been written with them, as recorded by write_options.
+    """
+
+    if output_path is None or not os.path.exists(output_path):
+        return False
+
+    if options is not None:
+        try:
+            with open(options_path(output_path)) as f:
+                if json.load(f) != options:
+                    return False
+        except (OSError, ValueError):
+            return False
+
+    modified = os.path.getmtime(output_path)
+
+    try:
+        return all(os.path.getmtime(path) <= modified for path in input_paths)
+    except OSError:
+        return False
+
+
+def run(
+        manifest,
+        output_dir,
+        estimator='GarmanKlass',
+        processes=None,
+        force=False,
+        cache=False,
+        profiler=None,
+        **term_sheet_options):
+    """Writes the term sheets of every manifest row using a process pool
+
+    Parameters
+    ----------
+    manifest : string or [dict, dict, ...]
+        Path to a manifest CSV file or its rows as returned by read_manifest
+    output_dir : string
+        Directory the term sheets are written to, created if missing
+    estimator : string
+        Estimator name, one of ESTIMATORS
+    processes : int
+        Number of worker processes, the number of CPUs by default
+    force : boolean
+        Set to True to rewrite term sheets that are up to date
+    cache : boolean or string
+        Passed to yahoo_helper to use its binary price cache
+    profiler : volatility.profiling.Profiler
+        If given, every worker profiles its term sheets and the stages are
+        merged into profiler
+    **term_sheet_options
+        Additional arguments to pass to VolatilityEstimator.term_sheet
+
+    Returns
+    -------
+    results : [dict, dict, ...]
+        Symbol, output path and status ('done', 'skipped' or 'failed', with
+        the error) of every row
+    """
+
+    if estimator not in ESTIMATORS:
+        raise ValueError('Acceptable volatility model is required')
+
+    if not isinstance(manifest, list):
+        manifest = read_manifest(manifest)
+
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+
+    options = recorded_options(estimator, term_sheet_options)
+
+    results = []
+    pending = []
+    for row in manifest:
+        output_path = existing_term_sheet(output_dir, row['symbol'])
+        if not force and is_up_to_date(output_path, row['path'], row['benchmark_path'], options=options):
+            results.append({'symbol': row['symbol'], 'path': output_path, 'status': 'skipped'})
+        else:
+            pending.append(row)
+
+    # each benchmark is parsed once here and handed to every worker; rows
+    # whose benchmark cannot be read fail without reaching a worker
+    benchmarks = {}
+    errors = {}
+    for row in pending:
+        key = (row['benchmark'], row['benchmark_path'])
+        if key not in benchmarks and key not in errors:
+            try:
+                benchmarks[key] = data.yahoo_helper(row['benchmark'], row['benchmark_path'], cache=cache)
+            except Exception:
+                errors[key] = traceback.format_exc().strip().splitlines()[-1]
+
+    for row in pending:
+        error = errors.get((row['benchmark'], row['benchmark_path']))
+        if error is not None:
+            result = {'symbol': row['symbol'], 'path': None, 'status': 'failed', 'error': error}
+            results.append(result)
+            print('%-10s %-8s %s' % (result['symbol'], result['status'], result['error']))
+
+    pending = [row for row in pending if (row['benchmark'], row['benchmark_path']) in benchmarks]
+    if not pending:
+        return results
+
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_init_worker,
+            initargs=(benchmarks,)) as executor:
+
+        futures = [
+            executor.submit(
+                _term_sheet,
+                row,
+                output_dir,
+                estimator,
+                cache,
+                None if profiler is None else profiler.memory,
+                term_sheet_options
+            )
+            for row in pending
+        ]
+
+        for future in concurrent.futures.as_completed(futures):
+            result = future.result()
+            if profiler is not None:
+                profiler.merge(result.pop('profile'))
+            results.append(result)
+            print('%-10s %-8s %s' % (result['symbol'], result['status'], result.get('error', result['path'])))
+            sys.stdout.flush()
+
+    return results
+
+
+def _init_worker(benchmarks):
+
+    import matplotlib
+    matplotlib.use('Agg')
+
+    # the symbol property does not survive pickling
+    for (symbol, _), bench_data in benchmarks.items():
+        bench_data.symbol = symbol
+
+    _benchmarks.update(benchmarks)
+
+
+def _term_sheet(row, output_dir, estimator, cache, profile_memory, term_sheet_options):
+
+    result = {'symbol': row['symbol']}
+
+    if profile_memory is None:
+        return _term_sheet_result(result, row, output_dir, estimator, cache, term_sheet_options)
+
+    with profiling.Profiler(memory=profile_memory) as profiler:
+        _term_sheet_result(result, row, output_dir, estimator, cache, term_sheet_options)
+    result['profile'] = profiler.stats
+
+    return result
+
+
+def _term_sheet_result(result, row, output_dir, estimator, cache, term_sheet_options):
+
+    try:
+        price_data = data.yahoo_helper(row['symbol'], row['path'], cache=cache)
+        bench_data = _benchmarks[(row['benchmark'], row['benchmark_path'])]
+
+        vol = VolatilityEstimator(
+            price_data=price_data,
+            estimator=estimator,
+            bench_data=bench_data
+        )
+        result['path'] = vol.term_sheet(output_dir=output_dir, **term_sheet_options)
+        write_options(result['path'], recorded_options(estimator, term_sheet_options))
+        result['status'] = 'done'
+    except Exception:
+        result['path'] = None
+        result['status'] = 'failed'
+        result['error'] = traceback.format_exc().strip().splitlines()[-1]
+
+    return result
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('manifest', help='CSV file with columns ' + ', '.join(MANIFEST_COLUMNS))
+    parser.add_argument('--output-dir', default='term-sheets')
+    parser.add_argument('--estimator', default='GarmanKlass', choices=ESTIMATORS)
+    parser.add_argument('--processes', type=int, default=None,
+                        help='worker processes, the number of CPUs by default')
+    parser.add_argument('--window', type=int, default=30)
+    parser.add_argument('--windows', type=int, nargs='+', default=[30, 60, 90, 120])
+    parser.add_argument('--quantiles', type=float, nargs=2, default=[0.25, 0.75])
+    parser.add_argument('--bins', type=int, default=100)
+    parser.add_argument('--force', action='store_true',
+                        help='rewrite term sheets that are up to date')
+    parser.add_argument('--cache', action='store_true',
+                        help='use the binary price cache of yahoo_helper')
+    parser.add_argument('--profile', default=None,
+                        help='write a profile of the term sheet stages to this file, '
+                             'JSON if it ends in .json and a text table otherwise')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='include the peak allocation of each stage in the profile')
+    args = parser.parse_args(argv)
+
+    profiler = None
+    if args.profile is not None:
+        profiler = profiling.Profiler(memory=args.profile_memory)
+
+    results = run(
+        args.manifest,
+        args.output_dir,
+        estimator=args.estimator,
+        processes=args.processes,
+        force=args.force,
+        cache=args.cache,
+        profiler=profiler,
+        window=args.window,
+        windows=args.windows,
+        quantiles=args.quantiles,
+        bins=args.bins
+    )
+
+    if profiler is not None:
+        with open(args.profile, 'w') as f:
+            f.write(profiler.report('json' if args.profile.endswith('.json') else 'text') + '\n')
+
+    failed = [result for result in results if result['status'] == 'failed']
+    print('%d done, %d skipped, %d failed' % (
+        sum(result['status'] == 'done' for result in results),
+        sum(result['status'] == 'skipped' for result in results),
+        len(failed)
+    ))
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
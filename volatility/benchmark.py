@@ -0,0 +1,410 @@
+"""Throughput and peak memory benchmarks for the models and VolatilityEstimator
+
+Run with
+
+    python -m volatility.benchmark --output results.json
+    python -m volatility.benchmark --compare results.json
+
+Every model in volatility.models and every VolatilityEstimator method is
+timed on the bundled tests/JPM.csv and tests/BENCH.csv and on synthetic OHLC
+histories of the requested sizes.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy
+import pandas
+
+from volatility import data
+from volatility import models
+from volatility.models import jit
+from volatility.models.features import Features
+from volatility.volest import ESTIMATORS
+
+MODEL_ROWS = [10**3, 10**4, 10**5, 10**6, 10**7]
+METHOD_ROWS = [10**3, 10**4, 10**5]
+JIT_ESTIMATORS = ['YangZhang', 'HodgesTompkins', 'Skew', 'Kurtosis', 'EWMA', 'GARCH']
+# (rows, windows) of the Skew and Kurtosis comparison against a pandas loop
+MOMENT_CASES = [
+    (10**6, [30]),
+    (10**5, list(range(2, 253))),
+    (10**6, list(range(8, 257, 8))),
+]
+METHODS = [
+    'cones',
+    'cone_surface',
+    'bootstrap_realized',
+    'bootstrap_cones',
+    'rolling_quantiles',
+    'rolling_extremes',
+    'rolling_descriptives',
+    'histogram',
+    'benchmark_compare',
+    'benchmark_correlation',
+    'benchmark_regression',
+    'benchmark_rolling_regression',
+    'term_sheet',
+    'term_sheet_data',
+]
+TESTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'tests')
+
+
+def synthetic_ohlc(rows, symbol='SYN', seed=0, sigma=0.01):
+    """Random walk OHLC prices with minute bars
+
+    Parameters
+    ----------
+    rows : int
+        Number of bars
+    symbol : string
+        Symbol set as property of the result
+    seed : int
+        Seed of the random generator
+    sigma : float
+        Standard deviation of the log return per bar
+
+    Returns
+    -------
+    y : pandas.DataFrame
+        Prices with columns Open, High, Low, Close
+    """
+
+    rng = numpy.random.default_rng(seed)
+
+    close = 100.0 * numpy.exp(numpy.cumsum(rng.normal(0.0, sigma, rows)))
+    open = close * numpy.exp(rng.normal(0.0, sigma / 4.0, rows))
+    high = numpy.maximum(open, close) * numpy.exp(numpy.abs(rng.normal(0.0, sigma / 2.0, rows)))
+    low = numpy.minimum(open, close) * numpy.exp(-numpy.abs(rng.normal(0.0, sigma / 2.0, rows)))
+
+    price_data = pandas.DataFrame(
+        {'Open': open, 'High': high, 'Low': low, 'Close': close},
+        index=pandas.date_range('2000-01-03', periods=rows, freq='min', name='Date')
+    )
+    price_data.symbol = symbol
+
+    return price_data
+
+
+def measure(func, repeat=3):
+    """Best wall time of func over repeat calls and its peak allocation
+
+    Peak memory is measured in a separate call under tracemalloc so the
+    tracing overhead does not inflate the timings.
+
+    Returns
+    -------
+    seconds, peak_bytes : float, int
+    """
+
+    seconds = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        seconds = min(seconds, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return seconds, peak_bytes
+
+
+def _record(results, name, dataset, rows, func, repeat):
+
+    result = {
+        'name': name,
+        'data': dataset,
+        'rows': rows,
+    }
+
+    try:
+        seconds, peak_bytes = measure(func, repeat=repeat)
+    except Exception as e:
+        result['error'] = '%s: %s' % (type(e).__name__, e)
+    else:
+        result['seconds'] = seconds
+        result['rows_per_second'] = rows / seconds if seconds > 0 else float('inf')
+        result['peak_bytes'] = peak_bytes
+
+    results.append(result)
+    print(_format(result))
+    sys.stdout.flush()
+
+    return result
+
+
+def _datasets(rows):
+
+    if os.path.exists(os.path.join(TESTS_PATH, 'JPM.csv')):
+        price_data = data.yahoo_helper('JPM', os.path.join(TESTS_PATH, 'JPM.csv'))
+        bench_data = data.yahoo_helper('SPY', os.path.join(TESTS_PATH, 'BENCH.csv'))
+        yield 'JPM.csv', price_data, bench_data
+
+    for n in rows:
+        yield 'synthetic', synthetic_ohlc(n, seed=0), synthetic_ohlc(n, symbol='BENCH', seed=1)
+
+
+def bench_models(results, rows=MODEL_ROWS, window=30, repeat=3):
+    """Times get_estimator of every model"""
+
+    for dataset, price_data, _ in _datasets(rows):
+        for estimator in ESTIMATORS:
+            model = getattr(models, estimator)
+            _record(
+                results,
+                'models.%s.get_estimator' % estimator,
+                dataset,
+                len(price_data),
+                lambda: model.get_estimator(price_data, window=window),
+                repeat
+            )
+
+
+def bench_moments(results, cases=MOMENT_CASES, repeat=3):
+    """Times Skew and Kurtosis over many windows against a pandas loop
+
+    get_estimator_multi is timed with the compiled kernels, if numba is
+    installed, and with NumPy, next to pandas rolling().skew()/.kurt() of
+    the log returns called once per window.
+    """
+
+    backends = [False]
+    try:
+        previous = jit.set_enabled(True)
+    except ImportError:
+        previous = False
+    else:
+        backends.insert(0, True)
+
+    try:
+        for rows, windows in cases:
+            price_data = synthetic_ohlc(rows, seed=0)
+            log_cc = numpy.log(price_data['Close'] / price_data['Close'].shift(1))
+            dataset = '%dw' % len(windows)
+
+            for estimator, statistic in (('Skew', 'skew'), ('Kurtosis', 'kurt')):
+                model = getattr(models, estimator)
+                _record(
+                    results,
+                    'pandas.Rolling.%s loop' % statistic,
+                    dataset,
+                    rows,
+                    lambda: [getattr(log_cc.rolling(window=window), statistic)() for window in windows],
+                    repeat
+                )
+
+                for backend in backends:
+                    jit.set_enabled(backend)
+                    _record(
+                        results,
+                        'models.%s.get_estimator_multi[%s]' % (estimator, 'jit' if backend else 'numpy'),
+                        dataset,
+                        rows,
+                        lambda: model.get_estimator_multi(price_data, windows=windows),
+                        repeat
+                    )
+    finally:
+        jit.set_enabled(previous)
+
+
+def bench_methods(results, rows=METHOD_ROWS, estimator='YangZhang', repeat=1):
+    """Times every VolatilityEstimator method, including term_sheet
+
+    Each call gets a fresh instance so the estimator cache does not carry
+    over between repeats.
+    """
+
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    from volatility.volest import VolatilityEstimator
+
+    with tempfile.TemporaryDirectory(prefix='volest-benchmark-') as output_dir:
+        for dataset, price_data, bench_data in _datasets(rows):
+            for method in METHODS:
+
+                def run():
+                    vol = VolatilityEstimator(
+                        price_data=price_data,
+                        estimator=estimator,
+                        bench_data=bench_data
+                    )
+                    try:
+                        if method == 'term_sheet':
+                            vol.term_sheet(output_dir=output_dir)
+                        else:
+                            getattr(vol, method)()
+                    finally:
+                        plt.close('all')
+
+                _record(
+                    results,
+                    'VolatilityEstimator.%s' % method,
+                    dataset,
+                    len(price_data),
+                    run,
+                    repeat
+                )
+
+
+def check_jit(rows=10**4, symbols=8, windows=[5, 10, 30, 90], rtol=1e-7):
+    """Checks that the compiled and the NumPy kernels give the same values
+
+    Runs every model with a compiled kernel through both backends on a
+    (time, symbols) panel of synthetic prices with missing bars and on
+    tests/JPM.csv. The NumPy code takes window sums as differences of sums
+    over the whole history while the compiled kernels keep running sums
+    rebuilt every window, so the two agree to rounding, not bit for bit:
+    values are compared to within rtol of the largest value of the series.
+    A window without any value to compare, e.g. a kurtosis window shorter
+    than four bars, counts as a mismatch rather than passing unchecked.
+
+    Returns
+    -------
+    mismatches : [string, string, ...]
+        Description of every estimator and window that differs
+    """
+
+    panel = [synthetic_ohlc(rows, seed=seed) for seed in range(symbols)]
+    prices = [numpy.column_stack([p[column].values for p in panel]) for column in data.PRICE_COLUMNS]
+    for j, prices_j in enumerate(prices):
+        # symbols listed part way through and a halted bar
+        for symbol in range(symbols):
+            prices_j[:symbol * rows // (2 * symbols), symbol] = numpy.nan
+        prices_j[rows // 2, 0] = numpy.nan
+
+    datasets = [('synthetic', prices)]
+    for dataset, price_data, _ in _datasets([]):
+        datasets.append((dataset, [price_data[column].values for column in data.PRICE_COLUMNS]))
+
+    mismatches = []
+    previous = jit.set_enabled(True)
+    try:
+        for dataset, prices in datasets:
+            for estimator in JIT_ESTIMATORS:
+                model = getattr(models, estimator)
+                args = (windows,) if estimator in ('Skew', 'Kurtosis') else (windows, 252)
+
+                # fresh features for each backend, as GARCH keeps its fit in them
+                jit.set_enabled(True)
+                compiled = model._estimate(Features(*prices), *args)
+                jit.set_enabled(False)
+                expected = model._estimate(Features(*prices), *args)
+
+                for w, window in enumerate(windows):
+                    a = compiled[..., w]
+                    b = expected[..., w]
+                    if numpy.isnan(b).all():
+                        mismatches.append('%s %s window %d: no values to compare' % (dataset, estimator, window))
+                        continue
+                    atol = rtol * numpy.nanmax(numpy.abs(b))
+                    if not numpy.allclose(a, b, rtol=rtol, atol=atol, equal_nan=True):
+                        with numpy.errstate(invalid='ignore'):
+                            error = numpy.nanmax(numpy.abs(a - b))
+                        mismatches.append('%s %s window %d: max difference %g, NaN %d vs %d' % (
+                            dataset, estimator, window, error,
+                            numpy.isnan(a).sum(), numpy.isnan(b).sum()))
+    finally:
+        jit.set_enabled(previous)
+
+    return mismatches
+
+
+def compare(results, baseline):
+    """Prints the change in throughput against a previous run"""
+
+    previous = dict(
+        ((r['name'], r['data'], r['rows']), r) for r in baseline['results']
+    )
+
+    print('%-48s %-10s %10s %10s' % ('name', 'data', 'rows', 'speedup'))
+    for result in results:
+        key = (result['name'], result['data'], result['rows'])
+        before = previous.get(key)
+        if before is None or 'seconds' not in before or 'seconds' not in result:
+            continue
+        print('%-48s %-10s %10d %9.2fx' % (
+            result['name'], result['data'], result['rows'],
+            before['seconds'] / result['seconds'] if result['seconds'] > 0 else float('inf')
+        ))
+
+
+def _format(result):
+
+    if 'error' in result:
+        return '%-48s %-10s %10d  error: %s' % (
+            result['name'], result['data'], result['rows'], result['error'])
+
+    return '%-48s %-10s %10d %12.0f rows/s %10.1f MiB' % (
+        result['name'], result['data'], result['rows'],
+        result['rows_per_second'], result['peak_bytes'] / 2.0**20)
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=MODEL_ROWS,
+                        help='synthetic history sizes for the models')
+    parser.add_argument('--method-rows', type=int, nargs='+', default=METHOD_ROWS,
+                        help='synthetic history sizes for the VolatilityEstimator methods')
+    parser.add_argument('--estimator', default='YangZhang', choices=ESTIMATORS,
+                        help='estimator used for the VolatilityEstimator methods')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='timing runs per case, the best is reported')
+    parser.add_argument('--skip-models', action='store_true')
+    parser.add_argument('--skip-methods', action='store_true')
+    parser.add_argument('--skip-moments', action='store_true',
+                        help='skip the Skew and Kurtosis comparison against a pandas loop')
+    parser.add_argument('--output', help='save the results as JSON')
+    parser.add_argument('--compare', help='JSON results of a previous run to compare against')
+    parser.add_argument('--check-jit', action='store_true',
+                        help='only check the compiled kernels against NumPy')
+    args = parser.parse_args(argv)
+
+    if args.check_jit:
+        mismatches = check_jit()
+        for mismatch in mismatches:
+            print(mismatch)
+        print('%d mismatches' % len(mismatches))
+        return 1 if mismatches else 0
+
+    results = []
+    if not args.skip_models:
+        bench_models(results, rows=args.rows, repeat=args.repeat)
+    if not args.skip_moments:
+        bench_moments(results, repeat=args.repeat)
+    if not args.skip_methods:
+        bench_methods(results, rows=args.method_rows, estimator=args.estimator)
+
+    report = {
+        'created': datetime.datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'pandas': pandas.__version__,
+        'jit': jit.is_enabled(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,281 @@
+import collections
+import concurrent.futures
+
+import numpy
+
+from volatility import models
+from volatility.cones import cone_surface
+from volatility.models.features import Features
+from volatility.volest import ESTIMATORS
+
+METHODS = ['stationary', 'moving']
+BATCH_SIZE = 100
+
+Interval = collections.namedtuple('Interval', ['estimate', 'lower', 'upper', 'samples'])
+
+
+def block_indices(n, length, resamples, block_size, method='stationary', rng=None):
+    """Bar indices of block bootstrap resamples
+
+    Parameters
+    ----------
+    n : int
+        Number of bars to draw from
+    length : int
+        Number of bars per resample
+    resamples : int
+        Number of resamples
+    block_size : int
+        Length of the moving blocks, or mean length of the stationary ones
+    method : string
+        'stationary' (Politis and Romano, geometric block lengths, wrapping
+        around the end) or 'moving' (fixed length blocks)
+    rng : numpy.random.Generator
+        Random generator, a fresh unseeded one if None
+
+    Returns
+    -------
+    indices : numpy.ndarray
+        Integer array of shape (length, resamples)
+    """
+
+    if method not in METHODS:
+        raise ValueError('method must be one of ' + ', '.join(METHODS))
+    if not 1 <= block_size <= n:
+        raise ValueError('block_size must be between 1 and the number of bars')
+
+    if rng is None:
+        rng = numpy.random.default_rng()
+
+    rows = numpy.arange(length)[:, numpy.newaxis]
+
+    if method == 'moving':
+        blocks = -(-length // block_size)
+        starts = rng.integers(0, n - block_size + 1, size=(blocks, resamples))
+
+        return starts[rows[:, 0] // block_size] + rows % block_size
+
+    # each bar starts a new block with probability 1 / block_size
+    new_block = rng.random((length, resamples)) < 1.0 / block_size
+    new_block[0] = True
+    starts = rng.integers(0, n, size=(length, resamples))
+
+    block_start = numpy.maximum.accumulate(numpy.where(new_block, rows, 0), axis=0)
+    first = numpy.take_along_axis(starts, block_start, axis=0)
+
+    return (first + rows - block_start) % n
+
+
+def bootstrap_realized(
+        estimator,
+        open,
+        high,
+        low,
+        close,
+        window=30,
+        resamples=1000,
+        block_size=5,
+        method='stationary',
+        confidence=0.95,
+        seed=None,
+        processes=1):
+    """Confidence interval of the estimator on the last window
+
+    The bars of the last window are block resampled, each keeping its own
+    previous close so the returns are those of the original history, and
+    the estimator of every resample is computed in one vectorized call.
+
+    Parameters
+    ----------
+    estimator : string
+        Estimator name, one of ESTIMATORS
+    open, high, low, close : numpy.ndarray
+        Prices of one symbol, shape (time,)
+    window : int
+        Rolling window for which to calculate the estimator
+    resamples : int
+        Number of bootstrap resamples
+    block_size, method
+        See block_indices
+    confidence : float
+        Coverage of the percentile interval
+    seed : int or numpy.random.SeedSequence
+        Seed of the resamples; results are reproducible for a given seed
+        whatever the number of processes
+    processes : int
+        Number of worker processes, 1 to run in this process
+
+    Returns
+    -------
+    interval : Interval
+        Estimate on the original bars, lower and upper bounds and the
+        estimates of all resamples
+    """
+
+    prices = _prices(estimator, open, high, low, close, confidence)
+    n = prices.shape[1]
+    if not 2 <= window < n:
+        raise ValueError('window must be at least 2 and shorter than the history')
+
+    # the last window's bars and, in the last row, their previous closes
+    bars = numpy.vstack([prices[:, n - window:], prices[3, n - window - 1:n - 1]])
+
+    kwargs = {'window': window}
+    if estimator == 'HodgesTompkins':
+        # the bias adjustment depends on the length of the whole history
+        valid = ~numpy.isnan(prices[3])
+        kwargs['observations'] = numpy.count_nonzero(valid[1:] & valid[:-1])
+
+    estimate = getattr(models, estimator).get_estimator_panel(
+        price_data=_features(bars),
+        **kwargs
+    )[-1]
+
+    samples = _run(
+        _realized_batch,
+        (estimator, bars, kwargs, block_size, method),
+        resamples,
+        seed,
+        processes
+    )
+
+    return _interval(estimate, samples, confidence)
+
+
+def bootstrap_cones(
+        estimator,
+        open,
+        high,
+        low,
+        close,
+        windows=[30, 60, 90, 120],
+        quantiles=[0.25, 0.75],
+        resamples=1000,
+        block_size=20,
+        method='stationary',
+        confidence=0.95,
+        seed=None,
+        processes=1):
+    """Confidence intervals of the cone quantiles
+
+    The whole history is block resampled and the cone surface of every
+    resample comes out of one batch through the panel estimators, with the
+    resamples as columns.
+
+    Parameters
+    ----------
+    estimator, open, high, low, close
+        See bootstrap_realized
+    windows : [int, int, ...]
+        Rolling windows of the cones
+    quantiles : [float, float, ...]
+        Quantiles of the cones between 0 (min) and 1 (max)
+    resamples, block_size, method, confidence, seed, processes
+        See bootstrap_realized
+
+    Returns
+    -------
+    interval : Interval
+        Cone quantiles of the original history, lower and upper bounds, each
+        of shape (len(windows), len(quantiles)), and the cone quantiles of
+        all resamples of shape (resamples, len(windows), len(quantiles))
+    """
+
+    prices = _prices(estimator, open, high, low, close, confidence)
+    bars = numpy.vstack([prices[:, 1:], prices[3, :-1]])
+
+    estimate = cone_surface(
+        getattr(models, estimator),
+        _features(bars),
+        windows=windows,
+        quantiles=quantiles
+    ).values
+
+    samples = _run(
+        _cones_batch,
+        (estimator, bars, windows, quantiles, block_size, method),
+        resamples,
+        seed,
+        processes
+    )
+
+    return _interval(estimate, samples, confidence)
+
+
+def _prices(estimator, open, high, low, close, confidence):
+
+    if estimator not in ESTIMATORS:
+        raise ValueError('Acceptable volatility model is required')
+    if not 0 < confidence < 1:
+        raise ValueError('confidence must be between 0 and 1')
+
+    prices = numpy.array([open, high, low, close], dtype=float)
+    if prices.ndim != 2:
+        raise ValueError('Prices must be arrays of shape (time,)')
+
+    return prices
+
+
+def _features(bars, indices=None):
+    """Features of the bars (open, high, low, close, previous close rows),
+    resampled along the columns of indices if given"""
+
+    if indices is not None:
+        bars = bars[:, indices]
+
+    return Features(*bars[:4], previous_close=bars[4])
+
+
+def _run(batch, args, resamples, seed, processes):
+    """Runs batch over the resamples in fixed size batches, each with its
+    own child of the seed so the draws do not depend on the process count"""
+
+    sizes = [min(BATCH_SIZE, resamples - start) for start in range(0, resamples, BATCH_SIZE)]
+    if not isinstance(seed, numpy.random.SeedSequence):
+        seed = numpy.random.SeedSequence(seed)
+    seeds = seed.spawn(len(sizes))
+
+    if processes == 1:
+        results = [batch(*args, size, child) for size, child in zip(sizes, seeds)]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [executor.submit(batch, *args, size, child) for size, child in zip(sizes, seeds)]
+            results = [future.result() for future in futures]
+
+    return numpy.concatenate(results)
+
+
+def _realized_batch(estimator, bars, kwargs, block_size, method, resamples, seed):
+
+    rng = numpy.random.default_rng(seed)
+    window = bars.shape[1]
+    indices = block_indices(window, window, resamples, block_size, method=method, rng=rng)
+
+    return getattr(models, estimator).get_estimator_panel(
+        price_data=_features(bars, indices),
+        **kwargs
+    )[-1]
+
+
+def _cones_batch(estimator, bars, windows, quantiles, block_size, method, resamples, seed):
+
+    rng = numpy.random.default_rng(seed)
+    n = bars.shape[1]
+    indices = block_indices(n, n, resamples, block_size, method=method, rng=rng)
+
+    values = cone_surface(
+        getattr(models, estimator),
+        _features(bars, indices),
+        windows=windows,
+        quantiles=quantiles
+    ).values
+
+    return numpy.moveaxis(values, -1, 0)
+
+
+def _interval(estimate, samples, confidence):
+
+    alpha = (1.0 - confidence) / 2.0
+    lower, upper = numpy.nanquantile(samples, [alpha, 1.0 - alpha], axis=0)
+
+    return Interval(estimate, lower, upper, samples)
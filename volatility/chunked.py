@@ -0,0 +1,107 @@
+import numpy
+
+from volatility import models
+from volatility.models.features import Features
+from volatility.volest import ESTIMATORS
+
+CHUNK_SIZE = 1000000
+# recursive models depend on the whole history before each bar, not only on
+# the window, so no halo reproduces them
+RECURSIVE_ESTIMATORS = ['EWMA', 'GARCH']
+
+
+def iter_estimator(estimator, open, high, low, close, window=30, chunk_size=CHUNK_SIZE):
+    """Estimator values computed block by block over out-of-core prices
+
+    Each block is read together with the window bars before it (the halo),
+    which covers the longest lookback of any estimator including the
+    previous close, so the values are identical to an in-memory run while
+    only chunk_size + window rows are held in memory at once.
+
+    Parameters
+    ----------
+    estimator : string
+        Estimator name, one of ESTIMATORS except RECURSIVE_ESTIMATORS
+    open, high, low, close : array_like
+        Prices of shape (time,) or (time, symbols), typically numpy.memmap
+        arrays such as the columns of a yahoo_helper cache
+    window : int
+        Rolling window for which to calculate the estimator
+    chunk_size : int
+        Number of rows computed per block
+
+    Yields
+    ------
+    start, stop, y : int, int, numpy.ndarray
+        Estimator values for rows start to stop
+    """
+
+    if estimator not in ESTIMATORS:
+        raise ValueError('Acceptable volatility model is required')
+    if estimator in RECURSIVE_ESTIMATORS:
+        raise ValueError(estimator + ' cannot be computed block by block')
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be positive')
+
+    n = close.shape[0]
+    model = getattr(models, estimator)
+
+    kwargs = {'window': window}
+    if estimator == 'HodgesTompkins':
+        # the bias adjustment depends on the length of the whole history
+        kwargs['observations'] = _count_returns(close, chunk_size)
+
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        halo = min(window, start)
+
+        features = Features(
+            numpy.asarray(open[start - halo:stop]),
+            numpy.asarray(high[start - halo:stop]),
+            numpy.asarray(low[start - halo:stop]),
+            numpy.asarray(close[start - halo:stop])
+        )
+
+        yield start, stop, model.get_estimator_panel(features, **kwargs)[halo:]
+
+
+def get_estimator(estimator, open, high, low, close, window=30, chunk_size=CHUNK_SIZE, out=None):
+    """Estimator values over out-of-core prices, computed block by block
+
+    Parameters
+    ----------
+    estimator, open, high, low, close, window, chunk_size
+        See iter_estimator
+    out : numpy.ndarray
+        Array of the same shape as close receiving the values, e.g. a
+        writable numpy.memmap to keep the output out of core as well;
+        allocated in memory if not given
+
+    Returns
+    -------
+    y : numpy.ndarray
+        Estimator values, NaN where the window is incomplete
+    """
+
+    if out is None:
+        out = numpy.empty(close.shape)
+    elif out.shape != close.shape:
+        raise ValueError('out must be the same shape as the prices')
+
+    for start, stop, values in iter_estimator(
+            estimator, open, high, low, close, window=window, chunk_size=chunk_size):
+        out[start:stop] = values
+
+    return out
+
+
+def _count_returns(close, chunk_size):
+    """Number of close-to-close returns per column, read block by block"""
+
+    count = 0
+    for start in range(0, close.shape[0], chunk_size):
+        block = numpy.asarray(close[max(start - 1, 0):start + chunk_size])
+        valid = ~numpy.isnan(block)
+        count = count + numpy.count_nonzero(valid[1:] & valid[:-1], axis=0)
+
+    return count
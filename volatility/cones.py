@@ -0,0 +1,131 @@
+import collections
+
+import numpy
+
+from volatility import models
+from volatility.models.features import Features
+from volatility.volest import ESTIMATORS
+
+WINDOWS = list(range(2, 253))
+QUANTILES = [0.0, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0]
+WINDOW_CHUNK = 16
+
+ConeSurface = collections.namedtuple('ConeSurface', ['windows', 'quantiles', 'values', 'realized'])
+
+
+def get_cone_surface(
+        estimator,
+        open,
+        high,
+        low,
+        close,
+        windows=WINDOWS,
+        quantiles=QUANTILES,
+        window_chunk=WINDOW_CHUNK):
+    """Quantiles of the estimator over its history for a dense grid of windows
+
+    The cones of VolatilityEstimator.cones for every window at once, as one
+    (window x quantile) array per symbol. The estimator is computed for a
+    chunk of windows at a time from shared features and prefix sums, and
+    the quantiles of all symbols and windows of a chunk come out of a
+    single sort, so memory stays at about window_chunk copies of the prices.
+
+    Parameters
+    ----------
+    estimator : string
+        Estimator name, one of ESTIMATORS
+    open, high, low, close : numpy.ndarray
+        Prices of shape (time,) or (time, symbols), NaN where a symbol has
+        no bar
+    windows : [int, int, ...]
+        Rolling windows of the surface, 2 to 252 by default
+    quantiles : [float, float, ...]
+        Quantiles between 0 (min) and 1 (max), interpolated linearly as
+        pandas and numpy do
+    window_chunk : int
+        Number of windows computed at once
+
+    Returns
+    -------
+    surface : ConeSurface
+        windows and quantiles as arrays, values of shape
+        (len(windows), len(quantiles)) + symbols and the realized (last)
+        value of shape (len(windows),) + symbols
+    """
+
+    if estimator not in ESTIMATORS:
+        raise ValueError('Acceptable volatility model is required')
+
+    features = Features(open, high, low, close)
+
+    return cone_surface(
+        getattr(models, estimator),
+        features,
+        windows=windows,
+        quantiles=quantiles,
+        window_chunk=window_chunk
+    )
+
+
+def cone_surface(model, features, windows=WINDOWS, quantiles=QUANTILES, window_chunk=WINDOW_CHUNK):
+    """Cone surface of a model module over prepared Features
+
+    See get_cone_surface.
+    """
+
+    quantiles = numpy.asarray(quantiles, dtype=float)
+    if quantiles.ndim != 1 or ((quantiles < 0) | (quantiles > 1)).any():
+        raise ValueError('Quantiles must be between 0 and 1')
+    if window_chunk < 1:
+        raise ValueError('window_chunk must be positive')
+
+    windows = list(windows)
+    symbols = features.close.shape[1:]
+
+    values = numpy.empty((len(windows), len(quantiles)) + symbols)
+    realized = numpy.empty((len(windows),) + symbols)
+
+    for start in range(0, len(windows), window_chunk):
+        chunk = windows[start:start + window_chunk]
+
+        # estimator values of shape (time,) + symbols + (len(chunk),)
+        estimators = model.get_estimator_panel_multi(price_data=features, windows=chunk)
+
+        values[start:start + len(chunk)] = numpy.moveaxis(
+            _quantiles(estimators, quantiles), (0, -1), (1, 0))
+        realized[start:start + len(chunk)] = numpy.moveaxis(_last(estimators), -1, 0)
+
+    return ConeSurface(numpy.asarray(windows), quantiles, values, realized)
+
+
+def _quantiles(x, quantiles):
+    """Linearly interpolated quantiles along the first axis ignoring NaNs"""
+
+    # sort along the contiguous last axis rather than across rows
+    x = numpy.moveaxis(numpy.sort(numpy.moveaxis(x, 0, -1), axis=-1), -1, 0)
+    count = numpy.count_nonzero(~numpy.isnan(x), axis=0)
+
+    position = quantiles.reshape((-1,) + (1,) * (x.ndim - 1)) * (count - 1)
+    lower = numpy.floor(position)
+    fraction = position - lower
+
+    lower = numpy.clip(lower, 0, None).astype(numpy.intp)
+    upper = numpy.minimum(lower + 1, numpy.maximum(count - 1, 0))
+
+    below = numpy.take_along_axis(x, lower, axis=0)
+    above = numpy.take_along_axis(x, upper, axis=0)
+
+    result = below + (above - below) * fraction
+
+    return numpy.where(count > 0, result, numpy.nan)
+
+
+def _last(x):
+    """Last non-NaN value along the first axis"""
+
+    valid = ~numpy.isnan(x)
+    last = x.shape[0] - 1 - numpy.argmax(valid[::-1], axis=0)
+
+    result = numpy.take_along_axis(x, last[numpy.newaxis], axis=0)[0]
+
+    return numpy.where(valid.any(axis=0), result, numpy.nan)
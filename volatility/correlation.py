@@ -0,0 +1,164 @@
+import warnings
+
+import numpy
+
+
+def iter_rolling_corr(x, window, dtype=numpy.float32):
+    """Rolling correlation matrices of the columns of x, one date at a time
+
+    Keeps the window's rows in a ring buffer together with the running sums
+    of each column and of each pair of columns. Every step adds the outer
+    product of the new row and removes that of the row leaving the window,
+    so a date costs O(symbols**2) however long the window is. The sums are
+    rebuilt from the buffer once per window to stop rounding errors from
+    accumulating.
+
+    Parameters
+    ----------
+    x : numpy.ndarray
+        Values of shape (time, symbols), e.g. the output of
+        volatility.panel.get_estimator
+    window : int
+        Rolling window length
+    dtype : numpy.dtype
+        Type of the yielded correlations
+
+    Yields
+    ------
+    t, y : int, numpy.ndarray
+        Row index and the upper triangle (above the diagonal, in the order
+        of numpy.triu_indices(symbols, 1)) of the correlation matrix of the
+        window ending on it. Pairs involving a symbol with a missing value
+        or no variance in the window are NaN
+    """
+
+    x = numpy.asarray(x, dtype=float)
+    if x.ndim != 2:
+        raise ValueError('x must be an array of shape (time, symbols)')
+    if window < 2:
+        raise ValueError('window must be at least 2')
+
+    n, symbols = x.shape
+    upper = numpy.triu_indices(symbols, 1)
+
+    with warnings.catch_warnings():
+        # columns without any values stay NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        shift = numpy.nanmean(x, axis=0)
+    shift = numpy.where(numpy.isnan(shift), 0.0, shift)
+
+    buffer = numpy.zeros((window, symbols))
+    valid = numpy.zeros((window, symbols), dtype=bool)
+    missing = numpy.full(symbols, window)
+
+    sums = numpy.zeros(symbols)
+    cross = numpy.zeros((symbols, symbols))
+    empty = numpy.full(len(upper[0]), numpy.nan, dtype=dtype)
+
+    for t in range(n):
+        i = t % window
+
+        old = buffer[i]
+        sums -= old
+        cross -= numpy.outer(old, old)
+        missing -= ~valid[i]
+
+        row = x[t] - shift
+        valid[i] = ~numpy.isnan(row)
+        buffer[i] = numpy.where(valid[i], row, 0.0)
+        sums += buffer[i]
+        cross += numpy.outer(buffer[i], buffer[i])
+        missing += ~valid[i]
+
+        if i == window - 1:
+            sums = buffer.sum(axis=0)
+            cross = numpy.dot(buffer.T, buffer)
+
+        if t < window - 1:
+            yield t, empty.copy()
+            continue
+
+        cov = cross - numpy.outer(sums, sums) / window
+        var = numpy.diag(cov).copy()
+
+        ok = (missing == 0) & (var > 0)
+        std = numpy.where(ok, numpy.sqrt(numpy.where(ok, var, 1.0)), numpy.nan)
+
+        with numpy.errstate(invalid='ignore'):
+            corr = cov[upper] / (std[upper[0]] * std[upper[1]])
+
+        yield t, numpy.clip(corr, -1.0, 1.0).astype(dtype)
+
+
+def rolling_corr(x, window, dtype=numpy.float32, out=None):
+    """Rolling correlation matrices of the columns of x, stored compactly
+
+    Only the upper triangle above the diagonal is kept, in float32 by
+    default, which for 500 symbols is 0.5 MB per date instead of 2 MB for
+    the full float64 matrix.
+
+    Parameters
+    ----------
+    x, window, dtype
+        See iter_rolling_corr
+    out : numpy.ndarray
+        Array of shape (time, symbols * (symbols - 1) / 2) receiving the
+        correlations, e.g. a writable numpy.memmap; allocated if not given
+
+    Returns
+    -------
+    y : numpy.ndarray
+        Correlations of shape (time, symbols * (symbols - 1) / 2), see
+        to_matrix to expand a row into the full matrix
+    """
+
+    n, symbols = numpy.shape(x)
+    shape = (n, symbols * (symbols - 1) // 2)
+
+    if out is None:
+        out = numpy.empty(shape, dtype=dtype)
+    elif out.shape != shape:
+        raise ValueError('out must be of shape (time, symbols * (symbols - 1) / 2)')
+
+    for t, corr in iter_rolling_corr(x, window, dtype=dtype):
+        out[t] = corr
+
+    return out
+
+
+def to_matrix(corr, symbols, valid=None):
+    """Expands an upper triangle of rolling_corr into the full matrix
+
+    Parameters
+    ----------
+    corr : numpy.ndarray
+        One row of rolling_corr
+    symbols : int
+        Number of symbols
+    valid : numpy.ndarray
+        Boolean array of shape (symbols,), True for the symbols with a full
+        window of values and some variance in it. If not given, a symbol is
+        taken as valid when it has a correlation with any other symbol,
+        which only misses a symbol that is the sole valid one
+
+    Returns
+    -------
+    y : numpy.ndarray
+        Symmetric correlation matrix of shape (symbols, symbols) with ones
+        on the diagonal of the valid symbols and NaN on the others
+    """
+
+    upper = numpy.triu_indices(symbols, 1)
+
+    matrix = numpy.empty((symbols, symbols), dtype=corr.dtype)
+    matrix[upper] = corr
+    matrix.T[upper] = corr
+
+    if valid is None:
+        # the diagonal is still unset, so ignore it
+        numpy.fill_diagonal(matrix, numpy.nan)
+        valid = ~numpy.isnan(matrix).all(axis=1)
+
+    numpy.fill_diagonal(matrix, numpy.where(valid, 1.0, numpy.nan))
+
+    return matrix
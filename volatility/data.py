@@ -1,7 +1,21 @@
+import concurrent.futures
+import csv
+import hashlib
+import json
+import os
+
+import numpy
 import pandas
 
+from volatility import profiling
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+CACHE_VERSION = 1
+JOINS = ['outer', 'inner']
 
-def yahoo_helper(symbol, data_path, *args):
+
+@profiling.instrument
+def yahoo_helper(symbol, data_path, *args, cache=False):
     """
     Returns DataFrame/Panel of historical stock prices from symbols, over date
     range, start to end. 
@@ -14,8 +28,20 @@ def yahoo_helper(symbol, data_path, *args):
             Path to Yahoo! historical data CSV file
         *args:
             Additional arguments to pass to pandas.read_csv
+        cache : boolean or string
+            Set to True or 'mtime' to keep the parsed prices in a binary
+            cache next to the CSV file, rebuilt when the file's modification
+            time or size changes, or to 'hash' to rebuild when the SHA-1 of
+            its contents changes. Cached loads are memory-mapped rather
+            than parsed.
     """
 
+    if cache:
+        data = _read_cache(data_path, args, cache)
+        if data is not None:
+            data.symbol = symbol
+            return data
+
     try:
         data = pandas.read_csv(
             data_path,
@@ -36,5 +62,190 @@ def yahoo_helper(symbol, data_path, *args):
     except Exception as e:
         raise e
 
+    if cache:
+        _write_cache(data_path, args, cache, data)
+
     data.symbol = symbol
     return data
+
+
+@profiling.instrument
+def yahoo_panel(source, join='outer', threads=None, cache=False):
+    """
+    Returns the prices of many symbols as one panel aligned on their dates.
+
+    The CSV files are read concurrently by a thread pool and copied into a
+    single (time, field x symbol) block, so the panel is contiguous and
+    panel['Close'] is a (time, symbol) frame. The panel can be passed as
+    price_data to the get_estimator_panel functions of the models.
+
+    Parameters
+        ----------
+        source : string, dict or list
+            Directory of Yahoo! historical data CSV files named after their
+            symbols, manifest CSV file with columns symbol and path (relative
+            paths are resolved against its directory), dict of symbol to
+            path or list of paths named after their symbols
+        join : string
+            'outer' to keep every date of any symbol, NaN where a symbol has
+            no bar, or 'inner' to keep only the dates common to all symbols
+        threads : int
+            Number of reading threads, the ThreadPoolExecutor default if None
+        cache : boolean or string
+            See yahoo_helper
+
+    Returns
+        -------
+        panel : pandas.DataFrame
+            Prices indexed by date with (field, symbol) columns, fields in
+            the order of PRICE_COLUMNS and symbols in the order of source
+    """
+
+    if join not in JOINS:
+        raise ValueError('join must be one of ' + ', '.join(JOINS))
+
+    paths = _panel_paths(source)
+    if not paths:
+        raise ValueError('No price files to load')
+
+    # parsing and the copy out of each frame happen in the threads
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+        loaded = list(executor.map(
+            lambda item: _panel_prices(item[0], item[1], cache),
+            paths.items()
+        ))
+
+    dates = loaded[0][0]
+    for index, _ in loaded[1:]:
+        dates = dates.union(index) if join == 'outer' else dates.intersection(index)
+    dates = dates.unique().sort_values()
+
+    symbols = list(paths)
+    values = numpy.full((len(dates), len(PRICE_COLUMNS) * len(symbols)), numpy.nan)
+    columns = numpy.arange(len(PRICE_COLUMNS)) * len(symbols)
+
+    for j, (index, prices) in enumerate(loaded):
+        rows = dates.get_indexer(index)
+        found = rows >= 0
+        values[rows[found, numpy.newaxis], columns + j] = prices[found]
+
+    return pandas.DataFrame(
+        values,
+        index=dates,
+        columns=pandas.MultiIndex.from_product([PRICE_COLUMNS, symbols], names=['field', 'symbol']),
+        copy=False
+    )
+
+
+def _panel_prices(symbol, data_path, cache):
+    """Dates and (time, field) prices of one file"""
+
+    data = yahoo_helper(symbol, data_path, cache=cache)
+
+    return data.index, data[PRICE_COLUMNS].to_numpy(dtype=float)
+
+
+def _panel_paths(source):
+    """Ordered dict of symbol to CSV path"""
+
+    if isinstance(source, dict):
+        return dict(source)
+
+    if isinstance(source, str) and os.path.isdir(source):
+        names = sorted(name for name in os.listdir(source) if name.lower().endswith('.csv'))
+        return dict((os.path.splitext(name)[0], os.path.join(source, name)) for name in names)
+
+    if isinstance(source, str):
+        base = os.path.dirname(os.path.abspath(source))
+        with open(source) as f:
+            reader = csv.DictReader(f)
+            if not {'symbol', 'path'} <= set(reader.fieldnames or []):
+                raise ValueError('Manifest requires columns symbol, path')
+            return dict(
+                (row['symbol'].strip(), os.path.join(base, row['path'].strip()))
+                for row in reader
+            )
+
+    return dict((os.path.splitext(os.path.basename(path))[0], path) for path in source)
+
+
+def _cache_path(data_path):
+    return data_path + '.cache'
+
+
+def _cache_key(data_path, args, cache):
+    """Describes the CSV file the cache was built from"""
+
+    if cache not in (True, 'mtime', 'hash'):
+        raise ValueError("cache must be True, 'mtime' or 'hash'")
+
+    key = {
+        'version': CACHE_VERSION,
+        'args': repr(args),
+    }
+
+    if cache == 'hash':
+        sha1 = hashlib.sha1()
+        with open(data_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                sha1.update(chunk)
+        key['sha1'] = sha1.hexdigest()
+    else:
+        stat = os.stat(data_path)
+        key['mtime'] = stat.st_mtime_ns
+        key['size'] = stat.st_size
+
+    return key
+
+
+def _read_cache(data_path, args, cache):
+    """Memory-maps the cached prices, None if missing or stale"""
+
+    path = _cache_path(data_path)
+
+    try:
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+    except (IOError, ValueError):
+        return None
+
+    if meta != _cache_key(data_path, args, cache):
+        return None
+
+    dates = numpy.load(os.path.join(path, 'dates.npy'), mmap_mode='r')
+    prices = numpy.load(os.path.join(path, 'prices.npy'), mmap_mode='r')
+
+    # prices are stored one column per row so each column is contiguous
+    return pandas.DataFrame(
+        prices.T,
+        index=pandas.DatetimeIndex(dates, name='Date'),
+        columns=PRICE_COLUMNS,
+        copy=False
+    )
+
+
+def _write_cache(data_path, args, cache, data):
+    """Stores the parsed prices as columnar .npy files next to the CSV"""
+
+    dates = data.index.values
+    if not numpy.issubdtype(dates.dtype, numpy.datetime64):
+        return
+
+    prices = numpy.ascontiguousarray(data[PRICE_COLUMNS].values.T, dtype=float)
+
+    path = _cache_path(data_path)
+    if not os.path.isdir(path):
+        os.makedirs(path)
+
+    # write to temporary files and rename so a concurrent reader never sees
+    # a partially written cache; the metadata goes last and marks it valid
+    for name, values in (('dates.npy', dates), ('prices.npy', prices)):
+        tmp = os.path.join(path, name + '.%d.tmp' % os.getpid())
+        with open(tmp, 'wb') as f:
+            numpy.save(f, values)
+        os.replace(tmp, os.path.join(path, name))
+
+    tmp = os.path.join(path, 'meta.json.%d.tmp' % os.getpid())
+    with open(tmp, 'w') as f:
+        json.dump(_cache_key(data_path, args, cache), f)
+    os.replace(tmp, os.path.join(path, 'meta.json'))
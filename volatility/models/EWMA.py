@@ -0,0 +1,59 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from volatility import profiling
+from volatility.models import jit
+from volatility.models.features import get_features, to_frame, to_series
+
+
+@profiling.instrument
+def get_estimator(price_data, window=30, trading_periods=252, clean=True):
+
+    features = get_features(price_data)
+
+    return to_series(_estimate(features, [window], trading_periods)[..., 0], features, clean)
+
+
+@profiling.instrument
+def get_estimator_multi(price_data, windows=[30, 60, 90, 120], trading_periods=252, clean=True):
+
+    features = get_features(price_data)
+
+    return to_frame(_estimate(features, windows, trading_periods), features, windows, clean)
+
+
+@profiling.instrument
+def get_estimator_panel(price_data, window=30, trading_periods=252):
+
+    return _estimate(get_features(price_data), [window], trading_periods)[..., 0]
+
+
+@profiling.instrument
+def get_estimator_panel_multi(price_data, windows=[30, 60, 90, 120], trading_periods=252):
+
+    return _estimate(get_features(price_data), windows, trading_periods)
+
+
+def _estimate(features, windows, trading_periods):
+
+    if jit.is_enabled():
+        return jit.ewma(features, windows, trading_periods)
+
+    log_cc = features.log_cc
+
+    # RiskMetrics: zero mean returns, variance decaying by lambda = 1 - 2 / (window + 1)
+    squared = pd.DataFrame((log_cc**2).reshape(len(log_cc), -1), copy=False)
+
+    # one contiguous block per window, returned with the windows last
+    result = np.empty((len(windows),) + log_cc.shape)
+
+    for w, window in enumerate(windows):
+        variance = squared.ewm(span=window, min_periods=window, adjust=False).mean().to_numpy()
+        np.sqrt(variance.reshape(log_cc.shape), out=result[w])
+
+    result *= math.sqrt(trading_periods)
+    np.copyto(result, np.nan, where=np.isnan(log_cc))
+
+    return np.moveaxis(result, 0, -1)
@@ -0,0 +1,197 @@
+import itertools
+import math
+
+import numpy as np
+
+from volatility import profiling
+from volatility.models import jit
+from volatility.models.features import get_features, to_frame, to_series
+
+# starting grid of the fit, in log(1 - alpha - beta) and alpha / (alpha + beta)
+GRID_DECAY = np.linspace(math.log(1e-3), math.log(0.5), 7)
+GRID_SHARE = np.linspace(0.02, 0.5, 7)
+DECAY_BOUNDS = (math.log(1e-4), 0.0)
+SHARE_BOUNDS = (0.0, 1.0)
+ZOOM_ROUNDS = 16
+MIN_OBSERVATIONS = 20
+
+
+@profiling.instrument
+def get_estimator(price_data, window=30, trading_periods=252, clean=True):
+
+    features = get_features(price_data)
+
+    return to_series(_estimate(features, [window], trading_periods)[..., 0], features, clean)
+
+
+@profiling.instrument
+def get_estimator_multi(price_data, windows=[30, 60, 90, 120], trading_periods=252, clean=True):
+
+    features = get_features(price_data)
+
+    return to_frame(_estimate(features, windows, trading_periods), features, windows, clean)
+
+
+@profiling.instrument
+def get_estimator_panel(price_data, window=30, trading_periods=252):
+
+    return _estimate(get_features(price_data), [window], trading_periods)[..., 0]
+
+
+@profiling.instrument
+def get_estimator_panel_multi(price_data, windows=[30, 60, 90, 120], trading_periods=252):
+
+    return _estimate(get_features(price_data), windows, trading_periods)
+
+
+@profiling.instrument
+def fit(price_data):
+    """Fits GARCH(1,1) by maximum likelihood with variance targeting
+
+    The fit uses the whole history, so the historical series built on it
+    are in-sample: every value uses parameters estimated from later bars
+    too. Only the last value is a genuine forecast.
+
+    Parameters
+    ----------
+    price_data : pandas.DataFrame, numpy.ndarray, tuple or Features
+        See features.get_features. The fit is kept with Features, so every
+        window estimated from the same Features reuses it
+
+    Returns
+    -------
+    variance, alpha, beta : numpy.ndarray
+        Unconditional variance per bar and parameters of every symbol, of
+        shape close.shape[1:]; NaN with fewer than MIN_OBSERVATIONS returns
+    """
+
+    return get_features(price_data).cached('garch', _fit_features)
+
+
+def _fit_features(features):
+
+    r2, valid = _squared_returns(features)
+
+    return tuple(x.reshape(features.close.shape[1:]) for x in _fit(r2, valid))
+
+
+def _estimate(features, windows, trading_periods):
+
+    r2, valid = _squared_returns(features)
+    variance, alpha, beta = (x.ravel() for x in fit(features))
+
+    # variance of the next bar once each bar's return is known
+    forecast = np.empty_like(r2)
+    s2 = variance.copy()
+    for t in range(len(r2)):
+        s2 = variance * (1.0 - alpha - beta) + alpha * np.where(valid[t], r2[t], s2) + beta * s2
+        forecast[t] = s2
+
+    # mean variance over the next window bars, reverting to the unconditional
+    # variance at the rate alpha + beta
+    h = np.asarray(windows, dtype=float)
+    persistence = (alpha + beta)[:, np.newaxis]
+    decay = (1.0 - persistence**h) / (h * (1.0 - persistence))
+
+    forecast = variance[:, np.newaxis] + (forecast[..., np.newaxis] - variance[:, np.newaxis]) * decay
+    result = np.sqrt(forecast) * math.sqrt(trading_periods)
+
+    result = np.where(valid[..., np.newaxis], result, np.nan)
+
+    return result.reshape(features.close.shape + (len(windows),))
+
+
+def _squared_returns(features):
+
+    log_cc = features.log_cc.reshape(len(features), -1)
+    valid = ~np.isnan(log_cc)
+
+    return np.where(valid, log_cc**2, 0.0), valid
+
+
+def _fit(r2, valid):
+
+    # maximum likelihood with variance targeting for all symbols at once: a
+    # grid search, then a pattern search that halves its steps whenever none
+    # of the eight neighbouring points improves the likelihood
+    count = np.count_nonzero(valid, axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = r2.sum(axis=0) / count
+
+    symbols = r2.shape[1]
+    alpha = np.full(symbols, np.nan)
+    beta = np.full(symbols, np.nan)
+
+    ok = (count >= MIN_OBSERVATIONS) & (variance > 0)
+    variance = np.where(ok, variance, np.nan)
+    if not ok.any():
+        return variance, alpha, beta
+
+    r2 = r2[:, ok]
+    valid = valid[:, ok]
+    target = variance[ok]
+
+    decay, share = (x.ravel() for x in np.meshgrid(GRID_DECAY, GRID_SHARE))
+    likelihood = _likelihood(r2, valid, target, decay[np.newaxis], share[np.newaxis])
+    best = np.argmax(likelihood, axis=1)
+
+    decay = decay[best]
+    share = share[best]
+    likelihood = likelihood[np.arange(len(best)), best]
+    decay_step = np.full(len(best), GRID_DECAY[1] - GRID_DECAY[0])
+    share_step = np.full(len(best), GRID_SHARE[1] - GRID_SHARE[0])
+
+    offsets = np.array([offset for offset in itertools.product([-1, 0, 1], repeat=2) if offset != (0, 0)], dtype=float)
+
+    for _ in range(ZOOM_ROUNDS):
+        decays = np.clip(decay[:, np.newaxis] + decay_step[:, np.newaxis] * offsets[:, 0], *DECAY_BOUNDS)
+        shares = np.clip(share[:, np.newaxis] + share_step[:, np.newaxis] * offsets[:, 1], *SHARE_BOUNDS)
+
+        candidates = _likelihood(r2, valid, target, decays, shares)
+        best = np.argmax(candidates, axis=1)
+        candidates = candidates[np.arange(len(best)), best]
+
+        moved = candidates > likelihood
+        decay = np.where(moved, decays[np.arange(len(best)), best], decay)
+        share = np.where(moved, shares[np.arange(len(best)), best], share)
+        likelihood = np.where(moved, candidates, likelihood)
+        decay_step = np.where(moved, decay_step, decay_step / 2)
+        share_step = np.where(moved, share_step, share_step / 2)
+
+    persistence = 1.0 - np.exp(decay)
+    alpha[ok] = share * persistence
+    beta[ok] = (1.0 - share) * persistence
+
+    return variance, alpha, beta
+
+
+def _likelihood(r2, valid, variance, decay, share):
+
+    # Gaussian log likelihood without constants of (symbols, candidates)
+    # parameters given as log(1 - alpha - beta) and alpha / (alpha + beta)
+    persistence = 1.0 - np.exp(decay)
+    alpha = np.broadcast_to(share * persistence, (len(variance), decay.shape[-1]))
+    beta = np.broadcast_to((1.0 - share) * persistence, alpha.shape)
+
+    if jit.is_enabled():
+        likelihood = jit.garch_likelihood(r2, valid, variance, alpha, beta)
+    else:
+        likelihood = _recursion(r2, valid, variance, alpha, beta)
+
+    return np.where(np.isnan(likelihood), -np.inf, likelihood)
+
+
+def _recursion(r2, valid, variance, alpha, beta):
+
+    omega = variance[:, np.newaxis] * (1.0 - alpha - beta)
+    s2 = np.broadcast_to(variance[:, np.newaxis], alpha.shape).copy()
+    likelihood = np.zeros(alpha.shape)
+
+    for t in range(len(r2)):
+        ok = valid[t][:, np.newaxis]
+        x = r2[t][:, np.newaxis]
+
+        likelihood -= np.where(ok, np.log(s2) + x / s2, 0.0)
+        s2 = omega + alpha * np.where(ok, x, s2) + beta * s2
+
+    return likelihood
@@ -2,20 +2,53 @@ import math
 
 import numpy as np
 
+from volatility import profiling
+from volatility.models import kernels
+from volatility.models.features import get_features, to_frame, to_series
 
+
+@profiling.instrument
 def get_estimator(price_data, window=30, trading_periods=252, clean=True):
 
-    log_hl = (price_data['High'] / price_data['Low']).apply(np.log)
-    log_co = (price_data['Close'] / price_data['Open']).apply(np.log)
-
-    rs = 0.5 * log_hl**2 - (2*math.log(2)-1) * log_co**2
-    
-    def f(v):
-        return (trading_periods * v.mean())**0.5
-    
-    result = rs.rolling(window=window, center=False).apply(func=f)
-    
-    if clean:
-        return result.dropna()
-    else:
-        return result
+    features = get_features(price_data)
+
+    return to_series(_estimate(features, [window], trading_periods)[..., 0], features, clean)
+
+
+@profiling.instrument
+def get_estimator_multi(price_data, windows=[30, 60, 90, 120], trading_periods=252, clean=True):
+
+    features = get_features(price_data)
+
+    return to_frame(_estimate(features, windows, trading_periods), features, windows, clean)
+
+
+@profiling.instrument
+def get_estimator_panel(price_data, window=30, trading_periods=252):
+
+    return _estimate(get_features(price_data), [window], trading_periods)[..., 0]
+
+
+@profiling.instrument
+def get_estimator_panel_multi(price_data, windows=[30, 60, 90, 120], trading_periods=252):
+
+    return _estimate(get_features(price_data), windows, trading_periods)
+
+
+def _estimate(features, windows, trading_periods):
+
+    result = kernels.rolling_mean_multi((features.log_hl, features.log_co), windows, transform=_term)
+    result *= trading_periods
+
+    return np.sqrt(result, out=result)
+
+
+def _term(log_hl, log_co):
+
+    rs = np.square(log_hl)
+    rs *= 0.5
+    co = np.square(log_co)
+    co *= 2*math.log(2)-1
+    rs -= co
+
+    return rs
@@ -2,24 +2,58 @@ import math
 
 import numpy as np
 
+from volatility import profiling
+from volatility.models import jit
+from volatility.models import kernels
+from volatility.models.features import get_features, to_frame, to_series
 
+
+@profiling.instrument
 def get_estimator(price_data, window=30, trading_periods=252, clean=True):
-    
-    log_return = (price_data['Close'] / price_data['Close'].shift(1)).apply(np.log)
 
-    vol = log_return.rolling(
-        window=window,
-        center=False
-    ).std() * math.sqrt(trading_periods)
+    features = get_features(price_data)
+
+    return to_series(_estimate(features, [window], trading_periods)[..., 0], features, clean)
+
+
+@profiling.instrument
+def get_estimator_multi(price_data, windows=[30, 60, 90, 120], trading_periods=252, clean=True):
+
+    features = get_features(price_data)
+
+    return to_frame(_estimate(features, windows, trading_periods), features, windows, clean)
+
+
+@profiling.instrument
+def get_estimator_panel(price_data, window=30, trading_periods=252, observations=None):
+
+    return _estimate(get_features(price_data), [window], trading_periods, observations)[..., 0]
+
+
+@profiling.instrument
+def get_estimator_panel_multi(price_data, windows=[30, 60, 90, 120], trading_periods=252, observations=None):
+
+    return _estimate(get_features(price_data), windows, trading_periods, observations)
+
+
+def _estimate(features, windows, trading_periods, observations=None):
+
+    if jit.is_enabled():
+        return jit.hodges_tompkins(features, windows, trading_periods, observations)
+
+    vol = kernels.rolling_std_multi(features.log_cc, windows)
+    vol *= math.sqrt(trading_periods)
+
+    # observations overrides the return count when price_data is only part
+    # of the history, as in chunked estimation
+    if observations is None:
+        observations = np.count_nonzero(~np.isnan(features.log_cc), axis=0)
 
-    h = window
-    n = (log_return.count() - h) + 1
+    h = np.asarray(windows, dtype=float)
+    n = (np.asarray(observations)[..., np.newaxis] - h) + 1
 
     adj_factor = 1.0 / (1.0 - (h / n) + ((h**2 - 1) / (3 * n**2)))
 
-    result = vol * adj_factor
+    vol *= adj_factor
 
-    if clean:
-        return result.dropna()
-    else:
-        return result
+    return vol
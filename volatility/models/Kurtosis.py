@@ -1,16 +1,40 @@
-import numpy as np
+from volatility.models import jit
+from volatility import profiling
+from volatility.models import kernels
+from volatility.models.features import get_features, to_frame, to_series
 
 
+@profiling.instrument
 def get_estimator(price_data, window=30, clean=True):
 
-    log_return = (price_data['Close'] / price_data['Close'].shift(1)).apply(np.log)
+    features = get_features(price_data)
 
-    result = log_return.rolling(
-        window=window,
-        center=False
-    ).kurt()
+    return to_series(_estimate(features, [window])[..., 0], features, clean)
 
-    if clean:
-        return result.dropna()
-    else:
-        return result
+
+@profiling.instrument
+def get_estimator_multi(price_data, windows=[30, 60, 90, 120], clean=True):
+
+    features = get_features(price_data)
+
+    return to_frame(_estimate(features, windows), features, windows, clean)
+
+
+@profiling.instrument
+def get_estimator_panel(price_data, window=30):
+
+    return _estimate(get_features(price_data), [window])[..., 0]
+
+
+@profiling.instrument
+def get_estimator_panel_multi(price_data, windows=[30, 60, 90, 120]):
+
+    return _estimate(get_features(price_data), windows)
+
+
+def _estimate(features, windows):
+
+    if jit.is_enabled():
+        return jit.rolling_kurt(features, windows)
+
+    return kernels.rolling_moment_multi(features.log_cc, windows, 4)
@@ -2,20 +2,50 @@ import math
 
 import numpy as np
 
+from volatility import profiling
+from volatility.models import kernels
+from volatility.models.features import get_features, to_frame, to_series
 
+
+@profiling.instrument
 def get_estimator(price_data, window=30, trading_periods=252, clean=True):
 
-    rs = (1.0 / (4.0 * math.log(2.0))) * ((price_data['High'] / price_data['Low']).apply(np.log))**2.0
-
-    def f(v):
-        return (trading_periods * v.mean())**0.5
-    
-    result = rs.rolling(
-        window=window,
-        center=False
-    ).apply(func=f)
-    
-    if clean:
-        return result.dropna()
-    else:
-        return result
+    features = get_features(price_data)
+
+    return to_series(_estimate(features, [window], trading_periods)[..., 0], features, clean)
+
+
+@profiling.instrument
+def get_estimator_multi(price_data, windows=[30, 60, 90, 120], trading_periods=252, clean=True):
+
+    features = get_features(price_data)
+
+    return to_frame(_estimate(features, windows, trading_periods), features, windows, clean)
+
+
+@profiling.instrument
+def get_estimator_panel(price_data, window=30, trading_periods=252):
+
+    return _estimate(get_features(price_data), [window], trading_periods)[..., 0]
+
+
+@profiling.instrument
+def get_estimator_panel_multi(price_data, windows=[30, 60, 90, 120], trading_periods=252):
+
+    return _estimate(get_features(price_data), windows, trading_periods)
+
+
+def _estimate(features, windows, trading_periods):
+
+    result = kernels.rolling_mean_multi(features.log_hl, windows, transform=_term)
+    result *= trading_periods
+
+    return np.sqrt(result, out=result)
+
+
+def _term(log_hl):
+
+    rs = np.square(log_hl)
+    rs *= 1.0 / (4.0 * math.log(2.0))
+
+    return rs
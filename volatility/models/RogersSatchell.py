@@ -2,24 +2,42 @@ import math
 
 import numpy as np
 
+from volatility import profiling
+from volatility.models import kernels
+from volatility.models.features import get_features, to_frame, to_series
 
+
+@profiling.instrument
 def get_estimator(price_data, window=30, trading_periods=252, clean=True):
-    
-    log_ho = (price_data['High'] / price_data['Open']).apply(np.log)
-    log_lo = (price_data['Low'] / price_data['Open']).apply(np.log)
-    log_co = (price_data['Close'] / price_data['Open']).apply(np.log)
-    
-    rs = log_ho * (log_ho - log_co) + log_lo * (log_lo - log_co)
-
-    def f(v):
-        return (trading_periods * v.mean())**0.5
-    
-    result = rs.rolling(
-        window=window,
-        center=False
-    ).apply(func=f)
-    
-    if clean:
-        return result.dropna()
-    else:
-        return result
+
+    features = get_features(price_data)
+
+    return to_series(_estimate(features, [window], trading_periods)[..., 0], features, clean)
+
+
+@profiling.instrument
+def get_estimator_multi(price_data, windows=[30, 60, 90, 120], trading_periods=252, clean=True):
+
+    features = get_features(price_data)
+
+    return to_frame(_estimate(features, windows, trading_periods), features, windows, clean)
+
+
+@profiling.instrument
+def get_estimator_panel(price_data, window=30, trading_periods=252):
+
+    return _estimate(get_features(price_data), [window], trading_periods)[..., 0]
+
+
+@profiling.instrument
+def get_estimator_panel_multi(price_data, windows=[30, 60, 90, 120], trading_periods=252):
+
+    return _estimate(get_features(price_data), windows, trading_periods)
+
+
+def _estimate(features, windows, trading_periods):
+
+    result = kernels.rolling_mean_multi(features.rs, windows)
+    result *= trading_periods
+
+    return np.sqrt(result, out=result)
@@ -2,38 +2,63 @@ import math
 
 import numpy as np
 
+from volatility import profiling
+from volatility.models import jit
+from volatility.models import kernels
+from volatility.models.features import get_features, to_frame, to_series
 
+
+@profiling.instrument
 def get_estimator(price_data, window=30, trading_periods=252, clean=True):
 
-    log_ho = (price_data['High'] / price_data['Open']).apply(np.log)
-    log_lo = (price_data['Low'] / price_data['Open']).apply(np.log)
-    log_co = (price_data['Close'] / price_data['Open']).apply(np.log)
-    
-    log_oc = (price_data['Open'] / price_data['Close'].shift(1)).apply(np.log)
-    log_oc_sq = log_oc**2
-    
-    log_cc = (price_data['Close'] / price_data['Close'].shift(1)).apply(np.log)
-    log_cc_sq = log_cc**2
-    
-    rs = log_ho * (log_ho - log_co) + log_lo * (log_lo - log_co)
-    
-    close_vol = log_cc_sq.rolling(
-        window=window,
-        center=False
-    ).sum() * (1.0 / (window - 1.0))
-    open_vol = log_oc_sq.rolling(
-        window=window,
-        center=False
-    ).sum() * (1.0 / (window - 1.0))
-    window_rs = rs.rolling(
-        window=window,
-        center=False
-    ).sum() * (1.0 / (window - 1.0))
-
-    k = 0.34 / (1.34 + (window + 1) / (window - 1))
-    result = (open_vol + k * close_vol + (1 - k) * window_rs).apply(np.sqrt) * math.sqrt(trading_periods)
-
-    if clean:
-        return result.dropna()
-    else:
-        return result
+    features = get_features(price_data)
+
+    return to_series(_estimate(features, [window], trading_periods)[..., 0], features, clean)
+
+
+@profiling.instrument
+def get_estimator_multi(price_data, windows=[30, 60, 90, 120], trading_periods=252, clean=True):
+
+    features = get_features(price_data)
+
+    return to_frame(_estimate(features, windows, trading_periods), features, windows, clean)
+
+
+@profiling.instrument
+def get_estimator_panel(price_data, window=30, trading_periods=252):
+
+    return _estimate(get_features(price_data), [window], trading_periods)[..., 0]
+
+
+@profiling.instrument
+def get_estimator_panel_multi(price_data, windows=[30, 60, 90, 120], trading_periods=252):
+
+    return _estimate(get_features(price_data), windows, trading_periods)
+
+
+def _estimate(features, windows, trading_periods):
+
+    if jit.is_enabled():
+        return jit.yang_zhang(features, windows, trading_periods)
+
+    w = np.asarray(windows, dtype=float)
+
+    k = 0.34 / (1.34 + (w + 1) / (w - 1))
+
+    # open_vol + k * close_vol + (1 - k) * window_rs, accumulated in place
+    vol = kernels.rolling_sum_multi(features.log_oc, windows, transform=np.square)
+
+    term = kernels.rolling_sum_multi(features.log_cc, windows, transform=np.square)
+    term *= k
+    vol += term
+
+    kernels.rolling_sum_multi(features.rs, windows, out=term)
+    term *= 1 - k
+    vol += term
+    del term
+
+    vol *= 1.0 / (w - 1.0)
+    np.sqrt(vol, out=vol)
+    vol *= math.sqrt(trading_periods)
+
+    return vol
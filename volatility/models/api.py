@@ -1,3 +1,5 @@
+from volatility.models import EWMA
+from volatility.models import GARCH
 from volatility.models import GarmanKlass
 from volatility.models import HodgesTompkins
 from volatility.models import Kurtosis
@@ -8,6 +10,8 @@ from volatility.models import Skew
 from volatility.models import YangZhang
 
 __all__ = [
+    'EWMA',
+    'GARCH',
     'GarmanKlass',
     'HodgesTompkins',
     'Kurtosis',
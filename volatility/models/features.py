@@ -0,0 +1,249 @@
+import numpy as np
+import pandas as pd
+
+from volatility.models import kernels
+
+
+class Features(object):
+    """Log price ratios shared by the volatility estimators
+
+    Each ratio is computed from the open, high, low and close arrays the
+    first time an estimator asks for it and is kept for the next one, so
+    sweeping several estimators over the same prices computes it only once.
+
+    Parameters
+    ----------
+    open, high, low, close : numpy.ndarray
+        Prices, one row per bar; float64 and float32 arrays are used without
+        a copy and the ratios are computed in float64
+    index : pandas.Index
+        Optional index attached to the estimator results
+    previous_close : numpy.ndarray
+        Close of the bar before each bar, the close shifted by one bar if
+        not given; set for bars that are not in time order, e.g. resamples
+    """
+
+    def __init__(self, open, high, low, close, index=None, previous_close=None):
+
+        self.open = _prices(open)
+        self.high = _prices(high)
+        self.low = _prices(low)
+        self.close = _prices(close)
+        self.index = index
+
+        self._ratios = {}
+        self._results = {}
+        if previous_close is not None:
+            self._ratios['previous_close'] = np.asarray(previous_close, dtype=float)
+
+    def __len__(self):
+        return self.close.shape[0]
+
+    def cached(self, name, compute):
+        """Returns compute(self), calling it only the first time name is asked for
+
+        Lets a model keep what it derives from the whole history, e.g. fitted
+        parameters, with the prices so every later window and call reuses it.
+        """
+
+        if name not in self._results:
+            self._results[name] = compute(self)
+
+        return self._results[name]
+
+    def _log_ratio(self, name, numerator, denominator):
+
+        if name not in self._ratios:
+            ratio = np.divide(numerator, denominator, dtype=np.float64)
+            self._ratios[name] = np.log(ratio, out=ratio)
+
+        return self._ratios[name]
+
+    def _log_return(self, name, prices):
+
+        if 'previous_close' in self._ratios:
+            return self._log_ratio(name, prices, self._ratios['previous_close'])
+
+        # divide by the close one row up rather than keep a shifted copy
+        if name not in self._ratios:
+            ratio = np.empty(prices.shape)
+            ratio[:1] = np.nan
+            np.divide(prices[1:], self.close[:-1], out=ratio[1:], dtype=np.float64)
+            self._ratios[name] = np.log(ratio, out=ratio)
+
+        return self._ratios[name]
+
+    @property
+    def log_hl(self):
+        """log(High / Low)"""
+        return self._log_ratio('log_hl', self.high, self.low)
+
+    @property
+    def log_co(self):
+        """log(Close / Open)"""
+        return self._log_ratio('log_co', self.close, self.open)
+
+    @property
+    def log_ho(self):
+        """log(High / Open)"""
+        return self._log_ratio('log_ho', self.high, self.open)
+
+    @property
+    def log_lo(self):
+        """log(Low / Open)"""
+        return self._log_ratio('log_lo', self.low, self.open)
+
+    @property
+    def log_oc(self):
+        """log(Open / previous Close), NaN on the first bar"""
+        return self._log_return('log_oc', self.open)
+
+    @property
+    def log_cc(self):
+        """log(Close / previous Close), NaN on the first bar"""
+        return self._log_return('log_cc', self.close)
+
+    @property
+    def rs(self):
+        """Rogers-Satchell term, shared by RogersSatchell and YangZhang"""
+
+        if 'rs' not in self._ratios:
+            log_co = self.log_co
+            rs = np.empty(log_co.shape)
+
+            # block by block, so log(High / Open) and log(Low / Open) are
+            # never held for the whole history
+            rows = max(kernels.BLOCK_VALUES // max(log_co[:1].size, 1), 1)
+            for start in range(0, len(rs), rows):
+                block = slice(start, start + rows)
+                log_ho = np.log(np.divide(self.high[block], self.open[block], dtype=np.float64))
+                log_lo = np.log(np.divide(self.low[block], self.open[block], dtype=np.float64))
+                rs[block] = log_ho * (log_ho - log_co[block]) + log_lo * (log_lo - log_co[block])
+
+            self._ratios['rs'] = rs
+
+        return self._ratios['rs']
+
+
+def get_features(price_data):
+    """Returns the Features for price_data
+
+    Parameters
+    ----------
+    price_data : pandas.DataFrame, numpy.ndarray, tuple or Features
+        Prices with columns Open, High, Low, Close, an array whose last axis
+        holds open, high, low and close, e.g. of shape (time, 4), or a tuple
+        of the open, high, low and close arrays. Arrays are not copied and
+        the estimators return arrays rather than pandas objects for them.
+        Features are returned unchanged so callers can share one instance
+        across estimators
+    """
+
+    if isinstance(price_data, Features):
+        return price_data
+
+    if isinstance(price_data, tuple):
+        return Features(*price_data)
+
+    if isinstance(price_data, np.ndarray):
+        if price_data.ndim < 2 or price_data.shape[-1] != 4:
+            raise ValueError('price_data of type numpy.ndarray must be of shape (time, 4)')
+        return Features(*np.moveaxis(price_data, -1, 0))
+
+    return Features(
+        price_data['Open'],
+        price_data['High'],
+        price_data['Low'],
+        price_data['Close'],
+        index=price_data.index
+    )
+
+
+def to_series(values, features, clean=True):
+    """Estimator values of one window for get_estimator
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Values of shape (time,)
+    features : Features
+        Features the values were computed from
+    clean : boolean
+        Set to True to drop the NaNs
+
+    Returns
+    -------
+    y : pandas.Series or numpy.ndarray
+        A Series on the index of the features, or the array itself if the
+        prices came without an index
+    """
+
+    if not clean:
+        keep = slice(None)
+    else:
+        keep = _rows(~np.isnan(values))
+
+    if features.index is None:
+        return values[keep]
+
+    return pd.Series(values, index=features.index, copy=False).iloc[keep]
+
+
+def to_frame(values, features, windows, clean=True):
+    """Estimator values of several windows for get_estimator_multi
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Values of shape (time, len(windows))
+    features : Features
+        Features the values were computed from
+    windows : [int, int, ...]
+        Rolling windows, the columns of the DataFrame
+    clean : boolean
+        Set to True to drop the rows without any value
+
+    Returns
+    -------
+    y : pandas.DataFrame or numpy.ndarray
+        A DataFrame on the index of the features, or the array itself if
+        the prices came without an index
+    """
+
+    if not clean:
+        keep = slice(None)
+    else:
+        keep = _rows(~np.isnan(values).all(axis=1))
+
+    if features.index is None:
+        return values[keep]
+
+    return pd.DataFrame(values, index=features.index, columns=windows, copy=False).iloc[keep]
+
+
+def _rows(keep):
+    """Rows to keep as a slice if they are contiguous, else the mask itself
+
+    Dropping the leading NaNs of a rolling window then takes a view of the
+    values rather than a copy.
+    """
+
+    # the first and last kept rows from the mask alone, without an index
+    # array the length of the history
+    if not keep.any():
+        return slice(0, 0)
+    start = int(keep.argmax())
+    stop = len(keep) - int(keep[::-1].argmax())
+    if keep[start:stop].all():
+        return slice(start, stop)
+
+    return keep
+
+
+def _prices(x):
+
+    x = np.asarray(x)
+    if x.dtype == np.float32:
+        return x
+
+    return np.asarray(x, dtype=float)
@@ -0,0 +1,474 @@
+"""Compiled kernels for the models, used when numba is installed
+
+Each kernel reads the log price ratios the NumPy implementation shares
+between the models and fuses the rolling sums and the final scaling into
+one loop per symbol, without its intermediate arrays. The models call them
+while is_enabled() is True and fall back to NumPy otherwise; set the
+environment variable VOLATILITY_JIT=0 or call set_enabled(False) to force
+the NumPy code path.
+
+numba is only imported, and the kernels compiled, when a model first asks
+for them, so importing the package stays cheap.
+
+Rolling sums are kept as running sums that add the bar entering the window
+and remove the one leaving it, and are rebuilt from the window once per
+window length so rounding errors do not accumulate.
+"""
+import math
+import os
+
+import numpy as np
+
+# the numba module once imported by _load
+numba = None
+
+# None until is_enabled first looks for numba
+ENABLED = None if os.environ.get('VOLATILITY_JIT', '1') != '0' else False
+
+# names of the functions compiled by _load
+_KERNELS = []
+
+
+def is_enabled():
+    """True if the models use the compiled kernels
+
+    The first call with the kernels switched on imports numba, and falls
+    back to NumPy for good if it is not installed.
+    """
+
+    global ENABLED
+
+    if ENABLED is None:
+        ENABLED = _load()
+
+    return ENABLED
+
+
+def set_enabled(enabled):
+    """Switches the compiled kernels on or off, returns the previous state"""
+
+    global ENABLED
+
+    if enabled and not _load():
+        raise ImportError('numba is required for the compiled kernels')
+
+    previous = is_enabled()
+    ENABLED = bool(enabled)
+
+    return previous
+
+
+def _load():
+    """Imports numba and compiles the kernels, False if numba is missing"""
+
+    global numba
+
+    if numba is None:
+        try:
+            import numba as module
+        except ImportError:
+            return False
+
+        # numpy semantics: divisions by zero give inf or NaN instead of raising
+        for name in _KERNELS:
+            globals()[name] = module.njit(cache=True, nogil=True, error_model='numpy')(globals()[name])
+
+        numba = module
+
+    return True
+
+
+def _jit(func):
+
+    _KERNELS.append(func.__name__)
+
+    return func
+
+
+def yang_zhang(features, windows, trading_periods):
+    """Compiled counterpart of YangZhang._estimate"""
+
+    out = _output(features, windows)
+    _yang_zhang(
+        _columns(features.log_cc),
+        _columns(features.log_oc),
+        _columns(features.rs),
+        _windows(windows),
+        float(trading_periods),
+        out
+    )
+
+    return _result(out, features)
+
+
+def hodges_tompkins(features, windows, trading_periods, observations=None):
+    """Compiled counterpart of HodgesTompkins._estimate"""
+
+    symbols = features.close.shape[1:]
+    if observations is None:
+        observations = np.full(symbols, -1, dtype=np.int64)
+    observations = np.broadcast_to(np.asarray(observations, dtype=np.int64), symbols).ravel()
+
+    out = _output(features, windows)
+    _hodges_tompkins(
+        _columns(features.log_cc),
+        _windows(windows),
+        float(trading_periods),
+        np.ascontiguousarray(observations),
+        out
+    )
+
+    return _result(out, features)
+
+
+def rolling_skew(features, windows):
+    """Compiled counterpart of Skew._estimate"""
+
+    out = _output(features, windows)
+    _rolling_moment(_columns(features.log_cc), _windows(windows), 3, out)
+
+    return _result(out, features)
+
+
+def rolling_kurt(features, windows):
+    """Compiled counterpart of Kurtosis._estimate"""
+
+    out = _output(features, windows)
+    _rolling_moment(_columns(features.log_cc), _windows(windows), 4, out)
+
+    return _result(out, features)
+
+
+def ewma(features, windows, trading_periods):
+    """Compiled counterpart of EWMA._estimate"""
+
+    out = _output(features, windows)
+    _ewma(_columns(features.log_cc), _windows(windows), float(trading_periods), out)
+
+    return _result(out, features)
+
+
+def garch_likelihood(r2, valid, variance, alpha, beta):
+    """Compiled counterpart of GARCH._recursion"""
+
+    out = np.empty(alpha.shape)
+    _garch_likelihood(
+        np.ascontiguousarray(r2.T),
+        np.ascontiguousarray(valid.T),
+        np.ascontiguousarray(variance),
+        np.ascontiguousarray(alpha),
+        np.ascontiguousarray(beta),
+        out
+    )
+
+    return out
+
+
+def _columns(x):
+    """One contiguous row per symbol, a view for a single symbol"""
+
+    return np.ascontiguousarray(x.reshape(len(x), -1).T)
+
+
+def _windows(windows):
+
+    return np.asarray(windows, dtype=np.int64)
+
+
+def _output(features, windows):
+
+    # one contiguous row per symbol and window, written bar after bar
+    shape = features.close.shape
+
+    return np.empty((int(np.prod(shape[1:], dtype=np.int64)), len(windows), shape[0]))
+
+
+def _result(out, features):
+
+    # a (time, ..., window) view of the output, not a copy
+    return np.transpose(out, (2, 0, 1)).reshape(features.close.shape + (out.shape[1],))
+
+
+@_jit
+def _yang_zhang(log_cc, log_oc, rs, windows, trading_periods, out):
+
+    symbols, n = log_cc.shape
+    scale = math.sqrt(trading_periods)
+
+    for j in range(symbols):
+        close = log_cc[j]
+        open = log_oc[j]
+        range_ = rs[j]
+
+        for w in range(len(windows)):
+            window = windows[w]
+            k = 0.34 / (1.34 + (window + 1.0) / (window - 1.0))
+            close_sum = 0.0
+            open_sum = 0.0
+            rs_sum = 0.0
+            missing = 0
+
+            for i in range(n):
+                if _valid(close[i], open[i], range_[i]):
+                    close_sum += close[i] * close[i]
+                    open_sum += open[i] * open[i]
+                    rs_sum += range_[i]
+                else:
+                    missing += 1
+
+                if i >= window:
+                    l = i - window
+                    if _valid(close[l], open[l], range_[l]):
+                        close_sum -= close[l] * close[l]
+                        open_sum -= open[l] * open[l]
+                        rs_sum -= range_[l]
+                    else:
+                        missing -= 1
+
+                if (i + 1) % window == 0 and missing == 0:
+                    close_sum = 0.0
+                    open_sum = 0.0
+                    rs_sum = 0.0
+                    for l in range(i - window + 1, i + 1):
+                        close_sum += close[l] * close[l]
+                        open_sum += open[l] * open[l]
+                        rs_sum += range_[l]
+
+                if i < window - 1 or missing > 0:
+                    out[j, w, i] = np.nan
+                    continue
+
+                var = (open_sum + k * close_sum + (1.0 - k) * rs_sum) / (window - 1.0)
+                out[j, w, i] = math.sqrt(var) * scale if var >= 0 else np.nan
+
+
+@_jit
+def _valid(close, open, range_):
+
+    return not (np.isnan(close) or np.isnan(open) or np.isnan(range_))
+
+
+@_jit
+def _moments(log_cc):
+    """Count and mean of the log returns of one symbol"""
+
+    count = 0
+    total = 0.0
+
+    for i in range(log_cc.shape[0]):
+        if not np.isnan(log_cc[i]):
+            count += 1
+            total += log_cc[i]
+
+    return count, total / count if count > 0 else 0.0
+
+
+@_jit
+def _hodges_tompkins(returns, windows, trading_periods, observations, out):
+
+    symbols, n = returns.shape
+    scale = math.sqrt(trading_periods)
+
+    for j in range(symbols):
+        log_cc = returns[j]
+        count, mean = _moments(log_cc)
+        if observations[j] >= 0:
+            count = observations[j]
+
+        for w in range(len(windows)):
+            window = windows[w]
+            h = float(window)
+            m = (count - h) + 1.0
+            adj_factor = 1.0 / (1.0 - (h / m) + ((h * h - 1.0) / (3.0 * m * m)))
+
+            s1 = 0.0
+            s2 = 0.0
+            missing = 0
+
+            for i in range(n):
+                x = log_cc[i] - mean
+                if np.isnan(x):
+                    missing += 1
+                else:
+                    s1 += x
+                    s2 += x * x
+
+                if i >= window:
+                    x = log_cc[i - window] - mean
+                    if np.isnan(x):
+                        missing -= 1
+                    else:
+                        s1 -= x
+                        s2 -= x * x
+
+                if (i + 1) % window == 0 and missing == 0:
+                    s1 = 0.0
+                    s2 = 0.0
+                    for l in range(i - window + 1, i + 1):
+                        x = log_cc[l] - mean
+                        s1 += x
+                        s2 += x * x
+
+                if i < window - 1 or missing > 0:
+                    out[j, w, i] = np.nan
+                    continue
+
+                var = max((s2 - s1 * s1 / h) / (h - 1.0), 0.0)
+                out[j, w, i] = math.sqrt(var) * scale * adj_factor
+
+
+@_jit
+def _rolling_moment(returns, windows, moment, out):
+    """Rolling skew (moment 3) or excess kurtosis (moment 4) as pandas computes them
+
+    One pass over the returns updates the power sums of every window, so
+    the powers and the run of repeated values are computed once per bar.
+    """
+
+    symbols, n = returns.shape
+    k = len(windows)
+    s1 = np.empty(k)
+    s2 = np.empty(k)
+    s3 = np.empty(k)
+    s4 = np.empty(k)
+    missing = np.empty(k, dtype=np.int64)
+
+    for j in range(symbols):
+        log_cc = returns[j]
+        count, mean = _moments(log_cc)
+        s1[:] = 0.0
+        s2[:] = 0.0
+        s3[:] = 0.0
+        s4[:] = 0.0
+        missing[:] = 0
+        same = 0
+
+        for i in range(n):
+            x = log_cc[i] - mean
+            observed = not np.isnan(x)
+            if not observed:
+                same = 0
+            elif i > 0 and log_cc[i] == log_cc[i - 1]:
+                same += 1
+            else:
+                same = 1
+
+            for w in range(k):
+                window = windows[w]
+                dn = float(window)
+
+                if observed:
+                    s1[w] += x
+                    s2[w] += x * x
+                    s3[w] += x * x * x
+                    s4[w] += x * x * x * x
+                else:
+                    missing[w] += 1
+
+                if i >= window:
+                    y = log_cc[i - window] - mean
+                    if np.isnan(y):
+                        missing[w] -= 1
+                    else:
+                        s1[w] -= y
+                        s2[w] -= y * y
+                        s3[w] -= y * y * y
+                        s4[w] -= y * y * y * y
+
+                # rebuild the sums once a window to drop the rounding of the
+                # running updates
+                if (i + 1) % window == 0 and missing[w] == 0:
+                    s1[w] = 0.0
+                    s2[w] = 0.0
+                    s3[w] = 0.0
+                    s4[w] = 0.0
+                    for l in range(i - window + 1, i + 1):
+                        y = log_cc[l] - mean
+                        s1[w] += y
+                        s2[w] += y * y
+                        s3[w] += y * y * y
+                        s4[w] += y * y * y * y
+
+                if i < window - 1 or missing[w] > 0 or window < moment:
+                    out[j, w, i] = np.nan
+                    continue
+
+                # a window of one repeated value has no skew and a kurtosis of -3
+                if same >= window:
+                    out[j, w, i] = 0.0 if moment == 3 else -3.0
+                    continue
+
+                a = s1[w] / dn
+                b = s2[w] / dn - a * a
+                c = s3[w] / dn - a * a * a - 3.0 * a * b
+
+                if b <= 1e-14:
+                    out[j, w, i] = np.nan
+                elif moment == 3:
+                    out[j, w, i] = (math.sqrt(dn * (dn - 1.0)) * c) / ((dn - 2.0) * (b * math.sqrt(b)))
+                else:
+                    d = s4[w] / dn - a * a * a * a - 6.0 * b * a * a - 4.0 * c * a
+                    e = (dn * dn - 1.0) * d / (b * b) - 3.0 * ((dn - 1.0) ** 2)
+                    out[j, w, i] = e / ((dn - 2.0) * (dn - 3.0))
+
+
+@_jit
+def _ewma(returns, windows, trading_periods, out):
+    """pandas ewm(span=window, min_periods=window, adjust=False) of the
+    squared log returns, missing returns decaying the weight of the average"""
+
+    symbols, n = returns.shape
+    scale = math.sqrt(trading_periods)
+
+    for j in range(symbols):
+        log_cc = returns[j]
+
+        for w in range(len(windows)):
+            window = windows[w]
+            alpha = 2.0 / (window + 1.0)
+            weighted = np.nan
+            old_weight = 1.0
+            count = 0
+
+            for i in range(n):
+                x = log_cc[i] * log_cc[i]
+                observed = not np.isnan(x)
+                if observed:
+                    count += 1
+
+                if not np.isnan(weighted):
+                    old_weight *= 1.0 - alpha
+                    if observed:
+                        if weighted != x:
+                            weighted = (old_weight * weighted + alpha * x) / (old_weight + alpha)
+                        old_weight = 1.0
+                elif observed:
+                    weighted = x
+
+                if count < window or not observed:
+                    out[j, w, i] = np.nan
+                else:
+                    out[j, w, i] = math.sqrt(weighted) * scale
+
+
+@_jit
+def _garch_likelihood(r2, valid, variance, alpha, beta, out):
+
+    symbols, n = r2.shape
+
+    for j in range(symbols):
+        for c in range(alpha.shape[1]):
+            a = alpha[j, c]
+            b = beta[j, c]
+            omega = variance[j] * (1.0 - a - b)
+            s2 = variance[j]
+            likelihood = 0.0
+
+            for i in range(n):
+                if valid[j, i]:
+                    likelihood -= math.log(s2) + r2[j, i] / s2
+                    s2 = omega + a * r2[j, i] + b * s2
+                else:
+                    s2 = omega + a * s2 + b * s2
+
+            out[j, c] = likelihood
@@ -0,0 +1,346 @@
+import numpy as np
+import pandas as pd
+
+# values (rows x symbols) computed at once by the blocked rolling kernels
+BLOCK_VALUES = 2**16
+
+
+def prefix_sums(x):
+    """Prefix sums of an array along its first axis
+
+    Parameters
+    ----------
+    x : numpy.ndarray
+        Values to accumulate; NaNs are treated as missing
+
+    Returns
+    -------
+    sums : numpy.ndarray
+        Running sum of the non-missing values with a leading row of zeros
+    counts : numpy.ndarray
+        Running count of the non-missing values with a leading row of zeros
+    """
+
+    missing = np.isnan(x)
+
+    sums = np.empty((x.shape[0] + 1,) + x.shape[1:])
+    np.copyto(sums[1:], x)
+
+    return _accumulate(sums, missing), _counts(missing)
+
+
+def _accumulate(sums, missing):
+    """Prefix sums in place of the values in sums[1:], skipping the missing ones"""
+
+    sums[0] = 0.0
+    np.copyto(sums[1:], 0.0, where=missing)
+    np.cumsum(sums[1:], axis=0, out=sums[1:])
+
+    return sums
+
+
+def _counts(missing):
+    """Running count of the non-missing values with a leading row of zeros"""
+
+    # half the memory of int64 for any realistic history
+    dtype = np.int32 if missing.shape[0] < 2**31 else np.int64
+    counts = np.zeros((missing.shape[0] + 1,) + missing.shape[1:], dtype=dtype)
+    np.cumsum(~missing, axis=0, out=counts[1:])
+
+    return counts
+
+
+def window_sum(sums, counts, window, out=None):
+    """Rolling sum over a window from prefix sums
+
+    Windows containing a missing value are NaN, which matches pandas
+    rolling with the default min_periods.
+
+    Parameters
+    ----------
+    sums, counts : numpy.ndarray
+        Output of prefix_sums
+    window : int
+        Rolling window length
+    out : numpy.ndarray
+        Array with one row less than sums receiving the window sums;
+        allocated if not given
+
+    Returns
+    -------
+    y : numpy.ndarray
+        Window sums aligned on the last row of each window
+    """
+
+    n = sums.shape[0] - 1
+    if out is None:
+        out = np.empty((n,) + sums.shape[1:])
+
+    return _window_rows(sums, counts, window, 0, out)
+
+
+def _window_rows(sums, counts, window, skip, out):
+    """Window sums of the rows from skip on of the prefix sums, into out"""
+
+    n = sums.shape[0] - 1
+
+    # the first row with a whole window in the prefix sums
+    first = max(skip, window - 1)
+    out[:first - skip] = np.nan
+
+    if first < n:
+        total = np.subtract(sums[first + 1:], sums[first + 1 - window:n + 1 - window], out=out[first - skip:])
+        missing = np.subtract(counts[first + 1:], counts[first + 1 - window:n + 1 - window]) != window
+        np.copyto(total, np.nan, where=missing)
+
+    return out
+
+
+def _blocks(x, halo):
+    """Row blocks (start, stop, first) of x
+
+    The values of rows start to stop are computed from rows first to stop,
+    the halo rows before start included, so the prefix sums and other
+    temporaries are the size of one block rather than of the history, and
+    their rounding does not grow with its length.
+    """
+
+    columns = int(np.prod(x.shape[1:], dtype=np.int64))
+    rows = max(BLOCK_VALUES // max(columns, 1), 4 * halo, 1)
+
+    for start in range(0, x.shape[0], rows):
+        yield start, min(start + rows, x.shape[0]), max(start - halo, 0)
+
+
+def rolling_sum_multi(x, windows, out=None, transform=None):
+    """Rolling sums of x for several windows from shared cumulative sums
+
+    Works along the first axis, so x may be a single series or a
+    (time x symbol) panel.
+
+    Parameters
+    ----------
+    x : numpy.ndarray or tuple
+        Values to sum, or the arrays transform derives them from; NaNs are
+        treated as missing
+    windows : [int, int, ...]
+        Rolling window lengths
+    out : numpy.ndarray
+        Array of shape x.shape + (len(windows),) receiving the sums;
+        allocated if not given
+    transform : function
+        Called with one block of rows of each array of x and returning the
+        values to sum for those rows, e.g. numpy.square, so the values are
+        never held for the whole history
+
+    Returns
+    -------
+    y : numpy.ndarray
+        Array of shape x.shape + (len(windows),)
+    """
+
+    arrays = x if isinstance(x, tuple) else (x,)
+    if transform is None:
+        transform = _identity
+
+    if out is None:
+        out = np.empty(arrays[0].shape + (len(windows),))
+
+    for start, stop, first in _blocks(arrays[0], max(windows) - 1):
+        sums, counts = prefix_sums(transform(*(a[first:stop] for a in arrays)))
+        for w, window in enumerate(windows):
+            _window_rows(sums, counts, window, start - first, out[start:stop, ..., w])
+
+    return out
+
+
+def _identity(x):
+
+    return x
+
+
+def rolling_mean_multi(x, windows, transform=None):
+    """Rolling means of x for several windows from shared cumulative sums"""
+
+    result = rolling_sum_multi(x, windows, transform=transform)
+    result /= np.asarray(windows, dtype=float)
+
+    return result
+
+
+def rolling_std_multi(x, windows, ddof=1):
+    """Rolling standard deviations of x for several windows
+
+    The values are centred on their overall mean before accumulating so the
+    difference of the squared prefix sums does not lose precision.
+    """
+
+    mean = _nanmean(x)
+    n = np.asarray(windows, dtype=float)
+    out = np.empty(x.shape + (len(windows),))
+
+    for start, stop, first in _blocks(x, max(windows) - 1):
+        # one prefix sum buffer, filled with the centred values and then
+        # with their squares, and one set of counts for both
+        centred = np.subtract(x[first:stop], mean)
+        missing = np.isnan(centred)
+        counts = _counts(missing)
+        sums = np.empty((centred.shape[0] + 1,) + centred.shape[1:])
+
+        s1 = out[start:stop]
+        s2 = np.empty(s1.shape)
+
+        for power, target in ((1, s1), (2, s2)):
+            np.copyto(sums[1:], centred)
+            if power == 2:
+                np.square(sums[1:], out=sums[1:])
+            _accumulate(sums, missing)
+
+            for w, window in enumerate(windows):
+                _window_rows(sums, counts, window, start - first, target[..., w])
+
+        # (s2 - s1**2 / n) / (n - ddof), in place
+        np.square(s1, out=s1)
+        s1 /= n
+        np.subtract(s2, s1, out=s1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            s1 /= n - ddof
+
+    np.maximum(out, 0.0, out=out)
+
+    return np.sqrt(out, out=out)
+
+
+def _nanmean(x):
+    """Mean of the non-missing values along the first axis, block by block"""
+
+    total = np.zeros(x.shape[1:])
+    count = np.zeros(x.shape[1:])
+
+    for start, stop, _ in _blocks(x, 0):
+        block = x[start:stop]
+        valid = ~np.isnan(block)
+        total += np.where(valid, block, 0.0).sum(axis=0)
+        count += valid.sum(axis=0)
+
+    # columns without any values (e.g. symbols not yet listed) stay NaN
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return total / count
+
+
+def rolling_moment_multi(x, windows, moment):
+    """Rolling skew or excess kurtosis of x for several windows, as pandas
+
+    The values are centred on their overall mean and their powers up to
+    moment accumulated once per block of rows; every window is then a
+    difference of those prefix sums. Accumulating over one block rather
+    than the whole history keeps the sums close to the window sums, so the
+    differences keep their precision even for short windows.
+
+    Parameters
+    ----------
+    x : numpy.ndarray
+        Values of shape (time,) or (time, symbols); NaNs are missing
+    windows : [int, int, ...]
+        Rolling window lengths
+    moment : int
+        3 for the skew or 4 for the excess kurtosis
+
+    Returns
+    -------
+    y : numpy.ndarray
+        Array of shape x.shape + (len(windows),)
+    """
+
+    if moment not in (3, 4):
+        raise ValueError('moment must be 3 (skew) or 4 (kurtosis)')
+
+    mean = _nanmean(x)
+    out = np.empty(x.shape + (len(windows),))
+
+    for start, stop, first in _blocks(x, max(windows) - 1):
+        block = x[first:stop]
+        skip = start - first
+
+        centred = np.subtract(block, mean)
+        missing = np.isnan(centred)
+        counts = _counts(missing)
+        same = _run_lengths(block)[skip:]
+
+        # prefix sums of the first to the moment-th power, sharing one buffer
+        # of powers computed by repeated multiplication
+        sums = np.empty((moment, centred.shape[0] + 1) + centred.shape[1:])
+        power = np.copy(centred)
+        for p in range(moment):
+            if p > 0:
+                power *= centred
+            np.copyto(sums[p, 1:], power)
+            _accumulate(sums[p], missing)
+        del power
+
+        window_sums = np.empty((moment, stop - start) + x.shape[1:])
+        for w, window in enumerate(windows):
+            for p in range(moment):
+                _window_rows(sums[p], counts, window, skip, window_sums[p])
+
+            _moment(window_sums, window, moment, same, out[start:stop, ..., w])
+
+    return out
+
+
+def _moment(sums, window, moment, same, out):
+    """Skew or kurtosis from the window sums of the centred powers, into out
+
+    The sums are overwritten with the raw and then the central moments.
+    """
+
+    n = float(window)
+    missing = np.isnan(sums[0])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sums /= n
+        a = sums[0]
+        a2 = a * a
+        # variance, then third central moment
+        b = np.subtract(sums[1], a2, out=sums[1])
+        flat = b <= 1e-14
+        c = sums[2]
+        c -= (a2 + 3.0 * b) * a
+
+        if moment == 3:
+            np.divide(c, b * np.sqrt(b), out=out)
+            out *= np.sqrt(n * (n - 1.0)) / (n - 2.0)
+        else:
+            d = sums[3]
+            d -= ((a2 + 6.0 * b) * a + 4.0 * c) * a
+            np.divide(d, b * b, out=out)
+            out *= (n * n - 1.0) / ((n - 2.0) * (n - 3.0))
+            out -= 3.0 * (n - 1.0) ** 2 / ((n - 2.0) * (n - 3.0))
+
+    # pandas: NaN without (numerically) any variance, but a window of one
+    # repeated value has no skew and a kurtosis of -3
+    np.copyto(out, np.nan, where=flat)
+    np.copyto(out, 0.0 if moment == 3 else -3.0, where=same >= window)
+    # NaN where the window is incomplete or too short for the moment
+    np.copyto(out, np.nan, where=missing)
+    if window < moment:
+        out[...] = np.nan
+
+    return out
+
+
+def _run_lengths(x):
+    """Number of equal values in a row ending on each row of x, 0 if missing"""
+
+    rows = np.arange(x.shape[0]).reshape((-1,) + (1,) * (x.ndim - 1))
+
+    # the first row of every run of equal values, carried forward
+    starts = np.ones(x.shape, dtype=bool)
+    np.not_equal(x[1:], x[:-1], out=starts[1:])
+    first = np.where(starts, rows, 0)
+    np.maximum.accumulate(first, axis=0, out=first)
+
+    lengths = rows - first + 1
+    lengths[np.isnan(x)] = 0
+
+    return lengths
@@ -0,0 +1,292 @@
+import math
+
+import numpy as np
+
+
+class StreamingEstimator(object):
+    """Base class for the incremental counterparts of the models
+
+    Keeps the per-bar terms of the last window bars in a ring buffer
+    together with their running sums, so each new bar costs O(1) no matter
+    how long the history is. The running sums are rebuilt from the buffer
+    once per window to stop rounding errors from accumulating.
+
+    Parameters
+    ----------
+    window : int
+        Rolling window for which to calculate the estimator
+    """
+
+    n_terms = 1
+
+    def __init__(self, window=30):
+
+        if window < 2:
+            raise ValueError('window must be at least 2')
+
+        self.window = window
+        self.value = np.nan
+
+        self._buffer = np.zeros((window, self.n_terms))
+        self._valid = np.zeros(window, dtype=bool)
+        self._sums = np.zeros(self.n_terms)
+        self._missing = window
+        self._position = 0
+        self._previous_close = np.nan
+        self._observations = 0
+
+    def update(self, open, high, low, close):
+        """Adds a bar and returns the estimate for the window ending on it
+
+        Parameters
+        ----------
+        open, high, low, close : float
+            Prices of the new bar
+
+        Returns
+        -------
+        y : float
+            Current estimate, NaN until a full window of bars is available
+        """
+
+        terms = self._terms(open, high, low, close, self._previous_close)
+        self._previous_close = close
+
+        i = self._position
+        if self._valid[i]:
+            self._sums -= self._buffer[i]
+        else:
+            self._missing -= 1
+
+        if np.isfinite(terms).all():
+            self._buffer[i] = terms
+            self._valid[i] = True
+            self._sums += self._buffer[i]
+            self._observations += 1
+        else:
+            self._valid[i] = False
+            self._missing += 1
+
+        self._position = (i + 1) % self.window
+        if self._position == 0:
+            self._sums = self._buffer[self._valid].sum(axis=0)
+
+        if self._missing == 0:
+            self.value = self._value(self._sums)
+        else:
+            self.value = np.nan
+
+        return self.value
+
+    def _terms(self, open, high, low, close, previous_close):
+        raise NotImplementedError
+
+    def _value(self, sums):
+        raise NotImplementedError
+
+
+class Raw(StreamingEstimator):
+
+    n_terms = 2
+
+    def __init__(self, window=30, trading_periods=252):
+
+        super(Raw, self).__init__(window)
+        self.trading_periods = trading_periods
+        self._shift = None
+
+    def _terms(self, open, high, low, close, previous_close):
+
+        log_return = _log_ratio(close, previous_close)
+
+        # accumulate around the first return so the variance keeps its precision
+        if self._shift is None and np.isfinite(log_return):
+            self._shift = log_return
+        if self._shift is not None:
+            log_return -= self._shift
+
+        return log_return, log_return**2
+
+    def _value(self, sums):
+
+        n = self.window
+        var = (sums[1] - sums[0]**2 / n) / (n - 1)
+
+        return math.sqrt(max(var, 0.0)) * math.sqrt(self.trading_periods)
+
+
+class HodgesTompkins(Raw):
+
+    def _value(self, sums):
+
+        h = self.window
+        n = (self._observations - h) + 1
+
+        adj_factor = 1.0 / (1.0 - (h / n) + ((h**2 - 1) / (3 * n**2)))
+
+        return super(HodgesTompkins, self)._value(sums) * adj_factor
+
+
+class Parkinson(StreamingEstimator):
+
+    def __init__(self, window=30, trading_periods=252):
+
+        super(Parkinson, self).__init__(window)
+        self.trading_periods = trading_periods
+
+    def _terms(self, open, high, low, close, previous_close):
+
+        return ((1.0 / (4.0 * math.log(2.0))) * _log_ratio(high, low)**2.0,)
+
+    def _value(self, sums):
+
+        return math.sqrt(self.trading_periods * max(sums[0], 0.0) / self.window)
+
+
+class GarmanKlass(Parkinson):
+
+    def _terms(self, open, high, low, close, previous_close):
+
+        log_hl = _log_ratio(high, low)
+        log_co = _log_ratio(close, open)
+
+        return (0.5 * log_hl**2 - (2*math.log(2)-1) * log_co**2,)
+
+
+class RogersSatchell(Parkinson):
+
+    def _terms(self, open, high, low, close, previous_close):
+
+        return (_rogers_satchell(open, high, low, close),)
+
+
+class YangZhang(StreamingEstimator):
+
+    n_terms = 3
+
+    def __init__(self, window=30, trading_periods=252):
+
+        super(YangZhang, self).__init__(window)
+        self.trading_periods = trading_periods
+
+    def _terms(self, open, high, low, close, previous_close):
+
+        log_cc = _log_ratio(close, previous_close)
+        log_oc = _log_ratio(open, previous_close)
+
+        return log_cc**2, log_oc**2, _rogers_satchell(open, high, low, close)
+
+    def _value(self, sums):
+
+        window = self.window
+        close_vol, open_vol, window_rs = sums * (1.0 / (window - 1.0))
+
+        k = 0.34 / (1.34 + (window + 1) / (window - 1))
+        var = open_vol + k * close_vol + (1 - k) * window_rs
+
+        return math.sqrt(var) * math.sqrt(self.trading_periods) if var >= 0 else np.nan
+
+
+class _Moments(StreamingEstimator):
+    """Running sums of the first four powers of the shifted log returns"""
+
+    n_terms = 4
+
+    def __init__(self, window=30):
+
+        super(_Moments, self).__init__(window)
+        self._shift = None
+        self._same = 0
+        self._last_return = np.nan
+
+    def _terms(self, open, high, low, close, previous_close):
+
+        log_return = _log_ratio(close, previous_close)
+
+        # run length of the latest repeated return, see _repeated
+        if np.isfinite(log_return):
+            self._same = self._same + 1 if log_return == self._last_return else 1
+        else:
+            self._same = 0
+        self._last_return = log_return
+
+        if self._shift is None and np.isfinite(log_return):
+            self._shift = log_return
+        if self._shift is not None:
+            log_return -= self._shift
+
+        return log_return, log_return**2, log_return**3, log_return**4
+
+    def _central_moments(self, sums):
+
+        x, xx, xxx, xxxx = sums / self.window
+
+        a = x
+        b = xx - a * a
+        c = xxx - a * a * a - 3 * a * b
+        d = xxxx - a * a * a * a - 6 * b * a * a - 4 * c * a
+
+        return b, c, d
+
+    def _repeated(self):
+        """True if the window holds one value repeated, as the batch models
+        check before the variance cut-off"""
+
+        return self._same >= self.window
+
+
+class Skew(_Moments):
+
+    def _value(self, sums):
+
+        n = float(self.window)
+        b, c, _ = self._central_moments(sums)
+
+        if n < 3:
+            return np.nan
+        if self._repeated():
+            return 0.0
+
+        # same cut-off as pandas for windows with (numerically) no variance
+        if b <= 1e-14:
+            return np.nan
+
+        return (math.sqrt(n * (n - 1.0)) * c) / ((n - 2.0) * b**1.5)
+
+
+class Kurtosis(_Moments):
+
+    def _value(self, sums):
+
+        n = float(self.window)
+        b, _, d = self._central_moments(sums)
+
+        if n < 4:
+            return np.nan
+        if self._repeated():
+            return -3.0
+
+        if b <= 1e-14:
+            return np.nan
+
+        k = (n * n - 1.0) * d / (b * b) - 3.0 * ((n - 1.0)**2)
+
+        return k / ((n - 2.0) * (n - 3.0))
+
+
+def _rogers_satchell(open, high, low, close):
+
+    log_ho = _log_ratio(high, open)
+    log_lo = _log_ratio(low, open)
+    log_co = _log_ratio(close, open)
+
+    return log_ho * (log_ho - log_co) + log_lo * (log_lo - log_co)
+
+
+def _log_ratio(numerator, denominator):
+    """log(numerator / denominator), NaN unless both prices are positive"""
+
+    if numerator > 0 and denominator > 0:
+        return math.log(numerator / denominator)
+
+    return np.nan
@@ -0,0 +1,41 @@
+from volatility import models
+from volatility.models.features import Features
+from volatility.volest import ESTIMATORS
+
+
+def get_estimator(estimator, open, high, low, close, window=30):
+    """Estimator values for a universe of symbols in one vectorized pass
+
+    Dates on which a symbol has no bar (not yet listed, delisted or halted)
+    are NaN in the price arrays. Any rolling window touching a NaN bar is NaN
+    in the result, so a symbol listed part way through the panel gets the
+    same values as the single symbol estimator run on its own history.
+
+    Parameters
+    ----------
+    estimator : string
+        Estimator name, one of ESTIMATORS
+    open, high, low, close : numpy.ndarray
+        Prices of shape (time, symbols)
+    window : int
+        Rolling window for which to calculate the estimator
+
+    Returns
+    -------
+    y : numpy.ndarray
+        Estimator values of shape (time, symbols)
+    """
+
+    if estimator not in ESTIMATORS:
+        raise ValueError('Acceptable volatility model is required')
+
+    features = Features(open, high, low, close)
+    if features.close.ndim != 2:
+        raise ValueError('Prices must be arrays of shape (time, symbols)')
+    if not features.open.shape == features.high.shape == features.low.shape == features.close.shape:
+        raise ValueError('Open, High, Low and Close must be the same shape')
+
+    return getattr(models, estimator).get_estimator_panel(
+        price_data=features,
+        window=window
+    )
@@ -0,0 +1,248 @@
+"""Timing and memory instrumentation of the estimators and term sheets
+
+Functions decorated with instrument, and blocks wrapped in stage, report
+their wall time (and, if asked for, their peak allocation) to the hooks
+registered with add_hook. With no hooks registered a decorated call costs a
+single list check, so the instrumentation stays in place in production.
+
+Profiler is a hook that aggregates the stages into a text or JSON report:
+
+    with profiling.Profiler(memory=True) as profiler:
+        vol.term_sheet()
+    print(profiler.report())
+
+Stages are inclusive of the stages they call, and only stages run in this
+process are seen: pages rendered by term_sheet(processes=n) workers are not.
+"""
+import functools
+import json
+import threading
+import time
+import tracemalloc
+
+FORMATS = ['text', 'json']
+
+# (callback, memory) pairs, see add_hook
+_hooks = []
+_started_tracing = False
+_local = threading.local()
+
+
+def add_hook(callback, memory=False):
+    """Registers callback(name, seconds, peak) to be called after every stage
+
+    Parameters
+    ----------
+    callback : callable
+        Called with the stage name, its wall time in seconds and its peak
+        allocation in bytes above the allocation on entry, None unless a
+        hook asked for memory
+    memory : boolean
+        Set to True to trace allocations with tracemalloc, which slows
+        everything down while any such hook is registered
+    """
+
+    global _started_tracing
+
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracing = True
+
+    _hooks.append((callback, memory))
+
+
+def remove_hook(callback):
+    """Unregisters a callback registered with add_hook"""
+
+    global _started_tracing
+
+    for i, (hook, _) in enumerate(_hooks):
+        if hook is callback:
+            del _hooks[i]
+            break
+    else:
+        raise ValueError('callback is not registered')
+
+    if _started_tracing and not any(memory for _, memory in _hooks):
+        tracemalloc.stop()
+        _started_tracing = False
+
+
+def instrument(func):
+    """Decorator reporting every call of func as a stage named after it"""
+
+    name = func.__qualname__
+    if '.' not in name:
+        # module level functions are named after their module, e.g.
+        # YangZhang.get_estimator
+        name = func.__module__.rsplit('.', 1)[-1] + '.' + name
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _hooks:
+            return func(*args, **kwargs)
+
+        with _Stage(name):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def stage(name):
+    """Context manager reporting the block it wraps as a stage"""
+
+    if not _hooks:
+        return _NULL_STAGE
+
+    return _Stage(name)
+
+
+class _NullStage(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage(object):
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+
+        self.tracing = tracemalloc.is_tracing()
+        if self.tracing:
+            stack = _stack()
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                # the enclosing stage keeps the highest peak seen so far
+                stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+            self.frame = {'start': current, 'peak': current}
+            stack.append(self.frame)
+
+        self.start = time.perf_counter()
+
+        return self
+
+    def __exit__(self, *exc_info):
+
+        seconds = time.perf_counter() - self.start
+
+        peak = None
+        if self.tracing:
+            stack = _stack()
+            stack.pop()
+            if tracemalloc.is_tracing():
+                top = max(self.frame['peak'], tracemalloc.get_traced_memory()[1])
+                if stack:
+                    stack[-1]['peak'] = max(stack[-1]['peak'], top)
+                peak = top - self.frame['start']
+
+        for callback, _ in list(_hooks):
+            callback(self.name, seconds, peak)
+
+        return False
+
+
+def _stack():
+    """Memory frames of the stages open in this thread"""
+
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+
+    return _local.stack
+
+
+class Profiler(object):
+    """Hook aggregating the calls, time and peak allocation of every stage
+
+    Parameters
+    ----------
+    memory : boolean
+        Set to True to record peak allocations, see add_hook
+    """
+
+    def __init__(self, memory=False):
+
+        self.memory = memory
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, name, seconds, peak):
+
+        with self._lock:
+            self._add(name, 1, seconds, seconds, peak)
+
+    def __enter__(self):
+
+        add_hook(self, memory=self.memory)
+
+        return self
+
+    def __exit__(self, *exc_info):
+
+        remove_hook(self)
+
+        return False
+
+    def _add(self, name, calls, seconds, max_seconds, peak):
+
+        stats = self.stats.setdefault(name, {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'peak': None})
+        stats['calls'] += calls
+        stats['seconds'] += seconds
+        stats['max_seconds'] = max(stats['max_seconds'], max_seconds)
+        if peak is not None:
+            stats['peak'] = peak if stats['peak'] is None else max(stats['peak'], peak)
+
+    def merge(self, stats):
+        """Adds the stats of another Profiler, e.g. one run in a worker"""
+
+        with self._lock:
+            for name, other in stats.items():
+                self._add(name, other['calls'], other['seconds'], other['max_seconds'], other['peak'])
+
+    def report(self, format='text'):
+        """Stages sorted by total time
+
+        Parameters
+        ----------
+        format : string
+            'text' for a table or 'json' for an object keyed by stage name
+
+        Returns
+        -------
+        report : string
+        """
+
+        if format not in FORMATS:
+            raise ValueError('format must be one of ' + ', '.join(FORMATS))
+
+        names = sorted(self.stats, key=lambda name: -self.stats[name]['seconds'])
+
+        if format == 'json':
+            return json.dumps(dict((name, self.stats[name]) for name in names), indent=2)
+
+        width = max([len('stage')] + [len(name) for name in names])
+        lines = ['%-*s %8s %11s %11s %11s %11s' % (
+            width, 'stage', 'calls', 'total s', 'mean ms', 'max ms', 'peak MB')]
+
+        for name in names:
+            stats = self.stats[name]
+            lines.append('%-*s %8d %11.4f %11.3f %11.3f %11s' % (
+                width,
+                name,
+                stats['calls'],
+                stats['seconds'],
+                1e3 * stats['seconds'] / stats['calls'],
+                1e3 * stats['max_seconds'],
+                '-' if stats['peak'] is None else '%.2f' % (stats['peak'] / 2.0**20)
+            ))
+
+        return '\n'.join(lines)
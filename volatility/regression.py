@@ -0,0 +1,96 @@
+import collections
+import warnings
+
+import numpy
+
+from volatility.models.kernels import prefix_sums, window_sum
+
+RollingOLS = collections.namedtuple('RollingOLS', ['alpha', 'beta', 'rsquared', 'nobs'])
+
+
+def rolling_ols(y, x, window=None, min_periods=2):
+    """Rolling or expanding OLS of y on x with an intercept
+
+    Built on running sums of x, y, x*x, x*y and y*y, so the coefficients of
+    every date and every symbol come out of a handful of cumulative sums
+    instead of one fit per window.
+
+    Parameters
+    ----------
+    y : numpy.ndarray
+        Dependent values of shape (time,) or (time, symbols), e.g. the
+        output of volatility.panel.get_estimator
+    x : numpy.ndarray
+        Regressor of shape (time,), e.g. the benchmark estimator, or of the
+        same shape as y
+    window : int
+        Rolling window length; the regression is expanding if None
+    min_periods : int
+        Minimum number of observations of an expanding regression
+
+    Returns
+    -------
+    result : RollingOLS
+        alpha, beta, rsquared and nobs arrays of the shape of y, NaN (0 for
+        nobs) where a rolling window contains a missing value or there are
+        too few observations
+    """
+
+    y = numpy.asarray(y, dtype=float)
+    x = numpy.asarray(x, dtype=float)
+
+    if x.shape[0] != y.shape[0]:
+        raise ValueError('x and y must have the same number of rows')
+    if x.ndim == 1 and y.ndim == 2:
+        x = x[:, None]
+    x = numpy.broadcast_to(x, y.shape)
+
+    if window is not None and window < 2:
+        raise ValueError('window must be at least 2')
+
+    # a pair is used only if both values exist
+    valid = ~numpy.isnan(x) & ~numpy.isnan(y)
+    x = numpy.where(valid, x, numpy.nan)
+    y = numpy.where(valid, y, numpy.nan)
+
+    with warnings.catch_warnings():
+        # columns without any values stay NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        x_shift = numpy.nanmean(x, axis=0)
+        y_shift = numpy.nanmean(y, axis=0)
+
+    # centred so the cross-moment differences keep their precision
+    dx = x - x_shift
+    dy = y - y_shift
+
+    terms = [dx, dy, dx * dx, dx * dy, dy * dy]
+
+    if window is None:
+        n = numpy.cumsum(valid, axis=0)
+        sums = [numpy.where(n >= min_periods, prefix_sums(term)[0][1:], numpy.nan) for term in terms]
+    else:
+        # window_sum leaves any window with a missing pair NaN
+        n = window
+        sums = [window_sum(*prefix_sums(term), window=window) for term in terms]
+
+    sx, sy, sxx, sxy, syy = sums
+
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        mean_x = sx / n
+        mean_y = sy / n
+
+        var_x = sxx - sx * mean_x
+        var_y = syy - sy * mean_y
+        cov_xy = sxy - sx * mean_y
+
+        beta = numpy.where(var_x > 0, cov_xy / var_x, numpy.nan)
+        alpha = (mean_y + y_shift) - beta * (mean_x + x_shift)
+        rsquared = numpy.where(
+            (var_x > 0) & (var_y > 0),
+            cov_xy * cov_xy / (var_x * var_y),
+            numpy.nan
+        )
+
+    nobs = numpy.where(numpy.isnan(beta), 0, n).astype(numpy.int64)
+
+    return RollingOLS(alpha, beta, rsquared, nobs)
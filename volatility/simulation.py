@@ -0,0 +1,253 @@
+"""Monte Carlo bias and efficiency of the volatility estimators
+
+Run with
+
+    python -m volatility.simulation --paths 100000 --open-fraction 0.2
+
+OHLC paths are simulated in batch as geometric Brownian motion with drift,
+an opening jump and a finite number of price steps per bar, and every
+estimator is run on all paths at once through the panel estimators.
+"""
+import argparse
+import math
+
+import numpy
+import pandas
+
+from volatility import models
+from volatility.chunked import RECURSIVE_ESTIMATORS
+from volatility.models.features import Features
+from volatility.volest import ESTIMATORS
+
+# Skew and Kurtosis do not estimate volatility, and the recursive models need
+# a history long before the window: GARCH fitted on each short path would
+# target the variance of the very bars it is read on
+VOLATILITY_ESTIMATORS = [
+    estimator for estimator in ESTIMATORS
+    if estimator not in ('Skew', 'Kurtosis') and estimator not in RECURSIVE_ESTIMATORS
+]
+CHUNK_SIZE = 10000
+
+
+def simulate_ohlc(
+        paths,
+        bars,
+        sigma=0.2,
+        mu=0.0,
+        open_fraction=0.0,
+        steps=78,
+        trading_periods=252,
+        price=100.0,
+        rng=None):
+    """OHLC bars of many geometric Brownian motion paths
+
+    Each bar opens with a jump from the previous close carrying
+    open_fraction of the bar's variance, then moves in steps discrete
+    increments carrying the rest; high and low are taken over the open and
+    the steps only, so they understate the true range as sampled prices do.
+
+    Parameters
+    ----------
+    paths : int
+        Number of paths
+    bars : int
+        Number of bars per path
+    sigma : float
+        Annualized volatility, including the opening jumps
+    mu : float
+        Annualized drift
+    open_fraction : float
+        Share of the variance in the opening jump, between 0 and 1
+    steps : int
+        Price steps within each bar
+    trading_periods : int
+        Bars per year
+    price : float
+        Close before the first bar
+    rng : numpy.random.Generator
+        Random generator, a fresh unseeded one if None
+
+    Returns
+    -------
+    open, high, low, close, previous_close : numpy.ndarray
+        Prices of shape (bars, paths)
+    """
+
+    if not 0 <= open_fraction <= 1:
+        raise ValueError('open_fraction must be between 0 and 1')
+    if steps < 1:
+        raise ValueError('steps must be positive')
+
+    if rng is None:
+        rng = numpy.random.default_rng()
+
+    variance = sigma**2 / trading_periods
+    drift = mu / trading_periods - 0.5 * variance
+
+    open_mean = drift * open_fraction
+    open_std = math.sqrt(variance * open_fraction)
+    step_mean = drift * (1.0 - open_fraction) / steps
+    step_std = math.sqrt(variance * (1.0 - open_fraction) / steps)
+
+    log_open = numpy.empty((bars, paths))
+    log_high = numpy.empty((bars, paths))
+    log_low = numpy.empty((bars, paths))
+    log_close = numpy.empty((bars + 1, paths))
+    log_close[0] = math.log(price)
+
+    for t in range(bars):
+        log_open[t] = log_close[t] + rng.normal(open_mean, open_std, paths)
+
+        path = rng.normal(step_mean, step_std, (steps, paths))
+        path[0] += log_open[t]
+        numpy.cumsum(path, axis=0, out=path)
+
+        log_high[t] = numpy.maximum(log_open[t], path.max(axis=0))
+        log_low[t] = numpy.minimum(log_open[t], path.min(axis=0))
+        log_close[t + 1] = path[-1]
+
+    return (
+        numpy.exp(log_open),
+        numpy.exp(log_high),
+        numpy.exp(log_low),
+        numpy.exp(log_close[1:]),
+        numpy.exp(log_close[:-1])
+    )
+
+
+def efficiency(
+        paths=100000,
+        windows=[5, 10, 20, 30, 60],
+        estimators=VOLATILITY_ESTIMATORS,
+        sigma=0.2,
+        mu=0.0,
+        open_fraction=0.0,
+        steps=78,
+        trading_periods=252,
+        history=252,
+        seed=None,
+        chunk_size=CHUNK_SIZE):
+    """Bias, variance and relative efficiency of the estimators per window
+
+    Each path is as long as the longest window and every estimator is read
+    on its last bar, so the paths give independent estimates.
+
+    Parameters
+    ----------
+    paths : int
+        Number of simulated paths
+    windows : [int, int, ...]
+        Rolling windows for which to calculate the estimators
+    estimators : [string, string, ...]
+        Estimator names, one of VOLATILITY_ESTIMATORS each
+    sigma, mu, open_fraction, steps, trading_periods
+        See simulate_ohlc
+    history : int
+        Number of returns HodgesTompkins adjusts its overlapping windows
+        for; the simulated paths are only as long as the longest window
+    seed : int
+        Seed of the simulation; results are reproducible for a given seed
+    chunk_size : int
+        Paths simulated and estimated at once
+
+    Returns
+    -------
+    y : pandas.DataFrame
+        Rows by estimator and window with the mean estimate, its bias and
+        bias relative to sigma, its standard deviation, root mean squared
+        error and efficiency: the variance of the Raw variance estimate
+        divided by that of the estimator's variance estimate
+    """
+
+    for estimator in estimators:
+        if estimator not in VOLATILITY_ESTIMATORS:
+            raise ValueError('Acceptable volatility model is required')
+
+    bars = max(windows) + 1
+    sizes = [min(chunk_size, paths - start) for start in range(0, paths, chunk_size)]
+    seeds = numpy.random.SeedSequence(seed).spawn(len(sizes))
+
+    names = sorted(set(estimators) | {'Raw'})
+    estimates = dict((estimator, []) for estimator in names)
+
+    for size, child in zip(sizes, seeds):
+        open, high, low, close, previous_close = simulate_ohlc(
+            size,
+            bars,
+            sigma=sigma,
+            mu=mu,
+            open_fraction=open_fraction,
+            steps=steps,
+            trading_periods=trading_periods,
+            rng=numpy.random.default_rng(child)
+        )
+        features = Features(open, high, low, close, previous_close=previous_close)
+
+        for estimator in names:
+            kwargs = {'windows': windows, 'trading_periods': trading_periods}
+            if estimator == 'HodgesTompkins':
+                kwargs['observations'] = history
+
+            # (paths, windows) values on the last bar
+            estimates[estimator].append(
+                getattr(models, estimator).get_estimator_panel_multi(price_data=features, **kwargs)[-1]
+            )
+
+    estimates = dict((estimator, numpy.concatenate(values)) for estimator, values in estimates.items())
+    raw_variance = numpy.nanvar(estimates['Raw']**2, axis=0)
+
+    rows = []
+    for estimator in estimators:
+        values = estimates[estimator]
+        mean = numpy.nanmean(values, axis=0)
+
+        for w, window in enumerate(windows):
+            rows.append({
+                'estimator': estimator,
+                'window': window,
+                'mean': mean[w],
+                'bias': mean[w] - sigma,
+                'relative_bias': (mean[w] - sigma) / sigma,
+                'std': numpy.nanstd(values[:, w]),
+                'rmse': math.sqrt(numpy.nanmean((values[:, w] - sigma)**2)),
+                'efficiency': raw_variance[w] / numpy.nanvar(values[:, w]**2),
+            })
+
+    return pandas.DataFrame(rows).set_index(['estimator', 'window'])
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--paths', type=int, default=100000)
+    parser.add_argument('--windows', type=int, nargs='+', default=[5, 10, 20, 30, 60])
+    parser.add_argument('--estimators', nargs='+', default=VOLATILITY_ESTIMATORS, choices=VOLATILITY_ESTIMATORS)
+    parser.add_argument('--sigma', type=float, default=0.2)
+    parser.add_argument('--mu', type=float, default=0.0)
+    parser.add_argument('--open-fraction', type=float, default=0.0,
+                        help='share of the variance in the opening jump')
+    parser.add_argument('--steps', type=int, default=78,
+                        help='price steps within each bar')
+    parser.add_argument('--history', type=int, default=252,
+                        help='history length of the HodgesTompkins adjustment')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    report = efficiency(
+        paths=args.paths,
+        windows=args.windows,
+        estimators=args.estimators,
+        sigma=args.sigma,
+        mu=args.mu,
+        open_fraction=args.open_fraction,
+        steps=args.steps,
+        history=args.history,
+        seed=args.seed
+    )
+
+    with pandas.option_context('display.max_rows', None, 'display.max_columns', None, 'display.width', 120):
+        print(report.round(4))
+
+
+if __name__ == '__main__':
+    main()
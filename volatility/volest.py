@@ -1,17 +1,19 @@
+import collections
+import concurrent.futures
 import datetime
+import io
 import os
 
 import pandas
 import numpy
-from scipy.stats import norm
-import statsmodels.api as sm
-import matplotlib
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_pdf import PdfPages
 
 from volatility import models
+from volatility import profiling
+from volatility.models.features import get_features, to_series
 
 ESTIMATORS = [
+    'EWMA',
+    'GARCH',
     'GarmanKlass',
     'HodgesTompkins',
     'Kurtosis',
@@ -27,18 +29,165 @@ PRICE_COLUMNS = {
     'Low',
     'Close'
 }
+MISSING = ['drop', 'ffill', 'nan']
+
+CacheInfo = collections.namedtuple(
+    'CacheInfo',
+    ['hits', 'misses', 'maxsize', 'currsize']
+)
+# the instance attribute holding each cached dataset
+DATASETS = {
+    '_price_data': 'price',
+    '_bench_data': 'bench',
+    '_aligned_price_data': 'aligned'
+}
+
+
+def _pyplot():
+    """Imports pyplot on first use and applies the term sheet style
+
+    matplotlib, scipy and statsmodels are only imported by the methods that
+    plot or fit a regression, so the estimators and statistics can be used
+    without paying for those imports.
+    """
+
+    import matplotlib
+    import matplotlib.pyplot as plt
+
+    matplotlib.rc('image', origin='upper')
+
+    matplotlib.rcParams['font.size'] = '11'
+
+    matplotlib.rcParams['grid.color'] = 'lightgrey'
+    matplotlib.rcParams['grid.linestyle'] = '-'
+
+    matplotlib.rcParams['figure.subplot.left'] = 0.1
+    matplotlib.rcParams['figure.subplot.bottom'] = 0.13
+    matplotlib.rcParams['figure.subplot.right'] = 0.9
+    matplotlib.rcParams['figure.subplot.top'] = 0.9
+
+    return plt
+
+
+def term_sheet_filename(symbol, date=None):
+    """File name of the term sheet of symbol created on date (default today)"""
+
+    if date is None:
+        date = datetime.datetime.today()
+
+    return symbol.upper() + '_termsheet_' + date.strftime("%Y%m%d") + '.pdf'
+
+
+def _render_term_sheet_page(vol, method, kwargs):
+    """Renders one term sheet page to PDF bytes in a worker process"""
+
+    import matplotlib
+    matplotlib.use('Agg')
+
+    plt = _pyplot()
+
+    fig = vol._term_sheet_figure(method, kwargs)
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='pdf')
+    finally:
+        plt.close(fig)
+
+    return buffer.getvalue()
+
+
+def _ols_through_origin(y, x):
+    """Slope, its standard error and the uncentered R-squared of y on x
+    without a constant, as benchmark_regression fits them with statsmodels"""
+
+    sxx = numpy.dot(x, x)
+    beta = numpy.dot(x, y) / sxx
+    ssr = numpy.sum((y - beta * x)**2)
+
+    bse = numpy.sqrt(ssr / (len(y) - 1) / sxx)
+    rsquared = 1.0 - ssr / numpy.dot(y, y)
+
+    return beta, bse, rsquared
+
+
+def _align_benchmark(price_data, bench_data, missing):
+    """Joins the benchmark onto the symbol's dates
+
+    Both indexes are merged with binary searches over the sorted dates, so
+    the join costs O(n log n) and copies each side at most once. Benchmark
+    dates the symbol does not trade are dropped.
+
+    Parameters
+    ----------
+    price_data, bench_data : pandas.DataFrame
+        Symbol and benchmark prices indexed by date
+    missing : string
+        What to do on symbol dates without a benchmark bar: 'drop' the date
+        from both sides, 'ffill' the last benchmark bar or leave it 'nan'
+
+    Returns
+    -------
+    price_data, bench_data : pandas.DataFrame
+        Symbol and benchmark prices on the same dates; a side that needs no
+        change is returned as is
+    """
+
+    if missing not in MISSING:
+        raise ValueError('missing must be one of ' + ', '.join(MISSING))
+    if len(bench_data) == 0:
+        raise ValueError('bench_data has no prices')
+    if price_data.index.dtype != bench_data.index.dtype:
+        raise ValueError('price_data and bench_data must be indexed alike')
+    for data in (price_data, bench_data):
+        if not data.index.is_monotonic_increasing or not data.index.is_unique:
+            raise ValueError('price_data and bench_data must have sorted unique dates')
+
+    if price_data.index.equals(bench_data.index):
+        return price_data, bench_data
+
+    dates = price_data.index.values
+    bench_dates = bench_data.index.values
+
+    if missing == 'ffill':
+        # last benchmark bar on or before each date
+        rows = numpy.searchsorted(bench_dates, dates, side='right') - 1
+        found = rows >= 0
+    else:
+        rows = numpy.searchsorted(bench_dates, dates)
+        rows = numpy.minimum(rows, len(bench_dates) - 1)
+        found = bench_dates[rows] == dates
+
+    if missing == 'drop' and not found.any():
+        raise ValueError('price_data and bench_data have no dates in common')
+    if missing == 'drop' and not found.all():
+        symbol = price_data.symbol
+        price_data = price_data.iloc[numpy.flatnonzero(found)]
+        price_data.symbol = symbol
+        rows = rows[found]
+        found = found[found]
+
+    values = bench_data[['Open', 'High', 'Low', 'Close']].to_numpy(dtype=float)[rows]
+    values[~found] = numpy.nan
+
+    aligned = pandas.DataFrame(values, index=price_data.index, columns=['Open', 'High', 'Low', 'Close'])
+    aligned.symbol = bench_data.symbol
+
+    return price_data, aligned
 
 
 def array_to_dataframe(ndarray):
+    # a view of the (r, 4) array, not a copy
     return pandas.DataFrame(
         ndarray,
-        columns=['Open', 'High', 'Low', 'Close']
+        columns=['Open', 'High', 'Low', 'Close'],
+        copy=False
     )
 
 
 class VolatilityEstimator(object):
 
-    def __init__(self, price_data, estimator, bench_data=None):
+    @profiling.instrument
+    def __init__(self, price_data, estimator, bench_data=None, cache_size=32, missing='drop'):
         """Constructor for volatility estimators
         
         Parameters
@@ -47,23 +196,35 @@ class VolatilityEstimator(object):
             If pandas.DataFrame, must include columns Open, High, Low, Close. Also
             must include property symbol with the symbol we're working with. If
             numpy.ndarray, must be of shape (r, 4) with columns in order of open,
-            high, low, close prices. If numpy.ndarray, will be coerced to pandas.DataFrame
-            with no date data
+            high, low, close prices, float64 or float32. If numpy.ndarray, will be
+            wrapped without a copy in a pandas.DataFrame with no date data
         estimator : string
             Estimator estimator; valid arguments are:
-                "GarmanKlass", "HodgesTompkins", "Kurtosis", "Parkinson", "Raw",
-                "RogersSatchell", "Skew", "YangZhang"
+                "EWMA", "GARCH", "GarmanKlass", "HodgesTompkins", "Kurtosis",
+                "Parkinson", "Raw", "RogersSatchell", "Skew", "YangZhang"
+        bench_data : pandas.DataFrame or numpy.ndarray
+            Benchmark prices, same requirements as price_data. Need not cover
+            the same dates: it is joined onto the dates of price_data, and
+            benchmark comparisons are made on the joined prices
+        cache_size : int
+            Maximum number of estimator series kept in the per-instance LRU
+            cache; 0 disables caching
+        missing : string
+            Handling of symbol dates without a benchmark bar: 'drop' them from
+            the benchmark comparisons, 'ffill' the last benchmark bar, or
+            'nan' to leave the benchmark missing on those dates
         """
 
         if not isinstance(price_data, numpy.ndarray) and not \
                 isinstance(price_data, pandas.DataFrame):
             raise ValueError('price_data must be of type numpy.ndarray or pandas.DataFrame')
-        if isinstance(price_data, numpy.ndarray) and price_data.shape[0] != 4:
+        if isinstance(price_data, numpy.ndarray) and (price_data.ndim != 2 or price_data.shape[1] != 4):
             raise ValueError('price_data of type numpy.ndarray shape of (r, 4)')
         if isinstance(price_data, pandas.DataFrame) and not \
                 PRICE_COLUMNS.issubset(price_data.columns):
             raise ValueError('price_data requires Open, High, Low, Close')
-        if price_data.symbol is None or price_data.symbol == '':
+        if isinstance(price_data, pandas.DataFrame) and \
+                getattr(price_data, 'symbol', None) in (None, ''):
             raise ValueError('Symbol required as property of price_data')
         if estimator not in ESTIMATORS:
             raise ValueError('Acceptable volatility model is required')
@@ -71,33 +232,32 @@ class VolatilityEstimator(object):
         if isinstance(price_data, numpy.ndarray):
             price_data = array_to_dataframe(price_data)
             price_data.symbol = '-NA-'
-            start = price_data.index[0]
-            end = price_data.index[0]
+            start = str(price_data.index[0])
+            end = str(price_data.index[-1])
         else:
             start = price_data.index[0].to_pydatetime().strftime('%Y-%m-%d')
             end = price_data.index[-1].to_pydatetime().strftime('%Y-%m-%d')
 
         if bench_data is not None:
-            if price_data.shape != bench_data.shape:
-                raise ValueError('price_data and bench_data must be same shape')
             if not isinstance(bench_data, numpy.ndarray) and not \
                     isinstance(bench_data, pandas.DataFrame):
                 raise ValueError('bench_data must be of type numpy.ndarray or pandas.DataFrame')
-            if isinstance(bench_data, numpy.ndarray) and bench_data.shape[0] != 4:
+            if isinstance(bench_data, numpy.ndarray) and (bench_data.ndim != 2 or bench_data.shape[1] != 4):
                 raise ValueError('bench_data of type numpy.ndarray shape of (r, 4)')
             if isinstance(bench_data, pandas.DataFrame) and not \
                     PRICE_COLUMNS.issubset(bench_data.columns):
                 raise ValueError('bench_data requires Open, High, Low, Close')
-            if bench_data.symbol is None or bench_data.symbol == '':
+            if isinstance(bench_data, pandas.DataFrame) and \
+                    getattr(bench_data, 'symbol', None) in (None, ''):
                 raise ValueError('Symbol required as property of bench_data')
 
-            # bench_data = bench_data.loc[start:end]
-
             if isinstance(bench_data, numpy.ndarray):
                 bench_data = array_to_dataframe(bench_data)
                 bench_data.symbol = '-NA-'
 
-            self._bench_data = bench_data
+            # the symbol's prices on the joined dates, price_data itself
+            # unless dates are dropped
+            self._aligned_price_data, self._bench_data = _align_benchmark(price_data, bench_data, missing)
             self._bench_symbol = bench_data.symbol
 
         self._price_data = price_data
@@ -105,19 +265,25 @@ class VolatilityEstimator(object):
         self._start = start
         self._end = end
         self._estimator = estimator
-        
-        matplotlib.rc('image', origin='upper')
 
-        matplotlib.rcParams['font.size'] = '11'
-        
-        matplotlib.rcParams['grid.color'] = 'lightgrey'
-        matplotlib.rcParams['grid.linestyle'] = '-'
-        
-        matplotlib.rcParams['figure.subplot.left'] = 0.1
-        matplotlib.rcParams['figure.subplot.bottom'] = 0.13
-        matplotlib.rcParams['figure.subplot.right'] = 0.9
-        matplotlib.rcParams['figure.subplot.top'] = 0.9
+        if cache_size < 0:
+            raise ValueError('cache_size must be zero or positive')
 
+        self._cache = collections.OrderedDict()
+        self._cache_size = cache_size
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._versions = dict.fromkeys(DATASETS.values(), 0)
+        self._features = {}
+
+    def __setattr__(self, name, value):
+        # reassigning a dataset drops what was computed from the old prices
+        if name in DATASETS and '_cache' in self.__dict__:
+            self._invalidate(DATASETS[name])
+
+        object.__setattr__(self, name, value)
+
+    @profiling.instrument
     def _get_estimator(self, window, price_data, clean=True):
         """Selector for volatility estimator
         
@@ -134,28 +300,155 @@ class VolatilityEstimator(object):
             Estimator series values
         """
 
-        return getattr(models, self._estimator).get_estimator(
-            price_data=price_data,
+        dataset = self._dataset(price_data)
+
+        key = self._cache_key(window, dataset, clean)
+        if key is not None and key in self._cache:
+            return self._cache_get(key)
+
+        estimator = getattr(models, self._estimator).get_estimator(
+            price_data=self._get_features(price_data, dataset),
             window=window,
             clean=clean
         )
-   
-    def cones(self, windows=[30, 60, 90, 120], quantiles=[0.25, 0.75]):
-        """Plots volatility cones
-        
+
+        if key is not None:
+            self._cache_put(key, estimator)
+
+        return estimator
+
+    @profiling.instrument
+    def _get_estimator_multi(self, windows, price_data, clean=True):
+        """Selector for volatility estimator over several windows at once
+
         Parameters
         ----------
         windows : [int, int, ...]
-            List of rolling windows for which to calculate the estimator cones
-        quantiles : [lower, upper]
-            List of lower and upper quantiles for which to plot the cones
+            Rolling windows for which to calculate the estimator
+        clean : boolean
+            Set to True to remove the NaNs at the beginning of each series
+
+        Returns
+        -------
+        y : [pandas.Series, pandas.Series, ...]
+            Estimator series values, one per window
         """
 
-        price_data = self._price_data
+        dataset = self._dataset(price_data)
+
+        keys = [self._cache_key(window, dataset, clean) for window in windows]
+        results = [
+            self._cache_get(key) if key is not None and key in self._cache else None
+            for key in keys
+        ]
+
+        missing = [window for window, result in zip(windows, results) if result is None]
+        if missing:
+            features = self._get_features(price_data, dataset)
+            values = getattr(models, self._estimator).get_estimator_panel_multi(
+                price_data=features,
+                windows=missing
+            )
+            columns = dict((window, column) for column, window in enumerate(missing))
+
+            for i, (window, key) in enumerate(zip(windows, keys)):
+                if results[i] is not None:
+                    continue
+                # a view of each window's values, rather than a dropna copy
+                results[i] = to_series(values[:, columns[window]], features, clean)
+                results[i].name = window
+                if key is not None:
+                    self._cache_put(key, results[i])
+
+        return results
+
+    def _dataset(self, price_data):
+        """Name of the instance dataset price_data refers to
+
+        Returns 'price', 'bench' or 'aligned' (the symbol's prices on the
+        dates joined with the benchmark), or None for any other data. Only
+        the identity of the object is compared, so the lookup is free;
+        reassigning a dataset attribute drops the cached estimators and log
+        features computed from the old data, see _invalidate.
+        """
+
+        for name, dataset in DATASETS.items():
+            if price_data is self.__dict__.get(name):
+                return dataset
+
+        return None
+
+    def _invalidate(self, dataset):
+        """Drops the cached estimators and features of a dataset"""
+
+        for key in [key for key in self._cache if key[3] == dataset]:
+            del self._cache[key]
+        self._features.pop(dataset, None)
+        self._versions[dataset] += 1
+
+    def _get_features(self, price_data, dataset):
+        """Log price ratios of price_data, computed once per dataset"""
+
+        if dataset is None or self._cache_size == 0:
+            return get_features(price_data)
+
+        if dataset not in self._features:
+            self._features[dataset] = get_features(price_data)
+
+        return self._features[dataset]
+
+    def _cache_key(self, window, dataset, clean):
+        """Cache key for an estimator series, None if the data is not cacheable"""
+
+        if self._cache_size == 0 or dataset is None:
+            return None
+
+        return self._estimator, window, clean, dataset, self._versions[dataset]
+
+    def _cache_get(self, key):
+        # a copy, so callers modifying the result leave the cache intact
+        self._cache.move_to_end(key)
+        self._cache_hits += 1
+        return self._cache[key].copy()
+
+    def _cache_put(self, key, estimator):
+        self._cache_misses += 1
+        self._cache[key] = estimator.copy()
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    def cache_info(self):
+        """Statistics of the estimator cache
+
+        Returns
+        -------
+        info : CacheInfo
+            Named tuple of hits, misses, maxsize and currsize
+        """
+
+        return CacheInfo(
+            self._cache_hits,
+            self._cache_misses,
+            self._cache_size,
+            len(self._cache)
+        )
+
+    def clear_cache(self):
+        """Empties the estimator cache and resets its statistics
+
+        Reassigning the price or benchmark data is noticed without it, but
+        edits made in place to their values are not: call it after them, or
+        to free the memory of the cached series.
+        """
+
+        self._cache.clear()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._features = {}
+
+    @staticmethod
+    def _check_quantiles(quantiles):
 
-        if len(windows) < 2:
-            raise ValueError(
-                'Two or more window periods required')
         if len(quantiles) != 2:
             raise ValueError(
                 'A two element list of quantiles is required, lower and upper')
@@ -165,7 +458,17 @@ class VolatilityEstimator(object):
         if quantiles[0] > quantiles[1]:
             raise ValueError(
                 'The lower quantiles (first element) must be less than the upper quantile (second element)')
-        
+
+    @profiling.instrument
+    def _cones_data(self, windows, quantiles):
+        """Max, upper quantile, median, lower quantile, min and last value of
+        the estimator for each window, and the estimator series"""
+
+        if len(windows) < 2:
+            raise ValueError(
+                'Two or more window periods required')
+        self._check_quantiles(quantiles)
+
         max_ = []
         min_ = []
         top_q = []
@@ -174,27 +477,222 @@ class VolatilityEstimator(object):
         realized = []
         data = []
 
-        for window in windows:
-            
-            estimator = self._get_estimator(
-                window=window,
-                price_data=price_data
-            )
+        estimators = self._get_estimator_multi(
+            windows=windows,
+            price_data=self._price_data
+        )
+
+        for estimator in estimators:
 
             max_.append(estimator.max())
             top_q.append(estimator.quantile(quantiles[1]))
             median.append(estimator.median())
             bottom_q.append(estimator.quantile(quantiles[0]))
             min_.append(estimator.min())
-            realized.append(estimator[-1])
+            realized.append(estimator.iloc[-1])
 
             data.append(estimator)
+
+        return max_, top_q, median, bottom_q, min_, realized, data
+
+    @profiling.instrument
+    def _rolling_quantiles_data(self, window, quantiles):
+        """Estimator with its rolling upper quantile, median and lower quantile"""
+
+        self._check_quantiles(quantiles)
+
+        estimator = self._get_estimator(
+            window=window,
+            price_data=self._price_data
+        )
+
+        top_q = estimator.rolling(window=window, center=False).quantile(quantiles[1])
+        median = estimator.rolling(window=window, center=False).median()
+        bottom_q = estimator.rolling(window=window, center=False).quantile(quantiles[0])
+
+        return estimator, top_q, median, bottom_q
+
+    @profiling.instrument
+    def _rolling_extremes_data(self, window):
+        """Estimator with its rolling max and min"""
+
+        estimator = self._get_estimator(
+            window=window,
+            price_data=self._price_data
+        )
+
+        max_ = estimator.rolling(window=window, center=False).max()
+        min_ = estimator.rolling(window=window, center=False).min()
+
+        return estimator, max_, min_
+
+    @profiling.instrument
+    def _rolling_descriptives_data(self, window):
+        """Estimator with its rolling mean, standard deviation and z-score"""
+
+        estimator = self._get_estimator(
+            window=window,
+            price_data=self._price_data
+        )
+
+        mean = estimator.rolling(window=window, center=False).mean()
+        std = estimator.rolling(window=window, center=False).std()
+        z_score = (estimator - mean) / std
+
+        return estimator, mean, std, z_score
+
+    @profiling.instrument
+    def _benchmark_estimators(self, window):
+        """Symbol and benchmark estimators on the dates both have a value"""
+
+        y = self._get_estimator(
+            window=window,
+            price_data=self._aligned_price_data
+        )
+        x = self._get_estimator(
+            window=window,
+            price_data=self._bench_data
+        )
+
+        both = pandas.concat([y, x], axis=1, join='inner').dropna().index
+
+        return y.reindex(both), x.reindex(both)
+
+    @profiling.instrument
+    def _benchmark_compare_data(self, window):
+        """Symbol and benchmark estimators and their ratio"""
+
+        y, x = self._benchmark_estimators(window)
+
+        return y, x, y / x
+
+    @profiling.instrument
+    def _benchmark_correlation_data(self, window):
+        """Symbol and benchmark estimators and their rolling correlation"""
+
+        y, x = self._benchmark_estimators(window)
+
+        return y, x, x.rolling(window=window).corr(other=y)
+
+    @profiling.instrument
+    def cone_surface(self, windows=None, quantiles=[0.0, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0]):
+        """Volatility cones for a dense grid of windows as arrays
+
+        Parameters
+        ----------
+        windows : [int, int, ...]
+            List of rolling windows, every window from 2 to 252 if None
+        quantiles : [float, float, ...]
+            List of quantiles between 0 (min) and 1 (max)
+
+        Returns
+        -------
+        surface : volatility.cones.ConeSurface
+            windows, quantiles, values of shape (len(windows), len(quantiles))
+            and the realized (last) value of each window
+        """
+
+        from volatility import cones
+
+        return cones.cone_surface(
+            getattr(models, self._estimator),
+            self._get_features(self._price_data, 'price'),
+            windows=cones.WINDOWS if windows is None else windows,
+            quantiles=quantiles
+        )
+
+    @profiling.instrument
+    def bootstrap_realized(self, window=30, resamples=1000, block_size=5, method='stationary',
+                           confidence=0.95, seed=None, processes=1):
+        """Block bootstrap confidence interval of the last estimator value
+
+        Parameters
+        ----------
+        window : int
+            Rolling window for which to calculate the estimator
+        resamples, block_size, method, confidence, seed, processes
+            See volatility.bootstrap.bootstrap_realized
+
+        Returns
+        -------
+        interval : volatility.bootstrap.Interval
+            estimate, lower, upper and the estimates of all resamples
+        """
+
+        from volatility import bootstrap
+
+        return bootstrap.bootstrap_realized(
+            self._estimator,
+            *[self._price_data[column].values for column in ['Open', 'High', 'Low', 'Close']],
+            window=window,
+            resamples=resamples,
+            block_size=block_size,
+            method=method,
+            confidence=confidence,
+            seed=seed,
+            processes=processes
+        )
+
+    @profiling.instrument
+    def bootstrap_cones(self, windows=[30, 60, 90, 120], quantiles=[0.25, 0.75], resamples=1000,
+                        block_size=20, method='stationary', confidence=0.95, seed=None, processes=1):
+        """Block bootstrap confidence intervals of the cone quantiles
+
+        Parameters
+        ----------
+        windows : [int, int, ...]
+            List of rolling windows for which to calculate the estimator cones
+        quantiles : [float, float, ...]
+            List of quantiles between 0 (min) and 1 (max)
+        resamples, block_size, method, confidence, seed, processes
+            See volatility.bootstrap.bootstrap_cones
+
+        Returns
+        -------
+        interval : volatility.bootstrap.Interval
+            estimate, lower and upper of shape (len(windows), len(quantiles))
+            and the cone quantiles of all resamples
+        """
+
+        from volatility import bootstrap
+
+        return bootstrap.bootstrap_cones(
+            self._estimator,
+            *[self._price_data[column].values for column in ['Open', 'High', 'Low', 'Close']],
+            windows=windows,
+            quantiles=quantiles,
+            resamples=resamples,
+            block_size=block_size,
+            method=method,
+            confidence=confidence,
+            seed=seed,
+            processes=processes
+        )
+
+    @profiling.instrument
+    def cones(self, windows=[30, 60, 90, 120], quantiles=[0.25, 0.75]):
+        """Plots volatility cones
+        
+        Parameters
+        ----------
+        windows : [int, int, ...]
+            List of rolling windows for which to calculate the estimator cones
+        quantiles : [lower, upper]
+            List of lower and upper quantiles for which to plot the cones
+        """
+
+        max_, top_q, median, bottom_q, min_, realized, data = self._cones_data(
+            windows=windows,
+            quantiles=quantiles
+        )
         
         if self._estimator is "Skew" or self._estimator is "Kurtosis":
             f = lambda x: "%i" % round(x, 0)
         else:
             f = lambda x: "%i%%" % round(x*100, 0)
 
+        plt = _pyplot()
+
         # figure
         fig = plt.figure(figsize=(8, 6))
         fig.autofmt_xdate()
@@ -247,6 +745,7 @@ class VolatilityEstimator(object):
         
         return fig, plt
 
+    @profiling.instrument
     def rolling_quantiles(self, window=30, quantiles=[0.25, 0.75]):
         """Plots rolling quantiles of volatility
         
@@ -258,35 +757,21 @@ class VolatilityEstimator(object):
             List of lower and upper quantiles for which to plot
         """
 
-        price_data = self._price_data
-
-        if len(quantiles) != 2:
-            raise ValueError(
-                'A two element list of quantiles is required, lower and upper')
-        if quantiles[0] + quantiles[1] != 1.0:
-            raise ValueError(
-                'The sum of the quantiles must equal 1.0')
-        if quantiles[0] > quantiles[1]:
-            raise ValueError(
-                'The lower quantiles (first element) must be less than the upper quantile (second element)')
-        
-        estimator = self._get_estimator(
+        estimator, top_q, median, bottom_q = self._rolling_quantiles_data(
             window=window,
-            price_data=price_data
+            quantiles=quantiles
         )
         date = estimator.index
-        
-        top_q = estimator.rolling(window=window, center=False).quantile(quantiles[1])
-        median = estimator.rolling(window=window, center=False).median()
-        bottom_q = estimator.rolling(window=window, center=False).quantile(quantiles[0])
         realized = estimator
-        last = estimator[-1]
+        last = estimator.iloc[-1]
 
         if self._estimator is "Skew" or self._estimator is "Kurtosis":
             f = lambda x: "%i" % round(x, 0)
         else:
             f = lambda x: "%i%%" % round(x*100, 0)
 
+        plt = _pyplot()
+
         # figure
         fig = plt.figure(figsize=(8, 6))
         fig.autofmt_xdate()
@@ -335,6 +820,7 @@ class VolatilityEstimator(object):
         
         return fig, plt
 
+    @profiling.instrument
     def rolling_extremes(self, window=30):
         """Plots rolling max and min of volatility estimator
         
@@ -344,23 +830,18 @@ class VolatilityEstimator(object):
             Rolling window for which to calculate the estimator
         """
 
-        price_data = self._price_data
-
-        estimator = self._get_estimator(
-            window=window,
-            price_data=price_data
-        )
+        estimator, max_, min_ = self._rolling_extremes_data(window=window)
         date = estimator.index
-        max_ = estimator.rolling(window=window, center=False).max()
-        min_ = estimator.rolling(window=window, center=False).min()
         realized = estimator
-        last = estimator[-1]
+        last = estimator.iloc[-1]
 
         if self._estimator is "Skew" or self._estimator is "Kurtosis":
             f = lambda x: "%i" % round(x, 0)
         else:
             f = lambda x: "%i%%" % round(x*100, 0)
 
+        plt = _pyplot()
+
         # figure
         fig = plt.figure(figsize=(8, 6))
         fig.autofmt_xdate()
@@ -408,6 +889,7 @@ class VolatilityEstimator(object):
         
         return fig, plt
 
+    @profiling.instrument
     def rolling_descriptives(self, window=30):
         """Plots rolling first and second moment of volatility estimator
         
@@ -417,25 +899,19 @@ class VolatilityEstimator(object):
             Rolling window for which to calculate the estimator
         """
 
-        price_data = self._price_data
-
-        estimator = self._get_estimator(
-            window=window,
-            price_data=price_data
-        )
+        estimator, mean, std, z_score = self._rolling_descriptives_data(window=window)
         date = estimator.index
-        mean = estimator.rolling(window=window, center=False).mean()
-        std = estimator.rolling(window=window, center=False).std()
-        z_score = (estimator - mean) / std
         
         realized = estimator
-        last = estimator[-1]
+        last = estimator.iloc[-1]
 
         if self._estimator is "Skew" or self._estimator is "Kurtosis":
             f = lambda x: "%i" % round(x, 0)
         else:
             f = lambda x: "%i%%" % round(x*100, 0)
 
+        plt = _pyplot()
+
         # figure
         fig = plt.figure(figsize=(8, 6))
         fig.autofmt_xdate()
@@ -503,6 +979,7 @@ class VolatilityEstimator(object):
         
         return fig, plt
 
+    @profiling.instrument
     def histogram(self, window=90, bins=100, normed=True):
         """
         
@@ -514,19 +991,20 @@ class VolatilityEstimator(object):
             
         """
 
-        price_data = self._price_data
-
         estimator = self._get_estimator(
             window=window,
-            price_data=price_data
+            price_data=self._price_data
         )
         mean = estimator.mean()
         std = estimator.std()
-        last = estimator[-1]
+        last = estimator.iloc[-1]
+
+        from scipy.stats import norm
+        plt = _pyplot()
 
         fig = plt.figure(figsize=(8, 6))
         
-        n, bins, patches = plt.hist(estimator, bins, normed=normed, facecolor='blue', alpha=0.25)
+        n, bins, patches = plt.hist(estimator, bins, density=normed, facecolor='blue', alpha=0.25)
         
         if normed:
             y = norm.pdf(bins, mean, std)
@@ -541,6 +1019,7 @@ class VolatilityEstimator(object):
         
         return fig, plt
     
+    @profiling.instrument
     def benchmark_compare(self, window=90):
         """
         
@@ -552,26 +1031,16 @@ class VolatilityEstimator(object):
             
         """
 
-        price_data = self._price_data
-        bench_data = self._bench_data
-
-        y = self._get_estimator(
-            window=window,
-            price_data=price_data
-        )
-        x = self._get_estimator(
-            window=window,
-            price_data=bench_data
-        )
+        y, x, ratio = self._benchmark_compare_data(window=window)
         date = y.index
-        
-        ratio = y / x
 
         if self._estimator is "Skew" or self._estimator is "Kurtosis":
             f = lambda x: "%i" % round(x, 0)
         else:
             f = lambda x: "%i%%" % round(x*100, 0)
         
+        plt = _pyplot()
+
         # figure
         fig = plt.figure(figsize=(8, 6))
         fig.autofmt_xdate()
@@ -616,6 +1085,7 @@ class VolatilityEstimator(object):
 
         return fig, plt
 
+    @profiling.instrument
     def benchmark_correlation(self, window=90):
         """
         
@@ -627,26 +1097,16 @@ class VolatilityEstimator(object):
             
         """
         
-        price_data = self._price_data
-        bench_data = self._bench_data
-
-        y = self._get_estimator(
-            window=window,
-            price_data=price_data
-        )
-        x = self._get_estimator(
-            window=window,
-            price_data=bench_data
-        )
+        y, x, corr = self._benchmark_correlation_data(window=window)
         date = y.index
 
-        corr = x.rolling(window=window).corr(other=y)
-
         if self._estimator is "Skew" or self._estimator is "Kurtosis":
             f = lambda x: "%i" % round(x, 0)
         else:
             f = lambda x: "%i%%" % round(x*100, 0)
         
+        plt = _pyplot()
+
         # figure
         fig = plt.figure(figsize=(8, 6))
         cones = plt.axes()
@@ -671,6 +1131,7 @@ class VolatilityEstimator(object):
         
         return fig, plt
 
+    @profiling.instrument
     def benchmark_regression(self, window=90):
         """
         
@@ -681,23 +1142,150 @@ class VolatilityEstimator(object):
         bins : int
             
         """
-        price_data = self._price_data
-        bench_data = self._bench_data
-
-        y = self._get_estimator(
-            window=window,
-            price_data=price_data
-        )
-        X = self._get_estimator(
-            window=window,
-            price_data=bench_data
-        )
+        y, X = self._benchmark_estimators(window)
         
+        import statsmodels.api as sm
+
         model = sm.OLS(y, X)
         results = model.fit()
 
         return results.summary()
+
+    @profiling.instrument
+    def benchmark_rolling_regression(self, window=30, regression_window=None, min_periods=2):
+        """Time-varying regression of the symbol estimator on the benchmark estimator
+
+        Parameters
+        ----------
+        window : int
+            Rolling window for which to calculate the estimator
+        regression_window : int
+            Rolling window of the regression, expanding if None
+        min_periods : int
+            Minimum number of observations of an expanding regression
+
+        Returns
+        -------
+        y : pandas.DataFrame
+            alpha, beta, rsquared and nobs by date
+        """
+
+        from volatility.regression import rolling_ols
+
+        y, x = self._benchmark_estimators(window)
+        aligned = pandas.concat([y, x], axis=1, join='inner')
+
+        result = rolling_ols(
+            aligned.iloc[:, 0].values,
+            aligned.iloc[:, 1].values,
+            window=regression_window,
+            min_periods=min_periods
+        )
+
+        return pandas.DataFrame(result._asdict(), index=aligned.index)
     
+    @profiling.instrument
+    def term_sheet_data(
+            self,
+            window=30,
+            windows=[30, 60, 90, 120],
+            quantiles=[0.25, 0.75],
+            bins=100,
+            normed=True,
+            path=None):
+        """Computes the numbers behind every term sheet page without plotting
+
+        Parameters
+        ----------
+        window, windows, quantiles, bins, normed
+            See term_sheet
+        path : string
+            If given, the metrics are also saved to this .npz file
+
+        Returns
+        -------
+        data : dict
+            numpy arrays keyed '<table>/<column>'. The arrays of the cones,
+            rolling, histogram and benchmark tables share their length
+            within each table; info, estimator and regression hold scalars
+        """
+
+        max_, top_q, median, bottom_q, min_, realized, _ = self._cones_data(
+            windows=windows,
+            quantiles=quantiles
+        )
+        estimator, rolling_top_q, rolling_median, rolling_bottom_q = self._rolling_quantiles_data(
+            window=window,
+            quantiles=quantiles
+        )
+        _, rolling_max, rolling_min = self._rolling_extremes_data(window=window)
+        _, rolling_mean, rolling_std, z_score = self._rolling_descriptives_data(window=window)
+        y, x, ratio = self._benchmark_compare_data(window=window)
+        _, _, corr = self._benchmark_correlation_data(window=window)
+
+        counts, edges = numpy.histogram(estimator, bins=bins, density=normed)
+
+        benchmark = pandas.concat([y, x, ratio, corr], axis=1, join='inner')
+        beta, bse, rsquared = _ols_through_origin(
+            benchmark.iloc[:, 0].values,
+            benchmark.iloc[:, 1].values
+        )
+
+        data = {
+            'info/symbol': numpy.array(self._symbol),
+            'info/bench_symbol': numpy.array(self._bench_symbol),
+            'info/estimator': numpy.array(self._estimator),
+            'info/start': numpy.array(self._price_data.index.values[0]),
+            'info/end': numpy.array(self._price_data.index.values[-1]),
+            'info/window': numpy.array(window),
+            'info/quantiles': numpy.array(quantiles, dtype=float),
+
+            'cones/window': numpy.array(windows),
+            'cones/max': numpy.array(max_),
+            'cones/top_q': numpy.array(top_q),
+            'cones/median': numpy.array(median),
+            'cones/bottom_q': numpy.array(bottom_q),
+            'cones/min': numpy.array(min_),
+            'cones/realized': numpy.array(realized),
+
+            'rolling/date': estimator.index.values,
+            'rolling/realized': estimator.values,
+            'rolling/top_q': rolling_top_q.values,
+            'rolling/median': rolling_median.values,
+            'rolling/bottom_q': rolling_bottom_q.values,
+            'rolling/max': rolling_max.values,
+            'rolling/min': rolling_min.values,
+            'rolling/mean': rolling_mean.values,
+            'rolling/std': rolling_std.values,
+            'rolling/z_score': z_score.values,
+
+            'estimator/mean': numpy.array(estimator.mean()),
+            'estimator/std': numpy.array(estimator.std()),
+            'estimator/last': numpy.array(estimator.iloc[-1]),
+
+            'histogram/left': edges[:-1],
+            'histogram/right': edges[1:],
+            'histogram/count': counts,
+
+            'benchmark/date': benchmark.index.values,
+            'benchmark/symbol': benchmark.iloc[:, 0].values,
+            'benchmark/bench': benchmark.iloc[:, 1].values,
+            'benchmark/ratio': benchmark.iloc[:, 2].values,
+            'benchmark/correlation': benchmark.iloc[:, 3].values,
+
+            'regression/beta': numpy.array(beta),
+            'regression/bse': numpy.array(bse),
+            'regression/tvalue': numpy.array(beta / bse),
+            'regression/rsquared': numpy.array(rsquared),
+            'regression/nobs': numpy.array(len(benchmark)),
+        }
+
+        if path is not None:
+            numpy.savez_compressed(path, **data)
+
+        return data
+
+    @profiling.instrument
     def term_sheet(
             self,
             window=30,
@@ -705,28 +1293,94 @@ class VolatilityEstimator(object):
             quantiles=[0.25, 0.75],
             bins=100,
             normed=True,
-            open=False):
-        
-        cones_fig, cones_plt = self.cones(windows=windows, quantiles=quantiles)
-        rolling_quantiles_fig, rolling_quantiles_plt = self.rolling_quantiles(window=window, quantiles=quantiles)
-        rolling_extremes_fig, rolling_extremes_plt = self.rolling_extremes(window=window)
-        rolling_descriptives_fig, rolling_descriptives_plt = self.rolling_descriptives(window=window)
-        histogram_fig, histogram_plt = self.histogram(window=window, bins=bins, normed=normed)
-        benchmark_compare_fig, benchmark_compare_plt = self.benchmark_compare(window=window)
-        benchmark_corr_fig, benchmark_corr_plt = self.benchmark_correlation(window=window)
-        benchmark_regression = self.benchmark_regression(window=window)
-        
-        filename = self._symbol.upper() + '_termsheet_' + datetime.datetime.today().strftime("%Y%m%d") + '.pdf'
-        fn = os.path.abspath(os.path.join(u'..', u'term-sheets', filename))
-        pp = PdfPages(fn)
-        
-        pp.savefig(cones_fig)
-        pp.savefig(rolling_quantiles_fig)
-        pp.savefig(rolling_extremes_fig)
-        pp.savefig(rolling_descriptives_fig)
-        pp.savefig(histogram_fig)
-        pp.savefig(benchmark_compare_fig)
-        pp.savefig(benchmark_corr_fig)
+            open=False,
+            output_dir=None,
+            processes=1):
+        """Writes all the plots and the regression results to a PDF term sheet
+
+        Parameters
+        ----------
+        window : int
+            Rolling window for which to calculate the estimator
+        windows : [int, int, ...]
+            List of rolling windows for the estimator cones
+        quantiles : [lower, upper]
+            List of lower and upper quantiles
+        bins : int
+            Number of histogram bins
+        normed : boolean
+            Set to True to plot a normed histogram with the normal density
+        output_dir : string
+            Directory the PDF is written to, ../term-sheets by default
+        processes : int
+            Number of worker processes rendering the pages in parallel on the
+            Agg backend; the pages are assembled in order with pypdf, from
+            the pdf extra. 1 renders the pages one after another in this
+            process
+
+        Returns
+        -------
+        fn : string
+            Path of the PDF
+        """
+
+        pages = [
+            ('cones', {'windows': windows, 'quantiles': quantiles}),
+            ('rolling_quantiles', {'window': window, 'quantiles': quantiles}),
+            ('rolling_extremes', {'window': window}),
+            ('rolling_descriptives', {'window': window}),
+            ('histogram', {'window': window, 'bins': bins, 'normed': normed}),
+            ('benchmark_compare', {'window': window}),
+            ('benchmark_correlation', {'window': window}),
+            ('benchmark_regression', {'window': window}),
+        ]
+
+        filename = term_sheet_filename(self._symbol)
+        if output_dir is None:
+            output_dir = os.path.join(u'..', u'term-sheets')
+        fn = os.path.abspath(os.path.join(output_dir, filename))
+
+        # write next to the target and rename so an interrupted run never
+        # leaves a partial term sheet behind
+        tmp = fn + '.%d.tmp' % os.getpid()
+        try:
+            if processes > 1:
+                self._render_term_sheet_parallel(pages, tmp, window, windows, processes)
+            else:
+                from matplotlib.backends.backend_pdf import PdfPages
+                plt = _pyplot()
+
+                pp = PdfPages(tmp)
+                try:
+                    for method, kwargs in pages:
+                        fig = self._term_sheet_figure(method, kwargs)
+                        with profiling.stage('VolatilityEstimator.term_sheet.savefig'):
+                            pp.savefig(fig)
+                        plt.close(fig)
+                finally:
+                    with profiling.stage('VolatilityEstimator.term_sheet.close'):
+                        pp.close()
+
+            os.replace(tmp, fn)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        
+        print('%s output complete' % filename)
+
+        return fn
+
+    @profiling.instrument
+    def _term_sheet_figure(self, method, kwargs):
+        """Figure of one term sheet page"""
+
+        if method != 'benchmark_regression':
+            fig, _ = getattr(self, method)(**kwargs)
+            return fig
+
+        benchmark_regression = self.benchmark_regression(**kwargs)
+
+        plt = _pyplot()
 
         fig = plt.figure(figsize=(8, 6))
         ax = fig.add_subplot(111)
@@ -737,9 +1391,41 @@ class VolatilityEstimator(object):
             fontsize=9
         )
 
-        plt.axis('off')
+        ax.axis('off')
         fig.tight_layout()
-        pp.savefig(fig)
-        pp.close()
-        
-        print('%s output complete' % filename)
+
+        return fig
+
+    @profiling.instrument
+    def _render_term_sheet_parallel(self, pages, fn, window, windows, processes):
+        """Renders the pages in worker processes and assembles them in order"""
+
+        try:
+            from pypdf import PdfReader, PdfWriter
+        except ImportError:
+            raise ImportError(
+                'pypdf is required to render term sheet pages in parallel, '
+                'install it with pip install volatility-trading[pdf]'
+            )
+
+        # compute the estimators once here; the cache is pickled with the
+        # instance so the workers only build and render the figures
+        self._get_estimator_multi(windows=windows, price_data=self._price_data)
+        self._get_estimator(window=window, price_data=self._price_data)
+        self._get_estimator(window=window, price_data=self._aligned_price_data)
+        self._get_estimator(window=window, price_data=self._bench_data)
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as executor:
+            rendered = executor.map(
+                _render_term_sheet_page,
+                [self] * len(pages),
+                [method for method, _ in pages],
+                [kwargs for _, kwargs in pages]
+            )
+
+            writer = PdfWriter()
+            for page in rendered:
+                writer.append(PdfReader(io.BytesIO(page)))
+
+        with open(fn, 'wb') as f:
+            writer.write(f)